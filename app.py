@@ -8,15 +8,46 @@ warnings.filterwarnings("ignore", message=".*shadows an attribute.*")
 from dotenv import load_dotenv
 load_dotenv()
 
+import asyncio
+from contextlib import asynccontextmanager
+from pathlib import Path
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from controllers.rag_controller import router as rag_router
+from helpers.rag_helpers.metrics import ServerTimingMiddleware
+from dependencies import get_health_handler, get_query_handler, preload
+
+WARM_QUESTIONS_FILE = "data/warm_questions.txt"
+
+
+async def warm_up() -> None:
+    # Load and exercise the models before /ready reports ready, then warm the answer cache.
+    if not await get_health_handler().warm_up(preload):
+        return
+    warm_file = Path(WARM_QUESTIONS_FILE)
+    if warm_file.exists():
+        questions = [line.strip() for line in warm_file.read_text().splitlines() if line.strip()]
+        await get_query_handler().warm_answer_cache(questions)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Runs in the background so /health answers while models load; /ready gates traffic.
+    warm_task = asyncio.create_task(warm_up())
+
+    yield
+
+    if warm_task and not warm_task.done():
+        warm_task.cancel()
+
 
 app = FastAPI(
     title="RAG API",
     description="Retrieval-Augmented Generation API",
     version="1.0.0",
+    lifespan=lifespan,
 )
 
 app.add_middleware(
@@ -27,6 +58,8 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+app.add_middleware(ServerTimingMiddleware)
+
 app.include_router(rag_router)
 
 
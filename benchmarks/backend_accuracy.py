@@ -0,0 +1,142 @@
+"""Accuracy check for quantized / ONNX inference backends against fp32 torch.
+
+Samples stored chunks from ``data/chunks`` (written by IngestionHandler) and
+reports, for each candidate backend:
+
+- embedding cosine drift vs. fp32 (mean, p1 and min cosine similarity);
+- rerank agreement vs. fp32: top-1 match rate, top-3 set overlap and
+  Kendall tau over the full candidate ordering;
+- per-item latency for both models.
+
+Pseudo-queries are taken from chunk section headings (or the first words of
+the chunk), and each query is reranked against a random candidate set that
+includes its source chunk.
+
+    python -m benchmarks.backend_accuracy --backends torch-int8 onnx --sample 500
+"""
+
+import argparse
+import random
+import time
+from itertools import combinations
+from pathlib import Path
+
+import numpy as np
+import orjson
+import torch
+
+from helpers.rag_helpers.inference import load_embedding_model, load_reranker
+from services.rag_services.embedding_service import EMBEDDING_MODEL
+from services.rag_services.retrieval_service import RERANKER_MODEL, TOP_K, TOP_N
+
+CHUNKS_DIR = "data/chunks"
+
+
+def load_chunks(chunks_dir: str, sample: int, seed: int) -> list[dict]:
+    chunks = []
+    for path in sorted(Path(chunks_dir).glob("*_chunks.jsonl")):
+        with open(path, "rb") as f:
+            chunks.extend(orjson.loads(line) for line in f if line.strip())
+    random.Random(seed).shuffle(chunks)
+    return chunks[:sample]
+
+
+def pseudo_query(chunk: dict) -> str:
+    heading = chunk.get("section_heading")
+    return heading if heading else " ".join(chunk["chunk_text"].split()[:12])
+
+
+def kendall_tau(a: list[int], b: list[int]) -> float:
+    rank_b = {item: i for i, item in enumerate(b)}
+    concordant = discordant = 0
+    for x, y in combinations(a, 2):
+        if rank_b[x] < rank_b[y]:
+            concordant += 1
+        else:
+            discordant += 1
+    total = concordant + discordant
+    return (concordant - discordant) / total if total else 1.0
+
+
+def rerank_scores(tokenizer, model, query: str, texts: list[str]) -> np.ndarray:
+    with torch.no_grad():
+        inputs = tokenizer(
+            [query] * len(texts), texts, padding=True, truncation=True, max_length=512, return_tensors="pt"
+        )
+        return model(**inputs).logits.view(-1).cpu().numpy()
+
+
+def build_rerank_cases(chunks: list[dict], cases: int, seed: int) -> list[tuple[str, list[str]]]:
+    rng = random.Random(seed)
+    result = []
+    for chunk in chunks[:cases]:
+        others = rng.sample(chunks, min(TOP_K - 1, len(chunks) - 1))
+        candidates = [chunk["chunk_text"]] + [c["chunk_text"] for c in others if c is not chunk]
+        rng.shuffle(candidates)
+        result.append((pseudo_query(chunk), candidates[:TOP_K]))
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backends", nargs="+", default=["torch-int8"])
+    parser.add_argument("--embedding-model", default=EMBEDDING_MODEL)
+    parser.add_argument("--reranker-model", default=RERANKER_MODEL)
+    parser.add_argument("--chunks-dir", default=CHUNKS_DIR)
+    parser.add_argument("--sample", type=int, default=500)
+    parser.add_argument("--rerank-cases", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    chunks = load_chunks(args.chunks_dir, args.sample, args.seed)
+    if len(chunks) < 2:
+        raise SystemExit(f"Need at least 2 stored chunks in {args.chunks_dir}; run an ingestion first.")
+    texts = [c["chunk_text"] for c in chunks]
+    cases = build_rerank_cases(chunks, args.rerank_cases, args.seed)
+
+    ref_embedder = load_embedding_model(args.embedding_model)
+    ref_embedder.encode(texts[:8], convert_to_numpy=True)
+    start = time.perf_counter()
+    reference = ref_embedder.encode(texts, convert_to_numpy=True)
+    ref_embed_ms = (time.perf_counter() - start) / len(texts) * 1000
+
+    ref_tokenizer, ref_model = load_reranker(args.reranker_model)
+    rerank_scores(ref_tokenizer, ref_model, *cases[0])
+    start = time.perf_counter()
+    ref_orders = [
+        list(np.argsort(-rerank_scores(ref_tokenizer, ref_model, q, c))) for q, c in cases
+    ]
+    ref_rerank_ms = (time.perf_counter() - start) / len(cases) * 1000
+
+    print(f"chunks={len(texts)} rerank_cases={len(cases)} candidates={TOP_K}")
+    print(f"fp32 torch: embed {ref_embed_ms:.2f} ms/chunk, rerank {ref_rerank_ms:.1f} ms/query")
+
+    for backend in args.backends:
+        model = load_embedding_model(args.embedding_model, backend=backend)
+        model.encode(texts[:8], convert_to_numpy=True)
+        start = time.perf_counter()
+        vectors = np.asarray(model.encode(texts, convert_to_numpy=True), dtype=np.float32)
+        embed_ms = (time.perf_counter() - start) / len(texts) * 1000
+        cosines = (vectors * reference).sum(axis=1) / (
+            np.linalg.norm(vectors, axis=1) * np.linalg.norm(reference, axis=1)
+        )
+
+        tokenizer, reranker = load_reranker(args.reranker_model, backend=backend)
+        rerank_scores(tokenizer, reranker, *cases[0])
+        start = time.perf_counter()
+        orders = [list(np.argsort(-rerank_scores(tokenizer, reranker, q, c))) for q, c in cases]
+        rerank_ms = (time.perf_counter() - start) / len(cases) * 1000
+
+        top1 = np.mean([a[0] == b[0] for a, b in zip(orders, ref_orders)])
+        topn = np.mean([len(set(a[:TOP_N]) & set(b[:TOP_N])) / TOP_N for a, b in zip(orders, ref_orders)])
+        tau = np.mean([kendall_tau(a, b) for a, b in zip(orders, ref_orders)])
+
+        print(f"\n[{backend}]")
+        print(f"  embed  {embed_ms:.2f} ms/chunk ({ref_embed_ms / embed_ms:.2f}x fp32)")
+        print(f"  cosine vs fp32: mean {cosines.mean():.5f}  p1 {np.percentile(cosines, 1):.5f}  min {cosines.min():.5f}")
+        print(f"  rerank {rerank_ms:.1f} ms/query ({ref_rerank_ms / rerank_ms:.2f}x fp32)")
+        print(f"  rerank vs fp32: top-1 {top1:.3f}  top-{TOP_N} overlap {topn:.3f}  kendall tau {tau:.3f}")
+
+
+if __name__ == "__main__":
+    main()
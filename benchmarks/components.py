@@ -0,0 +1,379 @@
+"""Offline benchmark suite for the ingestion and retrieval components.
+
+Runs each component over the bundled irs.gov-like fixtures in
+``benchmarks/fixtures`` with no network access: Qdrant runs in local
+``:memory:`` mode, generation goes to the stub Ollama server and models are
+loaded from the local Hugging Face cache or a directory.
+
+Components:
+
+- ``html_parse``: ``HtmlParser.parse`` per HTML page
+- ``pdf_extract``: ``extract_pdf_text`` per PDF
+- ``chunk_page``: ``chunk_page`` per parsed page
+- ``chunk_by_sections``: ``detect_sections`` + ``chunk_by_sections`` per article text
+- ``embed``: ``EmbeddingService.get_embedding`` per page's chunk batch
+- ``rerank``: ``RetrievalService.rerank`` of RERANK_CANDIDATES chunks per query
+- ``upsert``: ``IngestionService.upsert_chunks`` per page's chunks
+- ``generate``: prompt building + ``LLMService.generate`` round trip to the stub
+
+Each reports items/s and per-call p50/p95 latency. ``--save-baseline NAME``
+stores the results in ``benchmarks/baselines/NAME.json``; ``--compare NAME``
+checks a run against it and exits with status 1 if any component's
+throughput drops, or its p50 latency grows, by more than ``--tolerance``.
+A missing baseline file, or a run with no component in the baseline, is an
+error; components that were skipped or are not in the baseline are listed
+as not compared. Baselines are only comparable on the same machine and
+models, so none are committed; the environment is stored alongside and
+differences are reported.
+
+    python -m benchmarks.components --save-baseline local
+    python -m benchmarks.components --compare local
+    python -m benchmarks.components --components html_parse chunk_page --repeat 50
+"""
+
+import os
+
+# Models must come from the local cache or a directory; never reach the hub.
+os.environ.setdefault("HF_HUB_OFFLINE", "1")
+os.environ.setdefault("TRANSFORMERS_OFFLINE", "1")
+
+import argparse
+import itertools
+import platform
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable
+
+import numpy as np
+import orjson
+from bs4 import BeautifulSoup
+from qdrant_client import QdrantClient
+from qdrant_client.models import Distance, VectorParams
+
+from benchmarks.stub_ollama import StubOllamaServer
+from helpers.rag_helpers.caches import CollectionVersions, EmbeddingCache
+from helpers.rag_helpers.chunkers import chunk_page
+from helpers.rag_helpers.chunkers.chunking_helpers import chunk_by_sections, detect_sections
+from helpers.rag_helpers.extractors import extract_pdf_text
+from helpers.rag_helpers.parsers import HtmlParser, PdfParser
+from models import ContentType, CrawledPage
+from services.rag_services.embedding_service import EMBEDDING_MODEL, EmbeddingService
+from services.rag_services.ingestion_service import IngestionService
+from services.rag_services.llm_service import LLMService
+from services.rag_services.qdrant_service import QdrantService
+from services.rag_services.retrieval_service import RERANKER_MODEL, RetrievalService
+from utils import compute_content_hash
+
+FIXTURES_DIR = Path(__file__).parent / "fixtures"
+BASELINES_DIR = Path(__file__).parent / "baselines"
+DEFAULT_TOLERANCE = 0.25
+DEFAULT_REPEAT = 20
+WARMUP_CALLS = 2
+UPSERT_VECTOR_SIZE = 384
+UPSERT_COLLECTION = "bench_components"
+RERANK_CANDIDATES = 20
+RERANK_QUERIES = [
+    "how do I claim exemption from withholding on form w-4",
+    "what are the eitc income limits for two children",
+    "when are estimated tax payments due",
+    "penalty for underpayment of estimated tax",
+]
+COMPONENTS = [
+    "html_parse",
+    "pdf_extract",
+    "chunk_page",
+    "chunk_by_sections",
+    "embed",
+    "rerank",
+    "upsert",
+    "generate",
+]
+
+
+class ComponentSkipped(Exception):
+    pass
+
+
+def crawled_page(url: str, raw: bytes, content_type: ContentType) -> CrawledPage:
+    return CrawledPage(
+        url=url,
+        title="Untitled",
+        crawl_timestamp=datetime(2025, 1, 1, tzinfo=timezone.utc),
+        content_type=content_type,
+        raw_content=raw,
+        cleaned_text="",
+        content_hash=compute_content_hash(raw),
+    )
+
+
+class Fixtures:
+    """Raw fixture files plus the parsed pages and chunks later stages consume."""
+
+    def __init__(self, fixtures_dir: Path = FIXTURES_DIR):
+        self.html = [
+            (f"https://www.irs.gov/{path.stem}", path.read_bytes())
+            for path in sorted((fixtures_dir / "html").glob("*.html"))
+        ]
+        self.pdfs = [
+            (f"https://www.irs.gov/pub/irs-pdf/{path.name}", path.read_bytes())
+            for path in sorted((fixtures_dir / "pdf").glob("*.pdf"))
+        ]
+        if not self.html or not self.pdfs:
+            raise SystemExit(f"No fixtures found in {fixtures_dir}")
+
+        self.pages = [HtmlParser().parse(crawled_page(url, raw, ContentType.HTML)) for url, raw in self.html]
+        self.pages += [PdfParser().parse(crawled_page(url, raw, ContentType.PDF)) for url, raw in self.pdfs]
+        # The parsers collapse newlines; keep the article's line structure so sections are detected.
+        self.section_texts = [
+            BeautifulSoup(raw, "lxml").select_one("article").get_text("\n", strip=True) for _, raw in self.html
+        ]
+        self.chunks_by_page = [chunk for chunk in (chunk_page(page) for page in self.pages) if chunk]
+        self.chunks = [chunk for chunks in self.chunks_by_page for chunk in chunks]
+
+
+def measure(
+    fn: Callable[[Any], Any], inputs: list[Any], items: Callable[[Any], int], repeat: int
+) -> dict[str, float]:
+    for item in inputs[:WARMUP_CALLS]:
+        fn(item)
+
+    latencies = []
+    total_items = 0
+    for _ in range(repeat):
+        for item in inputs:
+            start = time.perf_counter()
+            fn(item)
+            latencies.append(time.perf_counter() - start)
+            total_items += items(item)
+
+    elapsed = sum(latencies)
+    return {
+        "calls": len(latencies),
+        "items": total_items,
+        "items_per_s": total_items / elapsed if elapsed else 0.0,
+        "p50_ms": float(np.percentile(latencies, 50) * 1000),
+        "p95_ms": float(np.percentile(latencies, 95) * 1000),
+    }
+
+
+def bench_html_parse(fixtures: Fixtures, args) -> dict:
+    parser = HtmlParser()
+    return measure(
+        lambda fixture: parser.parse(crawled_page(fixture[0], fixture[1], ContentType.HTML)),
+        fixtures.html,
+        lambda _: 1,
+        args.repeat,
+    )
+
+
+def bench_pdf_extract(fixtures: Fixtures, args) -> dict:
+    return measure(lambda fixture: extract_pdf_text(fixture[1]), fixtures.pdfs, lambda _: 1, args.repeat)
+
+
+def bench_chunk_page(fixtures: Fixtures, args) -> dict:
+    return measure(chunk_page, fixtures.pages, lambda _: 1, args.repeat)
+
+
+def bench_chunk_by_sections(fixtures: Fixtures, args) -> dict:
+    return measure(
+        lambda text: chunk_by_sections(text, detect_sections(text)), fixtures.section_texts, lambda _: 1, args.repeat
+    )
+
+
+def load_model(factory: Callable[[], Any], name: str) -> Any:
+    try:
+        return factory()
+    except OSError as e:
+        raise ComponentSkipped(f"{name} is not available locally ({e.__class__.__name__})")
+
+
+def bench_embed(fixtures: Fixtures, args) -> dict:
+    service = load_model(
+        lambda: EmbeddingService(
+            args.embedding_model,
+            executor=args.executor,
+            cache=EmbeddingCache(args.embedding_model, db_path=None),
+        ),
+        args.embedding_model,
+    )
+    batches = [[chunk.chunk_text for chunk in chunks] for chunks in fixtures.chunks_by_page]
+    # Lists bypass the query-embedding cache, so every call runs the model.
+    return measure(service.get_embedding, batches, len, args.repeat)
+
+
+def bench_rerank(fixtures: Fixtures, args) -> dict:
+    service = load_model(
+        lambda: RetrievalService(None, reranker_model=args.reranker_model, executor=args.executor),
+        args.reranker_model,
+    )
+    candidates = [
+        {"id": chunk.chunk_id, "text": chunk.chunk_text, "url": str(chunk.page_url)}
+        for chunk in itertools.islice(itertools.cycle(fixtures.chunks), RERANK_CANDIDATES)
+    ]
+    counter = itertools.count()
+
+    def rerank(query: str) -> None:
+        # A fresh suffix per call keeps the engine's score cache from answering.
+        service.rerank(f"{query} #{next(counter)}", [dict(chunk) for chunk in candidates], top_n=3)
+
+    return measure(rerank, RERANK_QUERIES, lambda _: len(candidates), args.repeat)
+
+
+def bench_upsert(fixtures: Fixtures, args) -> dict:
+    qdrant_service = QdrantService.__new__(QdrantService)
+    qdrant_service.client = QdrantClient(":memory:")
+    qdrant_service.client.create_collection(
+        UPSERT_COLLECTION, vectors_config=VectorParams(size=UPSERT_VECTOR_SIZE, distance=Distance.COSINE)
+    )
+    service = IngestionService(qdrant_service, collection_versions=CollectionVersions(tempfile.mkdtemp()))
+    rng = np.random.default_rng(0)
+    batches = [
+        (chunks, rng.standard_normal((len(chunks), UPSERT_VECTOR_SIZE)).astype(np.float32))
+        for chunks in fixtures.chunks_by_page
+    ]
+    return measure(
+        lambda batch: service.upsert_chunks(batch[0], batch[1], UPSERT_COLLECTION),
+        batches,
+        lambda batch: len(batch[0]),
+        args.repeat,
+    )
+
+
+def bench_generate(fixtures: Fixtures, args) -> dict:
+    chunks = [
+        {
+            "url": str(chunk.page_url),
+            "title": chunk.chunk_text[:100],
+            "section_heading": chunk.section_heading,
+            "text": chunk.chunk_text,
+            "char_start": chunk.char_offset_start,
+            "char_end": chunk.char_offset_end,
+        }
+        for chunk in fixtures.chunks[:3]
+    ]
+    with StubOllamaServer(fast_delay=0.0) as stub:
+        llm = LLMService(ollama_host=stub.base_url)
+        return measure(
+            lambda query: llm.generate(llm.build_rag_prompt(chunks, query), max_tokens=200),
+            RERANK_QUERIES,
+            lambda _: 1,
+            args.repeat,
+        )
+
+
+BENCHMARKS = {
+    "html_parse": bench_html_parse,
+    "pdf_extract": bench_pdf_extract,
+    "chunk_page": bench_chunk_page,
+    "chunk_by_sections": bench_chunk_by_sections,
+    "embed": bench_embed,
+    "rerank": bench_rerank,
+    "upsert": bench_upsert,
+    "generate": bench_generate,
+}
+
+
+def environment(args) -> dict:
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+        "embedding_model": args.embedding_model,
+        "reranker_model": args.reranker_model,
+    }
+
+
+def compare(
+    components: list[str], results: dict, baseline: dict, tolerance: float
+) -> tuple[list[str], list[str]]:
+    """Return the regressions and the components that could not be compared."""
+    regressions, unchecked = [], []
+    for name in components:
+        result, base = results.get(name), baseline["results"].get(name)
+        if result is None:
+            unchecked.append(f"{name}: skipped in this run")
+            continue
+        if base is None:
+            unchecked.append(f"{name}: not in baseline")
+            continue
+        if result["items_per_s"] < base["items_per_s"] * (1 - tolerance):
+            regressions.append(
+                f"{name}: {result['items_per_s']:.1f} items/s vs baseline {base['items_per_s']:.1f}"
+            )
+        if result["p50_ms"] > base["p50_ms"] * (1 + tolerance):
+            regressions.append(f"{name}: p50 {result['p50_ms']:.2f} ms vs baseline {base['p50_ms']:.2f} ms")
+    return regressions, unchecked
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--components", nargs="+", choices=COMPONENTS, default=COMPONENTS)
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="Passes over each component's inputs")
+    parser.add_argument("--embedding-model", default=EMBEDDING_MODEL)
+    parser.add_argument("--reranker-model", default=RERANKER_MODEL)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--save-baseline", metavar="NAME")
+    parser.add_argument("--compare", metavar="NAME")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    args = parser.parse_args()
+
+    # Loaded before the run, so --save-baseline with the same name compares against the old file.
+    baseline = None
+    if args.compare:
+        baseline_path = BASELINES_DIR / f"{args.compare}.json"
+        if not baseline_path.exists():
+            raise SystemExit(f"No baseline at {baseline_path}; record one with --save-baseline {args.compare}")
+        baseline = orjson.loads(baseline_path.read_bytes())
+    args.executor = ThreadPoolExecutor(max_workers=args.workers)
+
+    fixtures = Fixtures()
+    print(
+        f"fixtures: {len(fixtures.html)} html, {len(fixtures.pdfs)} pdf, {len(fixtures.chunks)} chunks; "
+        f"repeat={args.repeat}"
+    )
+    print(f"{'component':>18} {'calls':>6} {'items/s':>10} {'p50_ms':>9} {'p95_ms':>9}")
+    results = {}
+    for name in args.components:
+        try:
+            result = BENCHMARKS[name](fixtures, args)
+        except ComponentSkipped as e:
+            print(f"{name:>18} skipped: {e}")
+            continue
+        results[name] = result
+        print(
+            f"{name:>18} {result['calls']:>6} {result['items_per_s']:>10.1f} "
+            f"{result['p50_ms']:>9.2f} {result['p95_ms']:>9.2f}"
+        )
+    args.executor.shutdown()
+
+    env = environment(args)
+    if args.save_baseline:
+        BASELINES_DIR.mkdir(parents=True, exist_ok=True)
+        path = BASELINES_DIR / f"{args.save_baseline}.json"
+        path.write_bytes(orjson.dumps({"environment": env, "results": results}, option=orjson.OPT_INDENT_2))
+        print(f"saved baseline {path}")
+
+    if baseline is not None:
+        for key, value in env.items():
+            if baseline["environment"].get(key) != value:
+                print(f"warning: baseline {key} was {baseline['environment'].get(key)!r}, now {value!r}")
+        regressions, unchecked = compare(args.components, results, baseline, args.tolerance)
+        for line in unchecked:
+            print(f"not compared: {line}")
+        if regressions:
+            print(f"REGRESSIONS (tolerance {args.tolerance:.0%}):")
+            for regression in regressions:
+                print(f"  {regression}")
+            sys.exit(1)
+        if len(unchecked) == len(args.components):
+            raise SystemExit(f"No component was compared against {baseline_path}")
+        print(f"no regressions against {baseline_path} (tolerance {args.tolerance:.0%})")
+
+
+if __name__ == "__main__":
+    main()
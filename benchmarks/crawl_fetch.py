@@ -0,0 +1,130 @@
+"""Thread-per-page WebCrawler against the pooled AsyncWebCrawler on a local stub site.
+
+Starts ``StubSiteServer`` with ``--latency`` seconds per response and asks
+each crawler for ``--pages`` pages, one in ``PRIVATE_EVERY`` of them under
+the robots.txt-disallowed prefix, plus ``OFF_DOMAIN_URLS`` that fail the
+domain check. Fetched pages are parsed and chunked on ``--concurrency``
+threads, as ingestion does. ``threaded`` runs fetch and parse together on
+those threads (the old ingestion loop); ``async`` paces fetches with the
+crawler's rate limiter and hands pages to the same threads. Reports wall
+time, achieved fetch rate, the TCP connections the server saw and the
+requests it had in flight at once, and how many disallowed pages were
+fetched (should be 0). Off-domain URLs never reach the stub, so a run
+that respects both checks fetches ``--pages`` minus the private ones.
+
+    python -m benchmarks.crawl_fetch --pages 200 --rps 20 --latency 0.05
+    python -m benchmarks.crawl_fetch --rps 100 --concurrency 2
+"""
+
+import argparse
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+from benchmarks.stub_site import DISALLOWED_PREFIX, StubSiteServer
+from helpers.rag_helpers.chunkers import chunk_page
+from helpers.rag_helpers.crawlers import AsyncWebCrawler, WebCrawler, web_crawler
+from helpers.rag_helpers.parsers import HtmlParser
+
+PRIVATE_EVERY = 10
+OFF_DOMAIN_URLS = ["https://example.com/pages/0", "https://www.irs.gov.example.com/pages/1"]
+FETCH_CONCURRENCY = 4
+
+
+def target_urls(base_url: str, pages: int) -> list[str]:
+    urls = [
+        f"{base_url}{DISALLOWED_PREFIX}{i}" if i % PRIVATE_EVERY == PRIVATE_EVERY - 1 else f"{base_url}/pages/{i}"
+        for i in range(pages)
+    ]
+    return urls + OFF_DOMAIN_URLS
+
+
+def process(parser: HtmlParser, page) -> int:
+    return len(chunk_page(parser.parse(page)))
+
+
+def run_threaded(server: StubSiteServer, urls: list[str], args, allowed_domain) -> dict:
+    # WebCrawler has no domain hook; point its check at the stub host for the run.
+    web_crawler.is_irs_domain = allowed_domain
+    crawler = WebCrawler(base_url=server.base_url, rate_limit_rps=args.rps)
+    crawler._check_robots_txt()
+    parser = HtmlParser()
+
+    def fetch_and_process(url: str) -> int:
+        page = crawler.fetch(url)
+        return process(parser, page) if page else 0
+
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        chunks = list(executor.map(fetch_and_process, urls))
+    crawler.close()
+    return {"pages": sum(1 for count in chunks if count), "chunks": sum(chunks)}
+
+
+async def run_async(server: StubSiteServer, urls: list[str], args, allowed_domain) -> dict:
+    crawler = AsyncWebCrawler(
+        base_url=server.base_url,
+        rate_limit_rps=args.rps,
+        max_connections=FETCH_CONCURRENCY,
+        allowed_domain=allowed_domain,
+    )
+    await crawler.load_robots_txt()
+    parser = HtmlParser()
+    loop = asyncio.get_running_loop()
+    fetch_slots = asyncio.Semaphore(FETCH_CONCURRENCY)
+    slots = asyncio.Semaphore(FETCH_CONCURRENCY + args.concurrency)
+
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+
+        async def ingest(url: str) -> int:
+            async with slots:
+                async with fetch_slots:
+                    page = await crawler.fetch(url)
+                if not page:
+                    return 0
+                return await loop.run_in_executor(executor, process, parser, page)
+
+        chunks = await asyncio.gather(*(ingest(url) for url in urls))
+    await crawler.aclose()
+    return {"pages": sum(1 for count in chunks if count), "chunks": sum(chunks)}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=100)
+    parser.add_argument("--rps", type=float, default=20.0, help="Politeness rate limit")
+    parser.add_argument("--latency", type=float, default=0.05, help="Stub server seconds per response")
+    parser.add_argument("--concurrency", type=int, default=4, help="Parse threads (IngestionRequest.concurrency)")
+    parser.add_argument("--modes", nargs="+", choices=["threaded", "async"], default=["threaded", "async"])
+    args = parser.parse_args()
+
+    print(f"pages={args.pages} rps={args.rps} latency={args.latency}s concurrency={args.concurrency}")
+    print(
+        f"{'mode':>9} {'pages':>6} {'chunks':>7} {'wall_s':>7} {'fetch/s':>8} {'connections':>12} "
+        f"{'max_in_flight':>14} {'disallowed':>11}"
+    )
+    with StubSiteServer(latency=args.latency) as server:
+        host = urlparse(server.base_url).netloc
+
+        def allowed_domain(url: str) -> bool:
+            return urlparse(url).netloc == host
+
+        urls = target_urls(server.base_url, args.pages)
+        for mode in args.modes:
+            server.reset()
+            start = time.perf_counter()
+            if mode == "threaded":
+                result = run_threaded(server, urls, args, allowed_domain)
+            else:
+                result = asyncio.run(run_async(server, urls, args, allowed_domain))
+            elapsed = time.perf_counter() - start
+            stats = server.stats()
+            print(
+                f"{mode:>9} {result['pages']:>6} {result['chunks']:>7} {elapsed:>7.2f} "
+                f"{stats['requests'] / elapsed:>8.1f} {stats['connections']:>12} {stats['max_in_flight']:>14} "
+                f"{stats['disallowed_fetched']:>11}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""Throughput/latency curves for micro-batched query embedding.
+
+Runs closed-loop callers (each awaits one embedding at a time) through
+``EmbeddingService.get_embedding_async`` at several concurrency levels and
+batching windows. A window of 0 disables batching (batch size 1). Queries
+are unique so the query-embedding cache never hits.
+
+    python -m benchmarks.embedding_batching
+    python -m benchmarks.embedding_batching --model /models/all-MiniLM-L6-v2 --windows 0 1 2 5
+"""
+
+import argparse
+import asyncio
+import itertools
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from helpers.rag_helpers.caches import EmbeddingCache
+from services.rag_services.embedding_service import EMBEDDING_MODEL, EmbeddingService
+
+QUERY_TEMPLATES = [
+    "how do I check my refund status {}",
+    "what is Form W-4 used for {}",
+    "who qualifies for the earned income tax credit {}",
+    "when are estimated tax payments due {}",
+]
+
+
+async def run_level(service: EmbeddingService, callers: int, requests_per_caller: int) -> tuple[float, list[float]]:
+    counter = itertools.count()
+    latencies: list[float] = []
+
+    async def caller() -> None:
+        for _ in range(requests_per_caller):
+            i = next(counter)
+            query = QUERY_TEMPLATES[i % len(QUERY_TEMPLATES)].format(i)
+            start = time.perf_counter()
+            await service.get_embedding_async(query)
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(caller() for _ in range(callers)))
+    elapsed = time.perf_counter() - start
+    return len(latencies) / elapsed, latencies
+
+
+async def main_async(args) -> None:
+    print(f"model={args.model} requests_per_caller={args.requests}")
+    print(f"{'window_ms':>10} {'callers':>8} {'qps':>10} {'p50_ms':>10} {'p99_ms':>10} {'avg_batch':>10}")
+    for window in args.windows:
+        executor = ThreadPoolExecutor(max_workers=args.workers)
+        service = EmbeddingService(
+            args.model,
+            executor=executor,
+            cache=EmbeddingCache(args.model, db_path=None),
+            batch_max_size=args.max_batch if window > 0 else 1,
+            batch_max_wait_ms=window,
+        )
+        await service.get_embedding_async("warmup query")
+        for callers in args.callers:
+            service.batcher.batches = service.batcher.items = 0
+            qps, latencies = await run_level(service, callers, args.requests)
+            print(
+                f"{window:>10g} {callers:>8} {qps:>10.1f} {np.percentile(latencies, 50) * 1000:>10.1f} "
+                f"{np.percentile(latencies, 99) * 1000:>10.1f} {service.batch_stats()['avg_batch_size']:>10.1f}"
+            )
+        executor.shutdown()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default=EMBEDDING_MODEL)
+    parser.add_argument("--callers", type=int, nargs="+", default=[1, 8, 32, 128])
+    parser.add_argument("--windows", type=float, nargs="+", default=[0, 1, 2, 5])
+    parser.add_argument("--requests", type=int, default=20)
+    parser.add_argument("--max-batch", type=int, default=32)
+    parser.add_argument("--workers", type=int, default=2)
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
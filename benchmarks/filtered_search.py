@@ -0,0 +1,169 @@
+"""Filtered-search latency with and without payload indexes.
+
+Loads the same synthetic corpus (random unit vectors, payloads shaped like
+``IngestionService.upsert_chunks``) into two collections: one with the
+``PAYLOAD_INDEXES`` declared by ``QdrantService.ensure_payload_indexes`` and
+one without. Each filter case then runs against both, and the script reports
+p50/p99 search latency and the number of hits.
+
+Needs a running Qdrant server; payload indexes have no effect in the client's
+local mode, so ``--url :memory:`` is only useful as a smoke test.
+
+    python -m benchmarks.filtered_search --url http://localhost:6333 --points 200000
+"""
+
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+from qdrant_client import QdrantClient
+from qdrant_client.models import Distance, PointStruct, VectorParams
+
+from helpers.rag_helpers.filters import build_filter
+from services.rag_services.qdrant_service import QdrantService
+from utils import url_path_prefixes
+
+VECTOR_SIZE = 384
+UPSERT_BATCH = 1000
+SECTIONS = ["forms-pubs", "credits-deductions", "businesses", "individuals", "newsroom", "pub/irs-pdf"]
+HEADINGS = ["Overview", "Who must file", "When to file", "How to file", "Penalties", "Recent developments"]
+FORMS = ["1040", "W4", "W2", "1099NEC", "941", "SS4", "4868", "8962"]
+CRAWL_START = datetime(2024, 1, 1)
+
+FILTER_CASES = {
+    "content_type": {"content_type": "pdf"},
+    "url_prefix": {"url": {"prefix": "https://www.irs.gov/credits-deductions"}},
+    "crawl_ts_range": {"crawl_ts": {"gte": "2025-06-01T00:00:00Z", "lt": "2025-07-01T00:00:00Z"}},
+    "section_heading": {"section_heading": "Penalties"},
+    "language": {"language": "es"},
+    "form_any_of": {"form_numbers": ["8962", "4868"]},
+    "prefix_not_pdf": {"url": {"prefix": "https://www.irs.gov/forms-pubs"}, "not": {"content_type": "pdf"}},
+    "selective_combo": {
+        "url": {"prefix": "https://www.irs.gov/newsroom"},
+        "crawl_ts": {"gte": "2025-12-01T00:00:00Z"},
+        "tokens": {"lt": 200},
+    },
+}
+
+
+def synthetic_points(start: int, count: int, rng: random.Random, np_rng: np.random.Generator) -> list[PointStruct]:
+    vectors = np_rng.standard_normal((count, VECTOR_SIZE)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    points = []
+    for i, vector in enumerate(vectors):
+        section = rng.choice(SECTIONS)
+        url = f"https://www.irs.gov/{section}/page-{(start + i) // 8}"
+        tokens = rng.randint(50, 600)
+        forms = rng.sample(FORMS, rng.randint(0, 2))
+        points.append(
+            PointStruct(
+                id=start + i,
+                vector=vector.tolist(),
+                payload={
+                    "url": url,
+                    "url_prefixes": url_path_prefixes(url),
+                    "section_heading": rng.choice(HEADINGS),
+                    "content_type": "pdf" if section == "pub/irs-pdf" else "html",
+                    "crawl_ts": (CRAWL_START + timedelta(minutes=rng.randint(0, 2 * 365 * 24 * 60))).isoformat(),
+                    "language": "es" if rng.random() < 0.02 else "en",
+                    "tokens": tokens,
+                    "char_start": 0,
+                    "char_end": tokens * 4,
+                    "form_numbers": forms,
+                },
+            )
+        )
+    return points
+
+
+def load_collections(service: QdrantService, names: list[str], points: int, seed: int) -> None:
+    for name in names:
+        if service.client.collection_exists(name):
+            service.client.delete_collection(name)
+        service.client.create_collection(
+            collection_name=name,
+            vectors_config=VectorParams(size=VECTOR_SIZE, distance=Distance.COSINE),
+        )
+
+    rng = random.Random(seed)
+    np_rng = np.random.default_rng(seed)
+    for start in range(0, points, UPSERT_BATCH):
+        batch = synthetic_points(start, min(UPSERT_BATCH, points - start), rng, np_rng)
+        for name in names:
+            service.client.upsert(collection_name=name, points=batch, wait=False)
+
+
+def wait_for_green(client: QdrantClient, name: str, timeout: float = 600.0) -> None:
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        info = client.get_collection(name)
+        if str(info.status).lower().endswith("green"):
+            return
+        time.sleep(1.0)
+
+
+def run_case(client: QdrantClient, collection: str, filters: dict, queries: np.ndarray, limit: int) -> tuple[list[float], int]:
+    query_filter = build_filter(filters)
+    latencies = []
+    hits = 0
+    for query in queries:
+        start = time.perf_counter()
+        result = client.search(
+            collection_name=collection,
+            query_vector=query.tolist(),
+            limit=limit,
+            query_filter=query_filter,
+        )
+        latencies.append(time.perf_counter() - start)
+        hits += len(result)
+    return latencies, hits // len(queries)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://localhost:6333")
+    parser.add_argument("--api-key", default=None)
+    parser.add_argument("--points", type=int, default=100_000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--cases", nargs="+", default=list(FILTER_CASES))
+    parser.add_argument("--skip-load", action="store_true")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    if args.url == ":memory:":
+        service = QdrantService.__new__(QdrantService)
+        service.client = QdrantClient(":memory:")
+    else:
+        service = QdrantService(url=args.url, api_key=args.api_key)
+
+    indexed, unindexed = "bench_filters_indexed", "bench_filters_unindexed"
+    if not args.skip_load:
+        start = time.perf_counter()
+        load_collections(service, [indexed, unindexed], args.points, args.seed)
+        service.ensure_payload_indexes(indexed)
+        for name in (indexed, unindexed):
+            wait_for_green(service.client, name)
+        print(f"loaded {args.points} points into 2 collections in {time.perf_counter() - start:.1f}s")
+
+    queries = np.random.default_rng(args.seed + 1).standard_normal((args.queries, VECTOR_SIZE)).astype(np.float32)
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+
+    print(f"{'case':>18} {'hits':>5} {'idx_p50_ms':>11} {'idx_p99_ms':>11} {'raw_p50_ms':>11} {'raw_p99_ms':>11}")
+    for case in ["none", *args.cases]:
+        filters = FILTER_CASES.get(case)
+        # Warm both collections so the first query doesn't pay for segment loading.
+        run_case(service.client, indexed, filters, queries[:5], args.limit)
+        run_case(service.client, unindexed, filters, queries[:5], args.limit)
+        idx, hits = run_case(service.client, indexed, filters, queries, args.limit)
+        raw, _ = run_case(service.client, unindexed, filters, queries, args.limit)
+        print(
+            f"{case:>18} {hits:>5} {np.percentile(idx, 50) * 1000:>11.2f} {np.percentile(idx, 99) * 1000:>11.2f} "
+            f"{np.percentile(raw, 50) * 1000:>11.2f} {np.percentile(raw, 99) * 1000:>11.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
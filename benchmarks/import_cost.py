@@ -0,0 +1,132 @@
+"""Import time and RSS of the API's entry points, and a check that they stay light.
+
+Each target is imported in a fresh interpreter, ``--repeat`` times, and the
+median wall time and peak RSS are reported. Only constructing
+``EmbeddingService`` or ``RetrievalService`` should load the ML stack, so the
+run fails (exit status 1) if any target other than the ``ml_stack`` reference
+imports one of ``FORBIDDEN_MODULES``. With ``--compare NAME`` it also fails
+when a target's import time or RSS grows by more than ``--tolerance`` over
+``benchmarks/baselines/NAME.json`` (written with ``--save-baseline NAME``).
+
+    python -m benchmarks.import_cost
+    python -m benchmarks.import_cost --save-baseline imports
+    python -m benchmarks.import_cost --compare imports
+"""
+
+import argparse
+import os
+import platform
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+import orjson
+
+ROOT = Path(__file__).resolve().parent.parent
+BASELINES_DIR = Path(__file__).parent / "baselines"
+DEFAULT_TOLERANCE = 0.25
+DEFAULT_REPEAT = 3
+FORBIDDEN_MODULES = ("torch", "transformers", "sentence_transformers", "onnxruntime")
+# What each entry point stands in for; ml_stack is the cost the others must not pay.
+TARGETS = {
+    "crawler": "helpers.rag_helpers.crawlers",
+    "services": "services",
+    "handlers": "handlers",
+    "dependencies": "dependencies",
+    "app": "app",
+    "ml_stack": "helpers.rag_helpers.inference",
+}
+REFERENCE_TARGETS = {"ml_stack"}
+
+PROBE = """
+import json, resource, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+loaded = [name for name in {forbidden!r} if name in sys.modules]
+print(json.dumps({{"import_s": elapsed, "rss_mb": rss_kb / 1024, "loaded": loaded}}))
+"""
+
+
+def probe(module: str) -> dict:
+    code = PROBE.format(module=module, forbidden=FORBIDDEN_MODULES)
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        env={**os.environ, "PYTHONPATH": str(ROOT)},
+        check=True,
+    )
+    # The last line is the probe's; imports may print warnings before it.
+    return orjson.loads(result.stdout.strip().splitlines()[-1])
+
+
+def measure(module: str, repeat: int) -> dict:
+    runs = [probe(module) for _ in range(repeat)]
+    return {
+        "import_s": statistics.median(run["import_s"] for run in runs),
+        "rss_mb": statistics.median(run["rss_mb"] for run in runs),
+        "loaded": sorted({name for run in runs for name in run["loaded"]}),
+    }
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    regressions = []
+    for name, result in results.items():
+        base = baseline["results"].get(name)
+        if base is None or name in REFERENCE_TARGETS:
+            continue
+        if result["import_s"] > base["import_s"] * (1 + tolerance):
+            regressions.append(f"{name}: import {result['import_s']:.2f} s vs baseline {base['import_s']:.2f} s")
+        if result["rss_mb"] > base["rss_mb"] * (1 + tolerance):
+            regressions.append(f"{name}: RSS {result['rss_mb']:.0f} MB vs baseline {base['rss_mb']:.0f} MB")
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--targets", nargs="+", choices=list(TARGETS), default=list(TARGETS))
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT)
+    parser.add_argument("--save-baseline", metavar="NAME")
+    parser.add_argument("--compare", metavar="NAME")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    args = parser.parse_args()
+
+    print(f"{'target':>14} {'import_s':>9} {'rss_mb':>8}  ml modules loaded")
+    results = {}
+    failures = []
+    for name in args.targets:
+        result = measure(TARGETS[name], args.repeat)
+        results[name] = result
+        print(f"{name:>14} {result['import_s']:>9.2f} {result['rss_mb']:>8.0f}  {', '.join(result['loaded']) or '-'}")
+        if result["loaded"] and name not in REFERENCE_TARGETS:
+            failures.append(f"{name}: importing {TARGETS[name]} loads {', '.join(result['loaded'])}")
+
+    env = {"python": platform.python_version(), "platform": platform.platform(), "cpus": os.cpu_count()}
+    if args.save_baseline:
+        BASELINES_DIR.mkdir(parents=True, exist_ok=True)
+        path = BASELINES_DIR / f"{args.save_baseline}.json"
+        path.write_bytes(orjson.dumps({"environment": env, "results": results}, option=orjson.OPT_INDENT_2))
+        print(f"saved baseline {path}")
+
+    if args.compare:
+        path = BASELINES_DIR / f"{args.compare}.json"
+        baseline = orjson.loads(path.read_bytes())
+        for key, value in env.items():
+            if baseline["environment"].get(key) != value:
+                print(f"warning: baseline {key} was {baseline['environment'].get(key)!r}, now {value!r}")
+        failures += compare(results, baseline, args.tolerance)
+
+    if failures:
+        print("FAILURES:")
+        for failure in failures:
+            print(f"  {failure}")
+        sys.exit(1)
+    print("ok")
+
+
+if __name__ == "__main__":
+    main()
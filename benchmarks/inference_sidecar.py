@@ -0,0 +1,163 @@
+"""Per-worker models against one shared inference sidecar.
+
+Starts ``--workers`` processes standing in for uvicorn workers. Each builds
+an ``EmbeddingService`` and a ``RetrievalService`` and runs ``--callers``
+closed-loop callers that embed a unique query and rerank
+``--candidates`` chunks for it, so no cache ever hits. In ``local`` mode
+every worker loads both models and runs its own torch thread pool; in
+``sidecar`` mode the workers are thin clients of ``inference_server.py``
+started with ``--torch-threads``. Reports requests/s, latency and the
+memory of all processes together.
+
+    python -m benchmarks.inference_sidecar --workers 4 --model-dir /models
+"""
+
+import argparse
+import multiprocessing
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parent.parent
+CANDIDATE_TEXT = (
+    "Use the Where's My Refund tool to check the status of your federal income tax refund. "
+    "Have your Social Security number, filing status and the exact refund amount ready. {}"
+)
+SIDECAR_START_TIMEOUT_S = 120.0
+
+
+def worker(index: int, args, socket_path, barrier, results) -> None:
+    import asyncio
+    import itertools
+    from concurrent.futures import ThreadPoolExecutor
+
+    from helpers.rag_helpers.caches import EmbeddingCache
+    from helpers.rag_helpers.sidecar import SidecarClient
+    from services.rag_services.embedding_service import EmbeddingService
+    from services.rag_services.retrieval_service import RetrievalService
+
+    sidecar = SidecarClient(socket_path) if socket_path else None
+    executor = ThreadPoolExecutor(max_workers=2)
+    embedding = EmbeddingService(
+        executor=executor,
+        cache=EmbeddingCache("bench", db_path=None),
+        model_dir=args.model_dir,
+        sidecar=sidecar,
+    )
+    retrieval = RetrievalService(None, executor=executor, model_dir=args.model_dir, sidecar=sidecar)
+    embedding.warmup()
+    retrieval.warmup()
+    counter = itertools.count()
+    latencies: list[float] = []
+
+    async def caller() -> None:
+        for _ in range(args.requests):
+            i = next(counter)
+            query = f"worker {index} question {i} about my refund"
+            chunks = [
+                {"id": f"{index}-{i}-{c}", "text": CANDIDATE_TEXT.format(c)} for c in range(args.candidates)
+            ]
+            start = time.perf_counter()
+            await embedding.get_embedding_async(query)
+            await retrieval.rerank_engine.score_async(query, chunks)
+            latencies.append(time.perf_counter() - start)
+
+    async def run() -> float:
+        start = time.perf_counter()
+        await asyncio.gather(*(caller() for _ in range(args.callers)))
+        return time.perf_counter() - start
+
+    barrier.wait()
+    elapsed = asyncio.run(run())
+    rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    results.put((latencies, elapsed, rss_mb))
+
+
+def run_workers(args, socket_path) -> dict:
+    context = multiprocessing.get_context("spawn")
+    barrier = context.Barrier(args.workers)
+    results = context.Queue()
+    processes = [
+        context.Process(target=worker, args=(i, args, socket_path, barrier, results)) for i in range(args.workers)
+    ]
+    for process in processes:
+        process.start()
+    collected = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+
+    latencies = [latency for worker_latencies, _, _ in collected for latency in worker_latencies]
+    elapsed = max(worker_elapsed for _, worker_elapsed, _ in collected)
+    return {
+        "rps": len(latencies) / elapsed,
+        "p50_ms": float(np.percentile(latencies, 50)) * 1000,
+        "p95_ms": float(np.percentile(latencies, 95)) * 1000,
+        "rss_mb": sum(rss for _, _, rss in collected),
+    }
+
+
+def start_sidecar(args, socket_path: str) -> subprocess.Popen:
+    env = {**os.environ, "PYTHONPATH": str(ROOT)}
+    if args.model_dir:
+        env["MODEL_DIR"] = args.model_dir
+    command = [sys.executable, str(ROOT / "inference_server.py"), "--socket", socket_path]
+    if args.torch_threads:
+        command += ["--torch-threads", str(args.torch_threads)]
+    process = subprocess.Popen(command, cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.monotonic() + SIDECAR_START_TIMEOUT_S
+    while not os.path.exists(socket_path):
+        if process.poll() is not None or time.monotonic() > deadline:
+            process.kill()
+            raise RuntimeError("inference sidecar did not start")
+        time.sleep(0.2)
+    return process
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--callers", type=int, default=8, help="Concurrent callers per worker")
+    parser.add_argument("--requests", type=int, default=20, help="Requests per caller")
+    parser.add_argument("--candidates", type=int, default=12)
+    parser.add_argument("--model-dir", default=os.getenv("MODEL_DIR"))
+    parser.add_argument("--torch-threads", type=int, default=os.cpu_count())
+    parser.add_argument("--modes", nargs="+", choices=["local", "sidecar"], default=["local", "sidecar"])
+    args = parser.parse_args()
+
+    print(
+        f"workers={args.workers} callers={args.callers} requests={args.requests} "
+        f"candidates={args.candidates} cpus={os.cpu_count()}"
+    )
+    print(f"{'mode':>8} {'req/s':>8} {'p50_ms':>9} {'p95_ms':>9} {'rss_mb':>8} {'embed_batch':>12} {'rerank_batch':>13}")
+    for mode in args.modes:
+        if mode == "local":
+            result = run_workers(args, None)
+            embed_batch = rerank_batch = "-"
+        else:
+            from helpers.rag_helpers.sidecar import SidecarClient
+
+            socket_path = os.path.join(tempfile.mkdtemp(), "inference.sock")
+            sidecar = start_sidecar(args, socket_path)
+            try:
+                result = run_workers(args, socket_path)
+                stats = SidecarClient(socket_path).stats()
+            finally:
+                sidecar.terminate()
+                sidecar.wait()
+            result["rss_mb"] += stats["max_rss_mb"]
+            embed_batch = f"{stats['embed']['avg_batch_size']:.1f}"
+            rerank_batch = f"{stats['rerank']['avg_batch_size']:.1f}"
+        print(
+            f"{mode:>8} {result['rps']:>8.1f} {result['p50_ms']:>9.1f} {result['p95_ms']:>9.1f} "
+            f"{result['rss_mb']:>8.0f} {embed_batch:>12} {rerank_batch:>13}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""Staged ingestion pipeline throughput and memory against a local stub site.
+
+Runs ``IngestionHandler.handle_ingestion`` end to end for each ``--pages``
+value: pages come from ``StubSiteServer`` (fixture HTML, ``--latency``
+seconds per response), the embedder is loaded from ``--model-dir`` and
+Qdrant runs in local in-memory mode. Crawl output goes to a temporary
+directory. Reports pages/s, chunks, how far this process's RSS rose above
+its level before the run (sampled every ``RSS_SAMPLE_S``), and per stage
+the items it took, its busy time and the most items ever queued in front
+of it. RSS growth and queue depths should stay flat as ``--pages`` grows.
+
+    python -m benchmarks.ingestion_pipeline --model-dir /models --pages 50 200 800
+    python -m benchmarks.ingestion_pipeline --rps 200 --concurrency 2 --fetch-concurrency 8
+"""
+
+import argparse
+import asyncio
+import functools
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from urllib.parse import urlparse
+
+from qdrant_client import QdrantClient
+
+from benchmarks.stub_site import StubSiteServer
+from handlers.rag_handlers import ingestion_handler
+from handlers.rag_handlers.ingestion_handler import IngestionHandler
+from helpers.rag_helpers.caches import CollectionVersions, EmbeddingCache
+from helpers.rag_helpers.crawlers import AsyncWebCrawler
+from helpers.rag_helpers.storage import StorageManager
+from models import IngestionRequest
+from services.rag_services.embedding_service import EmbeddingService
+from services.rag_services.ingestion_service import IngestionService
+from services.rag_services.qdrant_service import QdrantService
+
+RSS_SAMPLE_S = 0.05
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE")
+
+
+def rss_mb() -> float:
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * PAGE_SIZE / 2**20
+
+
+class RssSampler:
+    def __init__(self):
+        self.peak = rss_mb()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self) -> None:
+        while not self._stop.wait(RSS_SAMPLE_S):
+            self.peak = max(self.peak, rss_mb())
+
+    def __enter__(self) -> "RssSampler":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._stop.set()
+        self._thread.join()
+
+
+def build_handler(args, work_dir: Path) -> IngestionHandler:
+    qdrant_service = QdrantService.__new__(QdrantService)
+    qdrant_service.client = QdrantClient(":memory:")
+    qdrant_service.quantization = "none"
+    embedding = EmbeddingService(
+        executor=ThreadPoolExecutor(max_workers=2),
+        cache=EmbeddingCache("bench", db_path=None),
+        model_dir=args.model_dir,
+    )
+    embedding.warmup()
+    handler = IngestionHandler(
+        embedding_service=embedding,
+        qdrant_service=qdrant_service,
+        ingestion_service=IngestionService(
+            qdrant_service, collection_versions=CollectionVersions(str(work_dir / "versions"))
+        ),
+    )
+    handler.storage = StorageManager(str(work_dir / "crawl"))
+    return handler
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, nargs="+", default=[50, 200])
+    parser.add_argument("--rps", type=float, default=100.0, help="Crawler rate limit")
+    parser.add_argument("--latency", type=float, default=0.02, help="Stub server seconds per response")
+    parser.add_argument("--concurrency", type=int, default=2, help="Parse processes")
+    parser.add_argument("--fetch-concurrency", type=int, default=4)
+    parser.add_argument("--embed-batch-size", type=int, default=64)
+    parser.add_argument("--upsert-batch-size", type=int, default=256)
+    parser.add_argument("--model-dir", default=os.getenv("MODEL_DIR"))
+    args = parser.parse_args()
+
+    work_dir = Path(tempfile.mkdtemp())
+    handler = build_handler(args, work_dir)
+    ingestion_handler.RATE_LIMIT_RPS = args.rps
+
+    print(
+        f"rps={args.rps} latency={args.latency}s parse_processes={args.concurrency} "
+        f"fetch_concurrency={args.fetch_concurrency} embed_batch={args.embed_batch_size} "
+        f"upsert_batch={args.upsert_batch_size} cpus={os.cpu_count()}"
+    )
+    print(f"{'pages':>6} {'done':>5} {'chunks':>7} {'wall_s':>7} {'pages/s':>8} {'rss_rise_mb':>12}  stages")
+    with StubSiteServer(latency=args.latency) as server:
+        host = urlparse(server.base_url).netloc
+        # The handler checks is_irs_domain; accept the stub host instead.
+        ingestion_handler.AsyncWebCrawler = functools.partial(
+            AsyncWebCrawler, allowed_domain=lambda url: urlparse(url).netloc == host
+        )
+        for pages in args.pages:
+            url_file = work_dir / f"urls_{pages}.txt"
+            url_file.write_text("\n".join(f"{server.base_url}/pages/{i}" for i in range(pages)))
+            request = IngestionRequest(
+                seed_url=server.base_url,
+                max_pages=pages,
+                concurrency=args.concurrency,
+                fetch_concurrency=args.fetch_concurrency,
+                embed_batch_size=args.embed_batch_size,
+                upsert_batch_size=args.upsert_batch_size,
+                url_file=str(url_file),
+            )
+            before = rss_mb()
+            start = time.perf_counter()
+            with RssSampler() as sampler:
+                result = asyncio.run(handler.handle_ingestion(request))
+            elapsed = time.perf_counter() - start
+            stages = " ".join(
+                f"{name}={stats['items']}/{stats['busy_s']:.1f}s/q{stats['max_queued']}"
+                for name, stats in result["stages"].items()
+            )
+            print(
+                f"{pages:>6} {result['pages_processed']:>5} {result['total_chunks']:>7} {elapsed:>7.2f} "
+                f"{result['pages_processed'] / elapsed:>8.1f} {sampler.peak - before:>12.1f}  {stages}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+"""Prefill cost of the legacy prompt layout against the cache-friendly one.
+
+The legacy layout put the retrieved context before the fixed instructions
+and templated the question into them, so consecutive requests shared only a
+one-line prefix. The current layout sends the instructions as a constant
+``system`` prompt followed by context and question, which Ollama can serve
+from its prompt cache.
+
+Each mode sends the same N questions with different synthetic contexts, after
+one warm-up request, and reports the tokens Ollama had to evaluate and the
+time it spent doing so (``prompt_eval_count``/``prompt_eval_duration``).
+Without ``--ollama-host`` a stub that simulates the prompt cache is used.
+
+    python -m benchmarks.prompt_prefix --queries 50
+    python -m benchmarks.prompt_prefix --ollama-host http://localhost:11434 --model llama3.2:1b
+"""
+
+import argparse
+import random
+import time
+from contextlib import nullcontext
+
+from benchmarks.stub_ollama import StubOllamaServer
+from services.rag_services.llm_service import LLMService, OLLAMA_MODEL
+
+LEGACY_PROMPT = """SYSTEM:
+You are a factual assistant that answers only from the provided IRS.gov knowledge snippets. You must cite sources and never invent facts.
+
+CONTEXT:
+{context}
+
+USER:
+{query}
+
+ASSISTANT INSTRUCTIONS:
+- Use only the provided context. If it does not support an answer, say: "I don't have verifiable information in the knowledge base for that query." Offer top similar sources with excerpts.
+
+- Respond in GitHub-Flavored Markdown (GFM).
+- Begin your answer with a level-3 heading containing the user question exactly:
+  "### {query}"
+- Use concise paragraphs and bullet lists for steps and key points.
+- Bold key labels or terms (e.g., **Eligibility**, **Amount**, **Deadline**).
+
+- After the answer, include a section titled "### Sources" with bullet items in this format:
+  - [<page_title>] — <section_heading if available> — <url> — excerpt: "..." (char_start–char_end)
+
+- If sources conflict, present both and mark uncertainty.
+- Include relevant IRS form numbers if present in context.
+
+- If the question asks for legal/tax filing advice, prepend:
+
+  "I am not a lawyer; for legal or tax-filing advice consult a qualified tax professional or the IRS."
+"""
+TOPICS = ["refund status", "estimated tax payments", "earned income credit", "withholding", "filing extension"]
+WORDS = "taxpayers must file the return by the due date unless an extension applies to their situation".split()
+
+
+def synthetic_chunks(rng: random.Random, count: int = 3) -> list[dict]:
+    chunks = []
+    for _ in range(count):
+        page = rng.randint(0, 10_000)
+        text = " ".join(rng.choice(WORDS) for _ in range(50))
+        chunks.append(
+            {
+                "url": f"https://www.irs.gov/page-{page}",
+                "title": f"Page {page}",
+                "section_heading": rng.choice(TOPICS).title(),
+                "text": text,
+                "char_start": 0,
+                "char_end": len(text),
+            }
+        )
+    return chunks
+
+
+def legacy_payload(llm: LLMService, chunks: list[dict], query: str, max_tokens: int) -> dict:
+    return {
+        "model": llm.model_name,
+        "prompt": LEGACY_PROMPT.format(context=llm.build_context(chunks), query=query),
+        "stream": False,
+        "options": {"temperature": 0.0, "num_predict": max_tokens},
+    }
+
+
+def current_payload(llm: LLMService, chunks: list[dict], query: str, max_tokens: int) -> dict:
+    return llm._generate_payload(llm.build_rag_prompt(chunks, query), temperature=0.0, max_tokens=max_tokens)
+
+
+def run_mode(llm: LLMService, build_payload, requests: list[tuple[list[dict], str]], max_tokens: int) -> dict:
+    # Warm-up: loads the model and primes the cache with this layout's prefix.
+    warm_chunks, warm_query = requests[0]
+    llm.client.post("/api/generate", json=build_payload(llm, warm_chunks, warm_query, max_tokens)).raise_for_status()
+
+    evaluated = 0
+    prefill_ns = 0
+    start = time.perf_counter()
+    for chunks, query in requests[1:]:
+        response = llm.client.post("/api/generate", json=build_payload(llm, chunks, query, max_tokens))
+        response.raise_for_status()
+        result = response.json()
+        evaluated += result.get("prompt_eval_count", 0)
+        prefill_ns += result.get("prompt_eval_duration", 0)
+    elapsed = time.perf_counter() - start
+    count = len(requests) - 1
+    return {
+        "tokens": evaluated / count,
+        "prefill_ms": prefill_ns / count / 1e6,
+        "total_ms": elapsed / count * 1000,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--ollama-host", default=None, help="Real Ollama server; defaults to the stub")
+    parser.add_argument("--model", default=OLLAMA_MODEL)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--max-tokens", type=int, default=16)
+    parser.add_argument("--prefill-per-token", type=float, default=0.0005, help="Stub prefill cost in seconds")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    requests = [
+        (synthetic_chunks(rng), f"Question {i} about {rng.choice(TOPICS)}?") for i in range(args.queries + 1)
+    ]
+
+    server = (
+        nullcontext()
+        if args.ollama_host
+        else StubOllamaServer(fast_delay=0.0, prefill_per_token=args.prefill_per_token)
+    )
+    with server as stub:
+        llm = LLMService(ollama_host=args.ollama_host or stub.base_url)
+        llm.model_name = args.model
+        results = {
+            "legacy": run_mode(llm, legacy_payload, requests, args.max_tokens),
+            "current": run_mode(llm, current_payload, requests, args.max_tokens),
+        }
+
+    print(f"queries={args.queries} host={args.ollama_host or 'stub'} model={args.model}")
+    print(f"{'layout':>8} {'prefill_tokens':>15} {'prefill_ms':>11} {'request_ms':>11}")
+    for layout, result in results.items():
+        print(
+            f"{layout:>8} {result['tokens']:>15.1f} {result['prefill_ms']:>11.2f} {result['total_ms']:>11.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+"""Throughput of ``/query/batch`` against the single-query path.
+
+Answers the same N unique questions three ways with real embedding and
+reranker models, a local in-process Qdrant collection of synthetic chunks and
+a stub Ollama:
+
+- ``sequential``: N ``handle_query`` round trips, one after another;
+- ``concurrent``: N ``handle_query`` calls with at most
+  BATCH_GENERATION_CONCURRENCY in flight;
+- ``batch``: one ``handle_batch`` call.
+
+The semantic answer cache is disabled, so every query is retrieved,
+reranked and generated.
+
+    python -m benchmarks.query_batch --queries 200
+    python -m benchmarks.query_batch --embedding-model /models/minilm --reranker-model /models/ms-marco
+"""
+
+import argparse
+import asyncio
+import random
+import tempfile
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from qdrant_client import AsyncQdrantClient, QdrantClient
+from qdrant_client.models import Distance, PointStruct, VectorParams
+
+from benchmarks.stub_ollama import StubOllamaServer
+from handlers.rag_handlers.query_handler import BATCH_GENERATION_CONCURRENCY, COLLECTION_NAME, QueryHandler
+from helpers.rag_helpers.caches import AnswerCache, CollectionVersions, EmbeddingCache
+from services.rag_services.embedding_service import EMBEDDING_MODEL, EmbeddingService
+from services.rag_services.llm_service import LLMService
+from services.rag_services.qdrant_service import QdrantService
+from services.rag_services.retrieval_service import RERANKER_MODEL, RetrievalService
+
+TOPICS = ["refund status", "estimated tax payments", "earned income credit", "withholding", "filing extension"]
+CORPUS_SIZE = 2000
+
+
+def local_qdrant_service(points: list[PointStruct], vector_size: int) -> QdrantService:
+    """QdrantService over in-process local storage (sync and async clients each hold a copy)."""
+    service = QdrantService.__new__(QdrantService)
+    service.quantization = "none"
+    service.search_profile = "balanced"
+    service._search_params = service._all_search_params()
+    service._collection_quantization = {}
+    service.client = QdrantClient(":memory:")
+    service.async_client = AsyncQdrantClient(":memory:")
+    service.client.create_collection(
+        COLLECTION_NAME, vectors_config=VectorParams(size=vector_size, distance=Distance.COSINE)
+    )
+    service.client.upsert(COLLECTION_NAME, points)
+    return service
+
+
+async def fill_async_client(service: QdrantService, points: list[PointStruct], vector_size: int) -> None:
+    await service.async_client.create_collection(
+        COLLECTION_NAME, vectors_config=VectorParams(size=vector_size, distance=Distance.COSINE)
+    )
+    await service.async_client.upsert(COLLECTION_NAME, points)
+
+
+def synthetic_corpus(embedding_service: EmbeddingService, rng: random.Random) -> list[PointStruct]:
+    texts = [
+        f"Chunk {i} explains {rng.choice(TOPICS)} for taxpayers. " * rng.randint(1, 6) for i in range(CORPUS_SIZE)
+    ]
+    vectors = embedding_service.get_embedding(texts)
+    return [
+        PointStruct(
+            id=str(uuid.uuid4()),
+            vector=vector.tolist(),
+            payload={"url": f"https://www.irs.gov/page-{i}", "title": text[:100], "text": text},
+        )
+        for i, (text, vector) in enumerate(zip(texts, vectors))
+    ]
+
+
+def new_handler(embedding_service, llm_service, retrieval_service, versions_dir: str) -> QueryHandler:
+    return QueryHandler(
+        embedding_service=embedding_service,
+        llm_service=llm_service,
+        retrieval_service=retrieval_service,
+        # A threshold above 1 never matches: similar benchmark questions must not share answers.
+        answer_cache=AnswerCache(threshold=2.0),
+        collection_versions=CollectionVersions(versions_dir),
+    )
+
+
+async def main_async(args) -> None:
+    rng = random.Random(args.seed)
+    executor = ThreadPoolExecutor(max_workers=args.workers)
+    embedding_service = EmbeddingService(
+        args.embedding_model, executor=executor, cache=EmbeddingCache(args.embedding_model, db_path=None)
+    )
+    points = synthetic_corpus(embedding_service, rng)
+    qdrant_service = local_qdrant_service(points, embedding_service.vector_size)
+    await fill_async_client(qdrant_service, points, embedding_service.vector_size)
+    retrieval_service = RetrievalService(qdrant_service, reranker_model=args.reranker_model, executor=executor)
+    versions_dir = tempfile.mkdtemp()
+
+    def questions(run: str) -> list[str]:
+        # Unique per run so neither the embedding nor the rerank cache helps.
+        return [f"{run} question {i} about {rng.choice(TOPICS)}" for i in range(args.queries)]
+
+    with StubOllamaServer(fast_delay=args.generation_delay) as stub:
+        llm_service = LLMService(ollama_host=stub.base_url)
+        results = {}
+
+        handler = new_handler(embedding_service, llm_service, retrieval_service, versions_dir)
+        start = time.perf_counter()
+        for query in questions("sequential"):
+            await handler.handle_query(query)
+        results["sequential"] = time.perf_counter() - start
+
+        handler = new_handler(embedding_service, llm_service, retrieval_service, versions_dir)
+        semaphore = asyncio.Semaphore(BATCH_GENERATION_CONCURRENCY)
+
+        async def bounded(query: str) -> None:
+            async with semaphore:
+                await handler.handle_query(query)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(bounded(query) for query in questions("concurrent")))
+        results["concurrent"] = time.perf_counter() - start
+
+        handler = new_handler(embedding_service, llm_service, retrieval_service, versions_dir)
+        start = time.perf_counter()
+        first = None
+        async for _ in handler.handle_batch(questions("batch")):
+            first = first or time.perf_counter() - start
+        results["batch"] = time.perf_counter() - start
+
+    print(f"queries={args.queries} generation_delay={args.generation_delay}s workers={args.workers}")
+    print(f"{'mode':>12} {'total_s':>9} {'qps':>8} {'speedup':>8}")
+    for mode, elapsed in results.items():
+        print(
+            f"{mode:>12} {elapsed:>9.2f} {args.queries / elapsed:>8.1f} {results['sequential'] / elapsed:>7.1f}x"
+        )
+    print(f"batch first result after {first * 1000:.0f} ms")
+    executor.shutdown()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--embedding-model", default=EMBEDDING_MODEL)
+    parser.add_argument("--reranker-model", default=RERANKER_MODEL)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--generation-delay", type=float, default=0.05)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--seed", type=int, default=0)
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
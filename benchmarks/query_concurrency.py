@@ -0,0 +1,173 @@
+"""Concurrency benchmark for the /query pipeline.
+
+Keeps N slow generations in flight against a stub Ollama server and measures
+the latency of fast queries issued at the same time. With the async pipeline
+the fast-query p99 stays flat as N grows; ``--blocking`` reproduces the old
+behaviour of running the synchronous clients on the event loop.
+
+    python -m benchmarks.query_concurrency
+    python -m benchmarks.query_concurrency --blocking --levels 0 2 8
+"""
+
+import argparse
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from benchmarks.stub_ollama import SLOW_MARKER, StubOllamaServer
+from handlers.rag_handlers.query_handler import NO_KB_MSG, QueryHandler
+from helpers.rag_helpers.admission import AdmissionQueue
+from helpers.rag_helpers.caches import AnswerCache
+from services.rag_services.llm_service import LLMService
+
+EMBED_SECONDS = 0.005
+RETRIEVE_SECONDS = 0.005
+RERANK_SECONDS = 0.02
+VECTOR_SIZE = 384
+FAST_QUERIES = 30
+ARRIVAL_INTERVAL = 0.1
+
+
+class StubEmbeddingService:
+    """Stands in for the SentenceTransformer; sleeps instead of encoding."""
+
+    def __init__(self, executor, blocking: bool):
+        self.executor = executor
+        self.blocking = blocking
+
+    def get_embedding(self, text):
+        time.sleep(EMBED_SECONDS)
+        return np.zeros(VECTOR_SIZE, dtype=np.float32)
+
+    async def get_embedding_async(self, text):
+        if self.blocking:
+            return self.get_embedding(text)
+        return await asyncio.get_running_loop().run_in_executor(self.executor, self.get_embedding, text)
+
+
+class StubRetrievalService:
+    """Stands in for Qdrant search and cross-encoder reranking."""
+
+    def __init__(self, executor, blocking: bool):
+        self.executor = executor
+        self.blocking = blocking
+
+    async def retrieve_async(self, collection, query_vec, top_k, cutoff, filters=None, query=None, profile=None):
+        if self.blocking:
+            time.sleep(RETRIEVE_SECONDS)
+        else:
+            await asyncio.sleep(RETRIEVE_SECONDS)
+        return [
+            {
+                "id": i,
+                "score": 0.9 - i * 0.01,
+                "url": f"https://www.irs.gov/page-{i}",
+                "title": f"Page {i}",
+                "section_heading": None,
+                "text": "Stub chunk text about refunds. " * 20,
+                "char_start": 0,
+                "char_end": 600,
+            }
+            for i in range(top_k)
+        ]
+
+    async def retrieve_forms_async(self, collection, query_vec, forms, top_n, cutoff, filters=None, profile=None):
+        # Canonical form pages come back already ordered, so no rerank is needed.
+        return await self.retrieve_async(collection, query_vec, top_n, cutoff, filters, profile=profile), False
+
+    def rerank(self, query, chunks, top_n):
+        time.sleep(RERANK_SECONDS)
+        return chunks[:top_n]
+
+    async def rerank_async(self, query, chunks, top_n):
+        if self.blocking:
+            return self.rerank(query, chunks, top_n)
+        return await asyncio.get_running_loop().run_in_executor(self.executor, self.rerank, query, chunks, top_n)
+
+
+class BlockingLLMService(LLMService):
+    """Reproduces the pre-async path: a synchronous POST on the event loop."""
+
+    async def generate_async(self, prompt, **kwargs):
+        return self.generate(prompt, **kwargs)
+
+
+async def answer(handler: QueryHandler, query: str):
+    response = await handler.handle_query(query)
+    # A NO_KB answer means the pipeline failed (e.g. a stub out of step with the real
+    # services) and the timing measured the error path.
+    assert response.answer_text != NO_KB_MSG, f"query {query!r} was answered with NO_KB_MSG"
+    return response
+
+
+def percentile(values: list[float], pct: float) -> float:
+    return float(np.percentile(values, pct)) if values else 0.0
+
+
+async def run_level(handler: QueryHandler, in_flight: int, workers: int) -> list[float]:
+    slow_tasks = [
+        asyncio.create_task(answer(handler, f"{SLOW_MARKER} slow question {i}"))
+        for i in range(in_flight)
+    ]
+    # Fast queries arrive once the slow ones have cleared embedding and reranking,
+    # so only their generations are in flight. The schedule is fixed before the
+    # slow tasks get the loop: with --blocking they hold it for their whole
+    # generation, and that delay must count against the fast queries.
+    start = time.perf_counter() + 0.1 + in_flight * (EMBED_SECONDS + RERANK_SECONDS) / workers
+
+    # Open-loop arrivals: latency is measured from the scheduled arrival time,
+    # so time spent waiting for a blocked event loop is counted.
+
+    async def timed_fast(i: int) -> float:
+        arrival = start + i * ARRIVAL_INTERVAL
+        await asyncio.sleep(max(0.0, arrival - time.perf_counter()))
+        await answer(handler, f"how do I check my refund status {i}")
+        return time.perf_counter() - arrival
+
+    latencies = await asyncio.gather(*(timed_fast(i) for i in range(FAST_QUERIES)))
+    await asyncio.gather(*slow_tasks)
+    return list(latencies)
+
+
+async def main_async(args) -> None:
+    executor = ThreadPoolExecutor(max_workers=args.workers)
+    with StubOllamaServer(fast_delay=args.fast_delay, slow_delay=args.slow_delay) as stub:
+        llm_cls = BlockingLLMService if args.blocking else LLMService
+        handler = QueryHandler(
+            embedding_service=StubEmbeddingService(executor, args.blocking),
+            # This measures event-loop blocking, not Ollama admission, so every query gets a slot.
+            llm_service=llm_cls(
+                ollama_host=stub.base_url,
+                admission=AdmissionQueue(max_in_flight=max(args.levels) + FAST_QUERIES),
+            ),
+            retrieval_service=StubRetrievalService(executor, args.blocking),
+            # Every query must run the pipeline; a cached answer would time the cache.
+            answer_cache=AnswerCache(threshold=2.0),
+        )
+
+        mode = "blocking" if args.blocking else "async"
+        print(f"mode={mode} fast_queries={FAST_QUERIES} slow_delay={args.slow_delay}s")
+        print(f"{'in_flight':>10} {'p50_ms':>10} {'p99_ms':>10} {'max_ms':>10}")
+        for level in args.levels:
+            latencies = await run_level(handler, level, args.workers)
+            print(
+                f"{level:>10} {percentile(latencies, 50) * 1000:>10.1f} "
+                f"{percentile(latencies, 99) * 1000:>10.1f} {max(latencies) * 1000:>10.1f}"
+            )
+    executor.shutdown()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--levels", type=int, nargs="+", default=[0, 4, 16, 64])
+    parser.add_argument("--slow-delay", type=float, default=5.0)
+    parser.add_argument("--fast-delay", type=float, default=0.05)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--blocking", action="store_true")
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
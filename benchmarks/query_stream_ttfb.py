@@ -0,0 +1,72 @@
+"""Time-to-first-byte benchmark for streaming vs. buffered queries.
+
+Compares when the caller first receives something from
+``QueryHandler.stream_query`` (the sources event and the first token) with
+the total latency of ``QueryHandler.handle_query``, against a stub Ollama.
+
+    python -m benchmarks.query_stream_ttfb --generation-delay 3
+"""
+
+import argparse
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from benchmarks.query_concurrency import StubEmbeddingService, StubRetrievalService, answer
+from benchmarks.stub_ollama import STUB_ANSWER, StubOllamaServer
+from handlers.rag_handlers.query_handler import QueryHandler
+from helpers.rag_helpers.caches import AnswerCache
+from services.rag_services.llm_service import LLMService
+
+QUERY = "how do I check my refund status"
+
+
+async def main_async(args) -> None:
+    executor = ThreadPoolExecutor(max_workers=2)
+    with StubOllamaServer(fast_delay=args.generation_delay) as stub:
+        handler = QueryHandler(
+            embedding_service=StubEmbeddingService(executor, blocking=False),
+            llm_service=LLMService(ollama_host=stub.base_url),
+            retrieval_service=StubRetrievalService(executor, blocking=False),
+            # Every query must run the pipeline; a cached answer would time the cache.
+            answer_cache=AnswerCache(threshold=2.0),
+        )
+        await answer(handler, QUERY)
+
+        buffered, first_event, first_token = [], [], []
+        for _ in range(args.runs):
+            start = time.perf_counter()
+            await answer(handler, QUERY)
+            buffered.append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            tokens = []
+            async for event in handler.stream_query(QUERY):
+                if len(first_event) < len(buffered):
+                    first_event.append(time.perf_counter() - start)
+                if event["type"] == "token":
+                    if not tokens:
+                        first_token.append(time.perf_counter() - start)
+                    tokens.append(event["text"])
+            # Only the generated answer counts; a NO_KB or cached single-token reply is not a stream.
+            assert "".join(tokens).strip() == STUB_ANSWER and len(tokens) > 1, f"stream did not generate: {tokens!r}"
+
+        print(f"generation_delay={args.generation_delay}s runs={args.runs}")
+        print(f"{'path':>22} {'p50_ms':>10}")
+        print(f"{'/query (full answer)':>22} {np.median(buffered) * 1000:>10.1f}")
+        print(f"{'/query/stream sources':>22} {np.median(first_event) * 1000:>10.1f}")
+        print(f"{'/query/stream token':>22} {np.median(first_token) * 1000:>10.1f}")
+    executor.shutdown()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--generation-delay", type=float, default=3.0)
+    parser.add_argument("--runs", type=int, default=5)
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
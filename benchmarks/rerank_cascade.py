@@ -0,0 +1,166 @@
+"""Exhaustive reranking against the adaptive RerankCascade on fixture chunks.
+
+Embeds and BM25-indexes the chunks of ``benchmarks/fixtures``, then for
+each query (fixture queries, section headings and known-item queries made
+of a chunk's opening words) builds the fused candidate list retrieval
+would (dense top TOP_K + BM25 top LEXICAL_TOP_K, RRF to FUSED_TOP_K) and
+reranks it exhaustively, with the cascade, and with the cascade plus its
+truncated first pass. Reports pairs scored (all and full-length) and time
+per query, the paths the cascade took, and how often its top_n matches
+the exhaustive top_n. The score cache is disabled so every mode pays for
+its own pairs.
+
+    python -m benchmarks.rerank_cascade --model-dir /models
+    python -m benchmarks.rerank_cascade --skip-margin 0.05 --min-gap-fraction 0.2
+"""
+
+import argparse
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+from typing import Optional
+
+import numpy as np
+
+from benchmarks.components import RERANK_QUERIES, Fixtures
+from helpers.rag_helpers.caches import EmbeddingCache
+from helpers.rag_helpers.lexical import BM25Index
+from helpers.rag_helpers.rerankers import RerankCascade
+from helpers.rag_helpers.rerankers.cascade import MIN_GAP_FRACTION, SKIP_MARGIN
+from services.rag_services.embedding_service import EmbeddingService
+from services.rag_services.retrieval_service import FUSED_TOP_K, LEXICAL_TOP_K, TOP_K, TOP_N, RetrievalService
+
+KNOWN_ITEM_WORDS = 12
+
+
+def build_queries(fixtures: Fixtures, count: int) -> list[str]:
+    queries = list(RERANK_QUERIES)
+    for chunk in fixtures.chunks:
+        heading = (chunk.section_heading or "").strip().lower()
+        if heading and heading not in queries:
+            queries.append(heading)
+    # Known-item queries (a chunk's opening words) give the cascade clear winners to find.
+    step = max(len(fixtures.chunks) // max(count - len(queries), 1), 1)
+    for chunk in fixtures.chunks[::step]:
+        queries.append(" ".join(chunk.chunk_text.split()[:KNOWN_ITEM_WORDS]).lower())
+    return queries[:count]
+
+
+def candidate_lists(
+    fixtures: Fixtures, embedding: EmbeddingService, retrieval: RetrievalService, queries: list[str]
+) -> list[list[dict]]:
+    chunks = fixtures.chunks
+    vectors = embedding.get_embedding([chunk.chunk_text for chunk in chunks])
+    vectors = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    points = {
+        chunk.chunk_id: SimpleNamespace(
+            id=chunk.chunk_id,
+            payload={"text": chunk.chunk_text, "url": str(chunk.page_url), "section_heading": chunk.section_heading},
+        )
+        for chunk in chunks
+    }
+
+    lists = []
+    for query in queries:
+        query_vec = embedding.get_embedding(query)
+        similarities = vectors @ (query_vec / np.linalg.norm(query_vec))
+        hits = [
+            SimpleNamespace(
+                id=chunks[i].chunk_id, score=float(similarities[i]), payload=points[chunks[i].chunk_id].payload
+            )
+            for i in np.argsort(-similarities)[:TOP_K]
+        ]
+        lexical_hits = retrieval.lexical_index.search(query, LEXICAL_TOP_K)
+        missing = retrieval._missing_ids(hits, lexical_hits)
+        lists.append(retrieval._fuse(hits, lexical_hits, [points[i] for i in missing], FUSED_TOP_K))
+    return lists
+
+
+def run_mode(
+    retrieval: RetrievalService,
+    cascade: Optional[RerankCascade],
+    queries: list[str],
+    lists: list[list[dict]],
+    reference: Optional[list[list[str]]],
+) -> tuple[dict, list[list[str]]]:
+    retrieval.cascade = cascade
+    pairs_before = retrieval.rerank_engine.cache_misses
+    tops = []
+    start = time.perf_counter()
+    for query, candidates in zip(queries, lists):
+        reranked = retrieval.rerank(query, [dict(chunk) for chunk in candidates], TOP_N)
+        tops.append([str(chunk["id"]) for chunk in reranked])
+    elapsed = time.perf_counter() - start
+
+    result = {
+        "pairs": (retrieval.rerank_engine.cache_misses - pairs_before) / len(queries),
+        "ms": elapsed / len(queries) * 1000,
+    }
+    result["full_pairs"] = cascade.full_pairs / len(queries) if cascade is not None else result["pairs"]
+    if reference is not None:
+        result["overlap"] = float(np.mean([len(set(a) & set(b)) / len(b) for a, b in zip(tops, reference)]))
+        result["top1"] = float(np.mean([a[:1] == b[:1] for a, b in zip(tops, reference)]))
+    if cascade is not None:
+        result["cascade"] = cascade.stats()
+    return result, tops
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model-dir", default=None)
+    parser.add_argument("--queries", type=int, default=40)
+    parser.add_argument("--skip-margin", type=float, default=SKIP_MARGIN)
+    parser.add_argument("--min-gap-fraction", type=float, default=MIN_GAP_FRACTION)
+    args = parser.parse_args()
+
+    executor = ThreadPoolExecutor(max_workers=2)
+    fixtures = Fixtures()
+    embedding = EmbeddingService(
+        executor=executor, cache=EmbeddingCache("bench", db_path=None), model_dir=args.model_dir
+    )
+    lexical_index = BM25Index(tempfile.mkdtemp())
+    lexical_index.add_chunks(fixtures.chunks)
+    lexical_index.flush()
+    retrieval = RetrievalService(None, executor=executor, lexical_index=lexical_index, model_dir=args.model_dir)
+    # Every mode must pay for its own pairs.
+    retrieval.rerank_engine.cache_size = 0
+
+    queries = build_queries(fixtures, args.queries)
+    lists = candidate_lists(fixtures, embedding, retrieval, queries)
+    retrieval.rerank(queries[0], [dict(chunk) for chunk in lists[0]], TOP_N)
+
+    def cascade(prefilter: bool) -> RerankCascade:
+        return RerankCascade(
+            skip_margin=args.skip_margin, min_gap_fraction=args.min_gap_fraction, prefilter=prefilter
+        )
+
+    exhaustive, reference = run_mode(retrieval, None, queries, lists, None)
+    results = {
+        "exhaustive": exhaustive,
+        "cascade": run_mode(retrieval, cascade(False), queries, lists, reference)[0],
+        "prefilter": run_mode(retrieval, cascade(True), queries, lists, reference)[0],
+    }
+
+    print(
+        f"queries={len(queries)} candidates/query={np.mean([len(c) for c in lists]):.1f} top_n={TOP_N} "
+        f"skip_margin={args.skip_margin} min_gap_fraction={args.min_gap_fraction}"
+    )
+    print(f"{'mode':>11} {'pairs/q':>8} {'full/q':>7} {'ms/q':>8} {'top_n_overlap':>14} {'top1_agree':>11}  paths")
+    for mode, result in results.items():
+        stats = result.get("cascade")
+        paths = (
+            f"skipped={stats['skipped']} pruned={stats['pruned']} full={stats['full']} "
+            f"prefiltered={stats['prefiltered']}"
+            if stats
+            else "-"
+        )
+        print(
+            f"{mode:>11} {result['pairs']:>8.1f} {result['full_pairs']:>7.1f} {result['ms']:>8.2f} "
+            f"{result.get('overlap', 1.0):>14.2f} {result.get('top1', 1.0):>11.2f}  {paths}"
+        )
+    executor.shutdown()
+
+
+if __name__ == "__main__":
+    main()
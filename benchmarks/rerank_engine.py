@@ -0,0 +1,122 @@
+"""Rerank latency and CPU time: RerankEngine vs. the previous implementation.
+
+The previous ``RetrievalService.rerank`` created a ThreadPoolExecutor per
+request, split candidates into batches of 8 in retrieval order and padded
+each batch to its longest pair. It is reproduced here as the baseline.
+Candidates have mixed lengths, like real irs.gov chunks (short FAQ answers
+next to 1600-char sections).
+
+    python -m benchmarks.rerank_engine
+    python -m benchmarks.rerank_engine --model /models/ms-marco-MiniLM-L-6-v2 --concurrency 8
+"""
+
+import argparse
+import asyncio
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import torch
+
+from services.rag_services.retrieval_service import RERANKER_MODEL, TOP_K, TOP_N, RetrievalService
+
+WORDS = (
+    "refund status form schedule credit income deduction filing deadline payment "
+    "estimated taxpayer return amended dependent eligibility amount notice"
+).split()
+
+
+def legacy_rerank(service: RetrievalService, query: str, chunks: list[dict], top_n: int) -> list[dict]:
+    batch_size, max_workers = 8, 3
+    batches = [chunks[i : i + batch_size] for i in range(0, len(chunks), batch_size)]
+
+    def score_batch(pairs_batch, batch_chunks):
+        with torch.no_grad():
+            inputs = service.tokenizer(
+                pairs_batch, padding=True, truncation=True, max_length=512, return_tensors="pt"
+            ).to(service.device)
+            logits = service.model(**inputs).logits.squeeze().cpu()
+            scores = logits.tolist() if len(batch_chunks) > 1 else [logits.item()]
+        return list(zip(batch_chunks, scores))
+
+    all_scored = []
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [
+            executor.submit(score_batch, [(query, c.get("text", "")) for c in batch], batch)
+            for batch in batches
+        ]
+        for future in futures:
+            all_scored.extend(future.result())
+
+    all_scored.sort(key=lambda x: x[1], reverse=True)
+    return [chunk for chunk, _ in all_scored[:top_n]]
+
+
+def make_candidates(rng: random.Random, query_id: int) -> list[dict]:
+    return [
+        {
+            "id": f"{query_id}-{i}",
+            "text": " ".join(rng.choice(WORDS) for _ in range(rng.choice([30, 60, 120, 250]))),
+            "score": 0.5,
+        }
+        for i in range(TOP_K)
+    ]
+
+
+def timed(fn) -> tuple[float, float]:
+    wall, cpu = time.perf_counter(), time.process_time()
+    fn()
+    return time.perf_counter() - wall, time.process_time() - cpu
+
+
+def report(name: str, wall: float, cpu: float, queries: int) -> None:
+    print(f"{name:>28} {wall / queries * 1000:>12.1f} {cpu / queries * 1000:>12.1f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default=RERANKER_MODEL)
+    parser.add_argument("--queries", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=8)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    workload = [(f"irs question {i}", make_candidates(rng, i)) for i in range(args.queries)]
+    service = RetrievalService(None, reranker_model=args.model, executor=ThreadPoolExecutor(max_workers=2))
+    legacy_rerank(service, *workload[0], TOP_N)
+    service.rerank(*workload[0], TOP_N)
+    service.rerank_engine._cache.clear()
+
+    print(f"model={args.model} queries={args.queries} candidates={TOP_K}")
+    print(f"{'path':>28} {'wall_ms/q':>12} {'cpu_ms/q':>12}")
+
+    wall, cpu = timed(lambda: [legacy_rerank(service, q, c, TOP_N) for q, c in workload])
+    report("legacy sequential", wall, cpu, args.queries)
+
+    wall, cpu = timed(lambda: [service.rerank(q, c, TOP_N) for q, c in workload])
+    report("engine sequential", wall, cpu, args.queries)
+
+    wall, cpu = timed(lambda: [service.rerank(q, c, TOP_N) for q, c in workload])
+    report("engine sequential (cached)", wall, cpu, args.queries)
+
+    service.rerank_engine._cache.clear()
+
+    async def concurrent() -> None:
+        semaphore = asyncio.Semaphore(args.concurrency)
+
+        async def one(q, c):
+            async with semaphore:
+                await service.rerank_async(q, c, TOP_N)
+
+        await asyncio.gather(*(one(q, c) for q, c in workload))
+
+    wall, cpu = timed(lambda: asyncio.run(concurrent()))
+    report(f"engine async x{args.concurrency}", wall, cpu, args.queries)
+
+    stats = service.rerank_stats()
+    print(f"avg pairs per batcher flush: {stats['avg_batch_size']:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+"""Minimal Ollama stand-in for offline benchmarks.
+
+Serves ``/api/generate`` and ``/api/tags`` from a background thread. Prompts containing
+``SLOW_MARKER`` sleep for ``slow_delay`` seconds, everything else for
+``fast_delay`` seconds, so benchmarks can mix slow and fast generations.
+Streaming requests spread the same delay evenly across the answer's tokens.
+
+Prefill is simulated like Ollama's prompt cache: the rendered ``system`` +
+``prompt`` is split into whitespace tokens, tokens shared with the previous
+request's prefix are reused, and every other token costs
+``prefill_per_token`` seconds. Responses report ``prompt_eval_count`` and
+``prompt_eval_duration`` (nanoseconds) as Ollama does.
+"""
+
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import orjson
+
+from services.rag_services.llm_service import OLLAMA_MODEL
+
+SLOW_MARKER = "[slow]"
+STUB_ANSWER = "### Stub answer\n\nThis answer was produced by the benchmark stub."
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out in separate writes; with Nagle on, each response waits for a delayed ACK.
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def _read_body(self) -> dict:
+        length = int(self.headers.get("content-length", 0))
+        return orjson.loads(self.rfile.read(length)) if length else {}
+
+    def _delay_for(self, body: dict) -> float:
+        text = orjson.dumps(body).decode("utf-8")
+        if SLOW_MARKER in text:
+            return self.server.slow_delay
+        return self.server.fast_delay
+
+    def _prefill(self, body: dict) -> tuple[int, int]:
+        tokens = f"{body.get('system', '')}\n\n{body.get('prompt', '')}".split()
+        server = self.server
+        with server.cache_lock:
+            reused = 0
+            for cached, token in zip(server.cached_tokens, tokens):
+                if cached != token:
+                    break
+                reused += 1
+            server.cached_tokens = tokens
+        evaluated = len(tokens) - reused
+        duration = evaluated * server.prefill_per_token
+        time.sleep(duration)
+        return evaluated, int(duration * 1e9)
+
+    def _send_json(self, payload: dict) -> None:
+        data = orjson.dumps(payload)
+        self.send_response(200)
+        self.send_header("content-type", "application/json")
+        self.send_header("content-length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _send_stream(self, model: str, delay: float, prefill: tuple[int, int]) -> None:
+        tokens = STUB_ANSWER.split(" ")
+        self.send_response(200)
+        self.send_header("content-type", "application/x-ndjson")
+        self.send_header("transfer-encoding", "chunked")
+        self.end_headers()
+
+        try:
+            for i, token in enumerate(tokens):
+                time.sleep(delay / len(tokens))
+                text = token if i == 0 else f" {token}"
+                self._write_chunk(orjson.dumps({"model": model, "response": text, "done": False}) + b"\n")
+            done = {
+                "model": model,
+                "response": "",
+                "done": True,
+                "prompt_eval_count": prefill[0],
+                "prompt_eval_duration": prefill[1],
+                "eval_count": len(tokens),
+            }
+            self._write_chunk(orjson.dumps(done) + b"\n")
+            self._write_chunk(b"")
+        except (BrokenPipeError, ConnectionResetError):
+            self.server.aborted_streams += 1
+
+    def _write_chunk(self, data: bytes) -> None:
+        self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+        self.wfile.flush()
+
+    def do_GET(self):
+        if self.path != "/api/tags":
+            self.send_error(404)
+            return
+        self._send_json({"models": [{"name": OLLAMA_MODEL}]})
+
+    def do_POST(self):
+        body = self._read_body()
+        if self.path != "/api/generate":
+            self.send_error(404)
+            return
+
+        delay = self._delay_for(body)
+        prefill = self._prefill(body)
+        if body.get("stream"):
+            self._send_stream(body.get("model", ""), delay, prefill)
+            return
+
+        time.sleep(delay)
+        self._send_json(
+            {
+                "model": body.get("model", ""),
+                "response": STUB_ANSWER,
+                "done": True,
+                "prompt_eval_count": prefill[0],
+                "prompt_eval_duration": prefill[1],
+                "eval_count": len(STUB_ANSWER.split(" ")),
+            }
+        )
+
+
+class StubOllamaServer:
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        fast_delay: float = 0.05,
+        slow_delay: float = 2.0,
+        prefill_per_token: float = 0.0,
+    ):
+        self.httpd = ThreadingHTTPServer((host, port), _StubHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.fast_delay = fast_delay
+        self.httpd.slow_delay = slow_delay
+        self.httpd.aborted_streams = 0
+        self.httpd.prefill_per_token = prefill_per_token
+        self.httpd.cached_tokens = []
+        self.httpd.cache_lock = threading.Lock()
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def aborted_streams(self) -> int:
+        return self.httpd.aborted_streams
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def __enter__(self) -> "StubOllamaServer":
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
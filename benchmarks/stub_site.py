@@ -0,0 +1,99 @@
+"""Minimal irs.gov-like site for offline crawler benchmarks.
+
+Serves the HTML fixtures under ``/pages/<n>`` (page ``n`` is fixture
+``n % len(fixtures)``) and a ``robots.txt`` that disallows
+``DISALLOWED_PREFIX``, from a background thread. Every response waits
+``latency`` seconds first. The server counts requests, TCP connections and
+the most requests it had in flight at once, and records every path
+requested, so benchmarks can check pooling and robots.txt compliance.
+"""
+
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+FIXTURES_DIR = Path(__file__).parent / "fixtures"
+DISALLOWED_PREFIX = "/private/"
+ROBOTS_TXT = f"User-agent: *\nDisallow: {DISALLOWED_PREFIX}\n"
+
+
+class _SiteHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+
+    def _send(self, status: int, content_type: str, data: bytes) -> None:
+        self.send_response(status)
+        self.send_header("content-type", content_type)
+        self.send_header("content-length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.requests += 1
+            server.paths.append(self.path)
+            server.in_flight += 1
+            server.max_in_flight = max(server.max_in_flight, server.in_flight)
+        try:
+            time.sleep(server.latency)
+            if self.path == "/robots.txt":
+                self._send(200, "text/plain", ROBOTS_TXT.encode("utf-8"))
+            elif self.path.startswith(("/pages/", DISALLOWED_PREFIX)):
+                index = int(self.path.rstrip("/").rsplit("/", 1)[-1])
+                self._send(200, "text/html; charset=utf-8", server.pages[index % len(server.pages)])
+            else:
+                self._send(404, "text/plain", b"not found")
+        finally:
+            with server.lock:
+                server.in_flight -= 1
+
+
+class StubSiteServer:
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, latency: float = 0.05):
+        self.httpd = ThreadingHTTPServer((host, port), _SiteHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.latency = latency
+        self.httpd.pages = [path.read_bytes() for path in sorted((FIXTURES_DIR / "html").glob("*.html"))]
+        self.httpd.lock = threading.Lock()
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.reset()
+
+    def reset(self) -> None:
+        with self.httpd.lock:
+            self.httpd.requests = 0
+            self.httpd.connections = 0
+            self.httpd.in_flight = 0
+            self.httpd.max_in_flight = 0
+            self.httpd.paths = []
+
+    def stats(self) -> dict:
+        with self.httpd.lock:
+            return {
+                "requests": self.httpd.requests,
+                "connections": self.httpd.connections,
+                "max_in_flight": self.httpd.max_in_flight,
+                "disallowed_fetched": sum(path.startswith(DISALLOWED_PREFIX) for path in self.httpd.paths),
+            }
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def __enter__(self) -> "StubSiteServer":
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
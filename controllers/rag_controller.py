@@ -1,8 +1,30 @@
-from fastapi import APIRouter, HTTPException, status, Depends
+import asyncio
+from typing import AsyncIterator
 
-from models import ChatRequest, ChatResponse, AdminStats, IngestionRequest
-from handlers import QueryHandler, IngestionHandler, StatsHandler
-from dependencies import get_query_handler, get_ingestion_handler, get_stats_handler
+import orjson
+from fastapi import APIRouter, HTTPException, Request, status, Depends
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+
+from models import (
+    ChatRequest,
+    BatchQueryRequest,
+    SearchRequest,
+    ChatResponse,
+    SearchResponse,
+    AdminStats,
+    IngestionRequest,
+    MigrationRequest,
+)
+from helpers import OverloadedError
+from handlers import QueryHandler, SearchHandler, IngestionHandler, StatsHandler, MetricsHandler, HealthHandler
+from dependencies import (
+    get_query_handler,
+    get_search_handler,
+    get_ingestion_handler,
+    get_stats_handler,
+    get_metrics_handler,
+    get_health_handler,
+)
 
 router = APIRouter()
 
@@ -12,7 +34,107 @@ async def query(
     handler: QueryHandler = Depends(get_query_handler)
 ):
     try:
-        return handler.handle_query(query=request.query, filters=request.filters)
+        handler.validate_filters(request.filters)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    try:
+        return await handler.handle_query(
+            query=request.query, filters=request.filters, search_profile=request.search_profile
+        )
+    except OverloadedError as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e),
+            headers={"Retry-After": str(e.retry_after)},
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e)
+        )
+
+
+@router.post("/query/stream")
+async def query_stream(
+    request: ChatRequest,
+    http_request: Request,
+    handler: QueryHandler = Depends(get_query_handler)
+):
+    try:
+        handler.validate_filters(request.filters)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    # Refuse before the 200 goes out, so a shed stream gets the same 503 as /query.
+    retry_after = handler.stream_retry_after(
+        query=request.query, filters=request.filters, search_profile=request.search_profile
+    )
+    if retry_after is not None:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="interactive queue is full",
+            headers={"Retry-After": str(retry_after)},
+        )
+
+    events = handler.stream_query(
+        query=request.query, filters=request.filters, search_profile=request.search_profile
+    )
+
+    async def ndjson() -> AsyncIterator[bytes]:
+        try:
+            async for event in events:
+                if await http_request.is_disconnected():
+                    break
+                yield orjson.dumps(event) + b"\n"
+        finally:
+            # Closing the handler stream closes the upstream Ollama request.
+            await events.aclose()
+
+    return StreamingResponse(ndjson(), media_type="application/x-ndjson")
+
+
+@router.post("/query/batch")
+async def query_batch(
+    request: BatchQueryRequest,
+    http_request: Request,
+    handler: QueryHandler = Depends(get_query_handler)
+):
+    try:
+        handler.validate_filters(request.filters)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    results = handler.handle_batch(
+        queries=request.queries, filters=request.filters, search_profile=request.search_profile
+    )
+
+    async def ndjson() -> AsyncIterator[bytes]:
+        try:
+            async for index, response in results:
+                if await http_request.is_disconnected():
+                    break
+                yield orjson.dumps(
+                    {"index": index, "query": request.queries[index], "response": response.model_dump(mode="json")}
+                ) + b"\n"
+        finally:
+            # Cancels generations still queued or running for this batch.
+            await results.aclose()
+
+    return StreamingResponse(ndjson(), media_type="application/x-ndjson")
+
+
+@router.post("/search", response_model=SearchResponse)
+async def search(
+    request: SearchRequest,
+    handler: SearchHandler = Depends(get_search_handler)
+):
+    try:
+        handler.validate_filters(request.filters)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    try:
+        return await handler.handle_search(request)
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e)
@@ -29,13 +151,44 @@ async def get_stats(handler: StatsHandler = Depends(get_stats_handler)):
         )
 
 
+@router.get("/metrics")
+async def metrics(handler: MetricsHandler = Depends(get_metrics_handler)):
+    return Response(content=handler.handle_metrics(), media_type=handler.content_type)
+
+
+@router.get("/health")
+async def health(handler: HealthHandler = Depends(get_health_handler)):
+    return handler.handle_live()
+
+
+@router.get("/ready")
+async def ready(handler: HealthHandler = Depends(get_health_handler)):
+    is_ready, body = await handler.handle_ready()
+    status_code = status.HTTP_200_OK if is_ready else status.HTTP_503_SERVICE_UNAVAILABLE
+    return JSONResponse(content=body, status_code=status_code)
+
+
+@router.post("/admin/migrate")
+async def migrate_collection(
+    request: MigrationRequest,
+    handler: StatsHandler = Depends(get_stats_handler)
+):
+    try:
+        # Two blocking Qdrant calls; keep them off the event loop.
+        return await asyncio.to_thread(handler.handle_migration, request)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e)
+        )
+
+
 @router.post("/ingest")
 async def trigger_ingest(
     request: IngestionRequest,
     handler: IngestionHandler = Depends(get_ingestion_handler)
 ):
     try:
-        return handler.handle_ingestion(request)
+        return await handler.handle_ingestion(request)
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e)
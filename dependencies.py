@@ -1,9 +1,16 @@
 import os
+from concurrent.futures import ThreadPoolExecutor
 from functools import lru_cache
+from typing import Optional
 from dotenv import load_dotenv
 
+from helpers.rag_helpers.admission import AdmissionQueue
+from helpers.rag_helpers.lexical import BM25Index, FormIndex
+from helpers.rag_helpers.rerankers import RerankCascade
+from helpers.rag_helpers.sidecar import SidecarClient
+from helpers.rag_helpers.storage import ChunkStore
 from services import EmbeddingService, LLMService, QdrantService, RetrievalService, IngestionService
-from handlers import QueryHandler, IngestionHandler, StatsHandler
+from handlers import QueryHandler, SearchHandler, IngestionHandler, StatsHandler, MetricsHandler, HealthHandler
 
 load_dotenv()
 
@@ -11,6 +18,28 @@ QDRANT_URL = os.getenv("QDRANT_URL")
 QDRANT_API_KEY = os.getenv("QDRANT_API_KEY")
 OLLAMA_HOST = os.getenv("OLLAMA_HOST", "http://localhost:11434")
 
+# Quantization for new Qdrant collections: "none" (default), "int8" or "binary". Quantized
+# collections keep their fp32 originals on disk; migrate existing ones with /admin/migrate.
+QDRANT_QUANTIZATION = os.getenv("QDRANT_QUANTIZATION", "none")
+
+INFERENCE_WORKERS = 2
+# Generations sent to the Ollama host at once; the rest wait in AdmissionQueue lanes.
+LLM_MAX_IN_FLIGHT = 4
+# One of "torch", "torch-int8", "onnx" (onnx needs onnxruntime installed).
+INFERENCE_BACKEND = os.getenv("INFERENCE_BACKEND", "torch")
+# Keep chunk text in a local memory-mapped store and only vectors + filter fields in Qdrant.
+# Switching this on for an existing collection needs a reindex to fill the store.
+ID_ONLY_PAYLOADS = False
+# Let RerankCascade skip or shrink cross-encoder work when first-stage scores are decisive,
+# optionally with a cheap truncated pass choosing the candidates for the full-length one.
+ADAPTIVE_RERANK = True
+RERANK_PREFILTER = False
+# Load models from this directory (hub layout or bare model names) with no hub lookups.
+MODEL_DIR = os.getenv("MODEL_DIR")
+# Unix socket of a running inference_server.py. When set, workers embed and rerank through
+# it and load no models, so N uvicorn workers share one copy of each model.
+INFERENCE_SIDECAR = os.getenv("INFERENCE_SIDECAR")
+
 # Handlers
 
 @lru_cache()
@@ -21,36 +50,107 @@ def get_query_handler() -> QueryHandler:
         retrieval_service=get_retrieval_service(),
     )
 
+@lru_cache()
+def get_search_handler() -> SearchHandler:
+    return SearchHandler(
+        embedding_service=get_embedding_service(),
+        retrieval_service=get_retrieval_service(),
+    )
+
 @lru_cache()
 def get_ingestion_handler() -> IngestionHandler:
     return IngestionHandler(
         embedding_service=get_embedding_service(),
         qdrant_service=get_qdrant_service(),
         ingestion_service=get_ingestion_service(),
+        lexical_index=get_lexical_index(),
+        form_index=get_form_index(),
     )
 
 @lru_cache()
 def get_stats_handler() -> StatsHandler:
-    return StatsHandler(qdrant_service=get_qdrant_service())
+    return StatsHandler(qdrant_service=get_qdrant_service(), llm_service=get_llm_service())
+
+@lru_cache()
+def get_metrics_handler() -> MetricsHandler:
+    return MetricsHandler(
+        query_handler=get_query_handler(),
+        embedding_service=get_embedding_service(),
+        retrieval_service=get_retrieval_service(),
+        llm_service=get_llm_service(),
+    )
+
+@lru_cache()
+def get_health_handler() -> HealthHandler:
+    return HealthHandler()
+
+def preload() -> dict:
+    """Construct every handler, loading all models, and return the services to warm up."""
+    get_query_handler()
+    get_search_handler()
+    get_ingestion_handler()
+    get_stats_handler()
+    get_metrics_handler()
+    return {
+        "embedding_service": get_embedding_service(),
+        "retrieval_service": get_retrieval_service(),
+        "qdrant_service": get_qdrant_service(),
+        "llm_service": get_llm_service(),
+    }
 
 # Services
 
+@lru_cache()
+def get_inference_executor() -> ThreadPoolExecutor:
+    return ThreadPoolExecutor(max_workers=INFERENCE_WORKERS, thread_name_prefix="inference")
+
+@lru_cache()
+def get_sidecar_client() -> Optional[SidecarClient]:
+    return SidecarClient(INFERENCE_SIDECAR) if INFERENCE_SIDECAR else None
+
 @lru_cache()
 def get_embedding_service() -> EmbeddingService:
-    return EmbeddingService()
+    return EmbeddingService(
+        backend=INFERENCE_BACKEND,
+        executor=get_inference_executor(),
+        model_dir=MODEL_DIR,
+        sidecar=get_sidecar_client(),
+    )
 
 @lru_cache()
 def get_llm_service() -> LLMService:
-    return LLMService(ollama_host=OLLAMA_HOST)
+    return LLMService(ollama_host=OLLAMA_HOST, admission=AdmissionQueue(max_in_flight=LLM_MAX_IN_FLIGHT))
 
 @lru_cache()
 def get_qdrant_service() -> QdrantService:
-    return QdrantService(url=QDRANT_URL, api_key=QDRANT_API_KEY)
+    return QdrantService(url=QDRANT_URL, api_key=QDRANT_API_KEY, quantization=QDRANT_QUANTIZATION)
 
 @lru_cache()
 def get_retrieval_service() -> RetrievalService:
-    return RetrievalService(get_qdrant_service())
+    return RetrievalService(
+        get_qdrant_service(),
+        backend=INFERENCE_BACKEND,
+        executor=get_inference_executor(),
+        lexical_index=get_lexical_index(),
+        form_index=get_form_index(),
+        chunk_store=get_chunk_store(),
+        model_dir=MODEL_DIR,
+        sidecar=get_sidecar_client(),
+        cascade=RerankCascade(prefilter=RERANK_PREFILTER) if ADAPTIVE_RERANK else None,
+    )
+
+@lru_cache()
+def get_lexical_index() -> BM25Index:
+    return BM25Index()
+
+@lru_cache()
+def get_form_index() -> FormIndex:
+    return FormIndex()
+
+@lru_cache()
+def get_chunk_store() -> Optional[ChunkStore]:
+    return ChunkStore() if ID_ONLY_PAYLOADS else None
 
 @lru_cache()
 def get_ingestion_service() -> IngestionService:
-    return IngestionService(vector_db_service=get_qdrant_service())
+    return IngestionService(vector_db_service=get_qdrant_service(), chunk_store=get_chunk_store())
@@ -1,11 +1,17 @@
 from .rag_handlers import (
     QueryHandler,
+    SearchHandler,
     IngestionHandler,
     StatsHandler,
+    MetricsHandler,
+    HealthHandler,
 )
 
 __all__ = [
     "QueryHandler",
+    "SearchHandler",
     "IngestionHandler",
     "StatsHandler",
+    "MetricsHandler",
+    "HealthHandler",
 ]
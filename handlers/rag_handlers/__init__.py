@@ -1,11 +1,17 @@
-"""RAG Handlers - Query, Ingestion, and Stats handlers."""
+"""RAG Handlers - Query, Search, Ingestion, Stats, Metrics, and Health handlers."""
 
 from .query_handler import QueryHandler
+from .search_handler import SearchHandler
 from .ingestion_handler import IngestionHandler
 from .stats_handler import StatsHandler
+from .metrics_handler import MetricsHandler
+from .health_handler import HealthHandler
 
 __all__ = [
     "QueryHandler",
+    "SearchHandler",
     "IngestionHandler",
     "StatsHandler",
+    "MetricsHandler",
+    "HealthHandler",
 ]
@@ -0,0 +1,81 @@
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Optional
+
+COLLECTION_NAME = "irs_rag_v1"
+# Qdrant/Ollama are re-checked at most this often once warm; probes hit /ready every few seconds.
+READY_CHECK_TTL_S = 5.0
+WARMUP_CHECKS = ("load_models", "embedding_warmup", "reranker_warmup")
+BACKEND_CHECKS = ("qdrant", "ollama")
+
+
+class HealthHandler:
+    """Liveness and readiness.
+
+    Constructed without any services, so probing ``/ready`` never triggers the
+    model loads that ``warm_up`` performs at startup. Until ``warm_up`` has
+    loaded and exercised the models the instance is not ready; afterwards
+    readiness follows Qdrant and Ollama connectivity.
+    """
+
+    def __init__(self):
+        self.collection_name = COLLECTION_NAME
+        self.warmed = False
+        self.checks: dict[str, dict[str, Any]] = {}
+        self._qdrant_service = None
+        self._llm_service = None
+        self._checked_at = 0.0
+        self._check_lock = asyncio.Lock()
+
+    async def warm_up(self, load_services: Callable[[], dict[str, Any]]) -> bool:
+        """Construct the services via ``load_services`` and exercise them once.
+
+        Model loading and warmup passes are blocking, so they run in a thread.
+        Returns whether the models are warm; Ollama preloading is best effort
+        and only reported.
+        """
+        services: dict[str, Any] = {}
+
+        async def load() -> str:
+            services.update(await asyncio.to_thread(load_services))
+            return "services constructed"
+
+        await self._run("load_models", load)
+        if not services:
+            return False
+        self._qdrant_service = services["qdrant_service"]
+        self._llm_service = services["llm_service"]
+        await self._run("embedding_warmup", lambda: asyncio.to_thread(services["embedding_service"].warmup))
+        await self._run("reranker_warmup", lambda: asyncio.to_thread(services["retrieval_service"].warmup))
+        await self._run("ollama_preload", self._llm_service.preload_async)
+        await self._check_backends()
+        self.warmed = all(self.checks[name]["ok"] for name in WARMUP_CHECKS)
+        return self.warmed
+
+    async def handle_ready(self) -> tuple[bool, dict[str, Any]]:
+        if self.warmed:
+            async with self._check_lock:
+                if time.monotonic() - self._checked_at > READY_CHECK_TTL_S:
+                    await self._check_backends()
+        ready = self.warmed and all(self.checks[name]["ok"] for name in BACKEND_CHECKS)
+        return ready, {"status": "ready" if ready else "not_ready", "checks": self.checks}
+
+    def handle_live(self) -> dict[str, str]:
+        return {"status": "ok"}
+
+    async def _check_backends(self) -> None:
+        await asyncio.gather(
+            self._run("qdrant", lambda: self._qdrant_service.check_async(self.collection_name)),
+            self._run("ollama", self._llm_service.check_async),
+        )
+        self._checked_at = time.monotonic()
+
+    async def _run(self, name: str, check: Callable[[], Awaitable[Optional[str]]]) -> None:
+        start = time.perf_counter()
+        try:
+            detail = await check()
+            result = {"ok": True, "detail": detail or "ok"}
+        except Exception as e:
+            result = {"ok": False, "detail": f"{type(e).__name__}: {e}"}
+        result["seconds"] = round(time.perf_counter() - start, 4)
+        self.checks[name] = result
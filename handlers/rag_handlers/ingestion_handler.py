@@ -1,25 +1,46 @@
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import asyncio
+import multiprocessing
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Optional
 
-from models import IngestionRequest
-from helpers.rag_helpers.crawlers import WebCrawler, SitemapFetcher
+import numpy as np
+
+from models import Chunk, CrawledPage, IngestionRequest
+from helpers.rag_helpers.crawlers import AsyncWebCrawler, SitemapFetcher
 from helpers.rag_helpers.storage import StorageManager
-from helpers.rag_helpers.parsers import HtmlParser, PdfParser
+from helpers.rag_helpers.parsers import parse_page
 from helpers.rag_helpers.chunkers import chunk_page
+from helpers.rag_helpers.lexical import BM25Index, FormIndex
+from helpers.rag_helpers.pipeline import Stage, StagedPipeline
 from utils import compute_content_hash
 
 COLLECTION_NAME = "irs_rag_v1"
 RATE_LIMIT_RPS = 0.5
+# Per-stage workers not set by the request. Embedding runs on the shared inference
+# executor, so one embed worker keeps a single batch in flight.
+CHUNK_WORKERS = 2
+EMBED_WORKERS = 1
+UPSERT_WORKERS = 1
+EMBED_MAX_WAIT_MS = 200.0
+UPSERT_MAX_WAIT_MS = 1000.0
 
 
 class IngestionHandler:
-    def __init__(self, embedding_service, qdrant_service, ingestion_service):
+    def __init__(
+        self,
+        embedding_service,
+        qdrant_service,
+        ingestion_service,
+        lexical_index: Optional[BM25Index] = None,
+        form_index: Optional[FormIndex] = None,
+    ):
         self.embedding_service = embedding_service
         self.qdrant_service = qdrant_service
         self.ingestion_service = ingestion_service
+        self.lexical_index = lexical_index
+        self.form_index = form_index
         self.collection_name = COLLECTION_NAME
         self.storage = StorageManager()
-        self.html_parser = HtmlParser()
-        self.pdf_parser = PdfParser()
 
     def _filter_urls(self, urls: list[str], request: IngestionRequest) -> list[str]:
         filtered = urls
@@ -60,73 +81,117 @@ class IngestionHandler:
         filtered_urls = self._filter_urls(urls, request)
         return filtered_urls[:request.max_pages]
 
-    def _process_page(self, url: str, crawler, collection_name: str):
-        
-        try:
-            page = crawler.fetch(url)
-            if not page:
-                return None
-
-            page.content_hash = compute_content_hash(page.raw_content)
-            self.storage.save_raw_page(page)
-
-            if page.content_type.value == "pdf":
-                page = self.pdf_parser.parse(page)
-            else:
-                page = self.html_parser.parse(page)
-
-            self.storage.save_cleaned_page(page)
-
-            chunks = chunk_page(page)
-            if not chunks:
-                return None
+    def _save_raw_page(self, page: CrawledPage) -> None:
+        page.content_hash = compute_content_hash(page.raw_content)
+        self.storage.save_raw_page(page)
 
+    def _chunk_page(self, page: CrawledPage) -> list[Chunk]:
+        self.storage.save_cleaned_page(page)
+        chunks = chunk_page(page)
+        if chunks:
             self.storage.save_chunks(chunks, str(page.url))
+        return chunks
+
+    def _upsert_chunks(self, chunks: list[Chunk], embeddings: list[np.ndarray], collection_name: str) -> None:
+        self.ingestion_service.upsert_chunks(chunks, embeddings, collection_name)
+        if self.lexical_index is not None:
+            self.lexical_index.add_chunks(chunks)
+        if self.form_index is not None:
+            self.form_index.add_chunks(chunks)
+
+    def _build_pipeline(
+        self,
+        request: IngestionRequest,
+        crawler: AsyncWebCrawler,
+        parse_pool: Executor,
+        io_pool: Executor,
+        pages_upserted: set[str],
+    ) -> StagedPipeline:
+        loop = asyncio.get_running_loop()
+
+        async def fetch(url: str):
+            page = await crawler.fetch(url)
+            if not page:
+                return None
+            await loop.run_in_executor(io_pool, self._save_raw_page, page)
+            return [page]
+
+        async def parse(page: CrawledPage):
+            return [await loop.run_in_executor(parse_pool, parse_page, page)]
+
+        async def chunk(page: CrawledPage):
+            return await loop.run_in_executor(io_pool, self._chunk_page, page)
+
+        async def embed(chunks: list[Chunk]):
+            embeddings = await self.embedding_service.get_embedding_async([c.chunk_text for c in chunks])
+            # A single text comes back as a vector rather than a 1-row matrix.
+            return zip(chunks, np.asarray(embeddings).reshape(len(chunks), -1))
+
+        async def upsert(pairs: list[tuple[Chunk, np.ndarray]]):
+            chunks = [chunk for chunk, _ in pairs]
+            embeddings = [embedding for _, embedding in pairs]
+            await loop.run_in_executor(io_pool, self._upsert_chunks, chunks, embeddings, self.collection_name)
+            pages_upserted.update(str(chunk.page_url) for chunk in chunks)
+            return chunks
+
+        return StagedPipeline(
+            [
+                Stage("fetch", fetch, workers=request.fetch_concurrency),
+                Stage("parse", parse, workers=request.concurrency),
+                Stage("chunk", chunk, workers=CHUNK_WORKERS),
+                Stage(
+                    "embed",
+                    embed,
+                    workers=EMBED_WORKERS,
+                    batch_size=request.embed_batch_size,
+                    max_wait_ms=EMBED_MAX_WAIT_MS,
+                ),
+                Stage(
+                    "upsert",
+                    upsert,
+                    workers=UPSERT_WORKERS,
+                    batch_size=request.upsert_batch_size,
+                    max_wait_ms=UPSERT_MAX_WAIT_MS,
+                ),
+            ]
+        )
 
-            chunk_texts = [chunk.chunk_text for chunk in chunks]
-            embeddings = self.embedding_service.get_embedding(chunk_texts)
-
-            self.ingestion_service.upsert_chunks(chunks, embeddings, collection_name)
-
-            return len(chunks)
-
-        except Exception as e:
-            return None
-
-    def handle_ingestion(self, request: IngestionRequest) -> dict:
-        crawler = WebCrawler(
-            base_url=request.seed_url, rate_limit_rps=RATE_LIMIT_RPS
+    async def handle_ingestion(self, request: IngestionRequest) -> dict:
+        crawler = AsyncWebCrawler(
+            base_url=request.seed_url,
+            rate_limit_rps=RATE_LIMIT_RPS,
+            max_connections=request.fetch_concurrency,
         )
-        crawler._check_robots_txt()
+        await crawler.load_robots_txt()
 
-        self.qdrant_service.ensure_collection(
+        await asyncio.to_thread(
+            self.qdrant_service.ensure_collection,
             self.collection_name,
             self.embedding_service.vector_size,
         )
 
-        target_urls = self._get_target_urls(request)
-
-        processed = 0
-        total_chunks = 0
+        target_urls = await asyncio.to_thread(self._get_target_urls, request)
 
-        with ThreadPoolExecutor(max_workers=request.concurrency) as executor:
-            futures = {
-                executor.submit(
-                    self._process_page, url, crawler, self.collection_name
-                ): url
-                for url in target_urls
-            }
+        # Parsing is CPU-bound; spawned processes keep it off this process's GIL
+        # without forking a parent that holds models and inference threads.
+        parse_pool = ProcessPoolExecutor(
+            max_workers=request.concurrency, mp_context=multiprocessing.get_context("spawn")
+        )
+        io_pool = ThreadPoolExecutor(max_workers=CHUNK_WORKERS + UPSERT_WORKERS)
+        pages_upserted: set[str] = set()
+        try:
+            pipeline = self._build_pipeline(request, crawler, parse_pool, io_pool, pages_upserted)
+            stages = await pipeline.run(target_urls)
+        finally:
+            await crawler.aclose()
+            await asyncio.to_thread(parse_pool.shutdown)
+            io_pool.shutdown(wait=False)
 
-            for future in as_completed(futures):
-                try:
-                    chunks_count = future.result()
-                    if chunks_count:
-                        processed += 1
-                        total_chunks += chunks_count
-                except Exception:
-                    pass
+        # Chunk-store and BM25 segment flushes grow with the corpus; keep them off the loop.
+        await asyncio.to_thread(self.ingestion_service.flush)
 
-        crawler.close()
+        if self.lexical_index is not None:
+            await asyncio.to_thread(self.lexical_index.flush)
 
         return {
             "status": "completed",
@@ -134,14 +199,16 @@ class IngestionHandler:
             "seed_url": request.seed_url,
             "max_pages": request.max_pages,
             "concurrency": request.concurrency,
+            "fetch_concurrency": request.fetch_concurrency,
             "filters": {
                 "allow_prefix": request.allow_prefix,
                 "only_html": request.only_html,
                 "only_pdf": request.only_pdf,
                 "forms": request.forms,
             },
-            "pages_processed": processed,
-            "total_chunks": total_chunks,
+            "pages_processed": len(pages_upserted),
+            "total_chunks": stages["upsert"]["outputs"],
             "target_urls_found": len(target_urls),
+            "stages": stages,
         }
 
@@ -0,0 +1,23 @@
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, generate_latest
+
+from helpers.rag_helpers.metrics import StatsCollector
+
+
+class MetricsHandler:
+    def __init__(self, query_handler, embedding_service, retrieval_service, llm_service):
+        REGISTRY.register(
+            StatsCollector(
+                {
+                    "answer_cache": query_handler.answer_cache.stats,
+                    "single_flight": query_handler.single_flight.stats,
+                    "embedding_cache": embedding_service.cache_stats,
+                    "embedding_batches": embedding_service.batch_stats,
+                    "rerank": retrieval_service.rerank_stats,
+                    "llm_queue": llm_service.queue_stats,
+                }
+            )
+        )
+        self.content_type = CONTENT_TYPE_LATEST
+
+    def handle_metrics(self) -> bytes:
+        return generate_latest(REGISTRY)
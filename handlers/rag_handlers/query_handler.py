@@ -1,12 +1,27 @@
-from typing import Optional
+import asyncio
+import logging
+from typing import Any, AsyncIterator, Optional
 
 import numpy as np
 
+from helpers.rag_helpers.admission import OverloadedError
+from helpers.rag_helpers.batching import SingleFlight
+from helpers.rag_helpers.caches import AnswerCache, CollectionVersions, answer_scope, filters_key
+from helpers.rag_helpers.filters import build_filter
+from helpers.rag_helpers.metrics import CANDIDATES, stage
 from models import ChatResponse, Source
 from services.rag_services.retrieval_service import TOP_K, TOP_N, SIMILARITY_CUTOFF
+from utils import extract_irs_form_numbers, normalize_form_number, normalize_text
+from .shared import BACKEND_ERRORS, chunk_source
 
 COLLECTION_NAME = "irs_rag_v1"
 NO_KB_MSG = "I don't have verifiable information in the knowledge base for that query."
+ANSWER_CACHE_THRESHOLD = 0.95
+BATCH_GENERATION_CONCURRENCY = 4
+# Queries reranked together before their generations start; smaller groups get answers out sooner.
+BATCH_RERANK_GROUP = 16
+
+logger = logging.getLogger(__name__)
 
 
 class QueryHandler:
@@ -15,104 +30,474 @@ class QueryHandler:
         embedding_service,
         llm_service,
         retrieval_service,
+        answer_cache: Optional[AnswerCache] = None,
+        collection_versions: Optional[CollectionVersions] = None,
     ):
         self.embedding_provider = embedding_service
         self.llm = llm_service
         self.retrieval_service = retrieval_service
         self.collection_name = COLLECTION_NAME
+        self.answer_cache = answer_cache or AnswerCache(threshold=ANSWER_CACHE_THRESHOLD)
+        self.collection_versions = collection_versions or CollectionVersions()
+        self.single_flight = SingleFlight()
+
+    def validate_filters(self, filters: Optional[dict]) -> None:
+        """Raise ``ValueError`` if ``filters`` is not valid filter language."""
+        build_filter(filters)
 
-    def handle_query(
+    def _forms(self, query: str) -> list[str]:
+        return [normalize_form_number(form) for form in extract_irs_form_numbers(query)]
+
+    def _answer_scope(
         self,
         query: str,
-        filters: Optional[dict] = None,
-        top_k: Optional[int] = None,
-        top_n: Optional[int] = None,
-        cutoff: Optional[float] = None,
-    ):
-        try:
-            query_embedding = self.embedding_provider.get_embedding(query)
+        filters: Optional[dict],
+        top_k: Optional[int],
+        top_n: Optional[int],
+        cutoff: Optional[float],
+        search_profile: Optional[str],
+    ) -> str:
+        # Resolved defaults, so an explicit TOP_K shares answers with an omitted one.
+        return answer_scope(
+            filters,
+            self._forms(query),
+            top_k=top_k or TOP_K,
+            top_n=top_n or TOP_N,
+            cutoff=cutoff or SIMILARITY_CUTOFF,
+            search_profile=search_profile,
+        )
+
+    async def _retrieve_chunks(
+        self,
+        query: str,
+        query_embedding: np.ndarray,
+        filters: Optional[dict],
+        top_k: Optional[int],
+        top_n: Optional[int],
+        cutoff: Optional[float],
+        search_profile: Optional[str] = None,
+    ) -> list[dict[str, Any]]:
+        top_k = top_k or TOP_K
+        top_n = top_n or TOP_N
+        cutoff = cutoff or SIMILARITY_CUTOFF
 
-            top_k = top_k or TOP_K
-            top_n = top_n or TOP_N
-            cutoff = cutoff or SIMILARITY_CUTOFF
+        forms = self._forms(query)
+        if forms:
+            with stage("retrieve"):
+                chunks, needs_rerank = await self.retrieval_service.retrieve_forms_async(
+                    self.collection_name, query_embedding, forms, top_n, cutoff, filters, search_profile
+                )
+            if chunks:
+                CANDIDATES.labels("retrieved").observe(len(chunks))
+                if needs_rerank and len(chunks) > top_n:
+                    with stage("rerank"):
+                        chunks = await self.retrieval_service.rerank_async(query, chunks, top_n)
+                CANDIDATES.labels("returned").observe(min(len(chunks), top_n))
+                return chunks[:top_n]
 
-            chunks = self.retrieval_service.retrieve(
+        with stage("retrieve"):
+            chunks = await self.retrieval_service.retrieve_async(
                 self.collection_name,
                 query_embedding,
                 top_k,
                 cutoff,
                 filters,
+                query=query,
+                profile=search_profile,
+            )
+        CANDIDATES.labels("retrieved").observe(len(chunks))
+
+        if len(chunks) > top_n:
+            with stage("rerank"):
+                chunks = await self.retrieval_service.rerank_async(query, chunks, top_n)
+        else:
+            chunks = chunks[:top_n]
+
+        CANDIDATES.labels("returned").observe(len(chunks))
+        return chunks
+
+    def _build_sources(self, chunks: list[dict[str, Any]]) -> tuple[list[Source], list[float], str]:
+        similarities = [chunk.get("score", 0.0) for chunk in chunks]
+
+        avg_similarity = np.mean(similarities) if similarities else 0.0
+        if avg_similarity >= 0.8:
+            confidence = "high"
+        elif avg_similarity >= 0.5:
+            confidence = "medium"
+        else:
+            confidence = "low"
+
+        return [chunk_source(chunk) for chunk in chunks], similarities, confidence
+
+    def _flight_key(
+        self,
+        query: str,
+        filters: Optional[dict],
+        top_k: Optional[int],
+        top_n: Optional[int],
+        cutoff: Optional[float],
+        search_profile: Optional[str],
+    ) -> tuple:
+        return (normalize_text(query).lower(), filters_key(filters), top_k, top_n, cutoff, search_profile)
+
+    async def handle_query(
+        self,
+        query: str,
+        filters: Optional[dict] = None,
+        top_k: Optional[int] = None,
+        top_n: Optional[int] = None,
+        cutoff: Optional[float] = None,
+        search_profile: Optional[str] = None,
+    ):
+        """Answer ``query``; identical concurrent queries share one pipeline run."""
+        key = self._flight_key(query, filters, top_k, top_n, cutoff, search_profile)
+        return await self.single_flight.do(
+            key, lambda: self._handle_query(query, filters, top_k, top_n, cutoff, search_profile)
+        )
+
+    async def _handle_query(
+        self,
+        query: str,
+        filters: Optional[dict],
+        top_k: Optional[int],
+        top_n: Optional[int],
+        cutoff: Optional[float],
+        search_profile: Optional[str],
+    ) -> ChatResponse:
+        try:
+            with stage("embed"):
+                query_embedding = await self.embedding_provider.get_embedding_async(query)
+            version = self.collection_versions.get(self.collection_name)
+            scope = self._answer_scope(query, filters, top_k, top_n, cutoff, search_profile)
+            cached = self.answer_cache.lookup(query_embedding, scope, version)
+            if cached is not None:
+                return cached
+
+            chunks = await self._retrieve_chunks(
+                query, query_embedding, filters, top_k, top_n, cutoff, search_profile
             )
 
             if not chunks:
-                return ChatResponse(
-                    answer_text=NO_KB_MSG,
-                    sources=[],
-                    confidence="low",
-                    query_embedding_similarity=[],
-                )
+                return self._no_kb_response()
 
-            if len(chunks) > top_n:
-                chunks = self.retrieval_service.rerank(query, chunks, top_n)
-            else:
-                chunks = chunks[:top_n]
+            return await self._answer(query, query_embedding, chunks, scope, version)
+
+        except OverloadedError:
+            raise
+        except BACKEND_ERRORS:
+            logger.warning("Answering %r without the knowledge base", query, exc_info=True)
+            return self._no_kb_response()
+        except Exception:
+            logger.exception("Query pipeline failed for %r", query)
+            raise
+
+    def _no_kb_response(self) -> ChatResponse:
+        return ChatResponse(
+            answer_text=NO_KB_MSG,
+            sources=[],
+            confidence="low",
+            query_embedding_similarity=[],
+        )
 
+    async def _answer(
+        self,
+        query: str,
+        query_embedding: np.ndarray,
+        chunks: list[dict[str, Any]],
+        scope: str,
+        version: int,
+        priority: str = "interactive",
+    ) -> ChatResponse:
+        with stage("prompt"):
             prompt = self.llm.build_rag_prompt(chunks, query)
-            answer_text = self.llm.generate(prompt, temperature=0.0, max_tokens=200)
-
-            sources = []
-            similarities = []
-            for chunk in chunks:
-                sources.append(
-                    {
-                        "url": chunk.get("url", ""),
-                        "title": chunk.get("title", ""),
-                        "section": chunk.get("section_heading"),
-                        "snippet": chunk.get("text", "")[:300],
-                        "char_start": chunk.get("char_start", 0),
-                        "char_end": chunk.get("char_end", 0),
-                        "score": chunk.get("score", 0.0),
-                    }
-                )
-                similarities.append(chunk.get("score", 0.0))
+        with stage("generate"):
+            answer_text = await self.llm.generate_async(
+                prompt, priority=priority, temperature=0.0, max_tokens=200
+            )
 
-            avg_similarity = np.mean(similarities) if similarities else 0.0
-            if avg_similarity >= 0.8:
-                confidence = "high"
-            elif avg_similarity >= 0.5:
-                confidence = "medium"
-            else:
-                confidence = "low"
-
-            source_models = [
-                Source(
-                    url=src["url"],
-                    title=src["title"],
-                    section=src.get("section"),
-                    snippet=src.get("snippet", "")[:300],
-                    char_start=src.get("char_start", 0),
-                    char_end=src.get("char_end", 0),
-                    score=min(max(src.get("score", 0.0), 0.0), 1.0),
+        source_models, similarities, confidence = self._build_sources(chunks)
+
+        response = ChatResponse(
+            answer_text=answer_text,
+            sources=source_models,
+            confidence=confidence,
+            query_embedding_similarity=similarities,
+        )
+        self.answer_cache.store(query_embedding, scope, response, version)
+
+        return response
+
+    async def _retrieve_batch(
+        self,
+        queries: list[str],
+        query_embeddings: list[np.ndarray],
+        filters: Optional[dict],
+        search_profile: Optional[str],
+    ) -> tuple[list[list[dict[str, Any]]], list[bool]]:
+        """Candidates for each query and whether they still need reranking."""
+        results: list[Optional[list[dict[str, Any]]]] = [None] * len(queries)
+        needs_rerank = [True] * len(queries)
+
+        form_queries = []
+        for i, query in enumerate(queries):
+            forms = self._forms(query)
+            if forms:
+                form_queries.append((i, forms))
+        form_results = await asyncio.gather(
+            *(
+                self.retrieval_service.retrieve_forms_async(
+                    self.collection_name,
+                    query_embeddings[i],
+                    forms,
+                    TOP_N,
+                    SIMILARITY_CUTOFF,
+                    filters,
+                    search_profile,
                 )
-                for src in sources
-            ]
+                for i, forms in form_queries
+            )
+        )
+        for (i, _), (chunks, rerank) in zip(form_queries, form_results):
+            if chunks:
+                results[i], needs_rerank[i] = chunks, rerank
 
-            response = ChatResponse(
-                answer_text=answer_text,
-                sources=source_models,
-                confidence=confidence,
-                query_embedding_similarity=similarities,
+        rest = [i for i, chunks in enumerate(results) if chunks is None]
+        if rest:
+            fetched = await self.retrieval_service.retrieve_batch_async(
+                self.collection_name,
+                [query_embeddings[i] for i in rest],
+                TOP_K,
+                SIMILARITY_CUTOFF,
+                filters,
+                queries=[queries[i] for i in rest],
+                profile=search_profile,
             )
+            for i, chunks in zip(rest, fetched):
+                results[i] = chunks
 
-            return response
+        return results, needs_rerank
 
-        except Exception as e:
-            return ChatResponse(
-                answer_text=NO_KB_MSG,
-                sources=[],
-                confidence="low",
-                query_embedding_similarity=[],
+    async def handle_batch(
+        self,
+        queries: list[str],
+        filters: Optional[dict] = None,
+        search_profile: Optional[str] = None,
+    ) -> AsyncIterator[tuple[int, ChatResponse]]:
+        """Answer many queries, yielding ``(index, response)`` as each one finishes.
+
+        All queries are embedded in one ``encode`` call and searched with Qdrant
+        ``search_batch``. Reranking then runs in groups of BATCH_RERANK_GROUP
+        queries sharing cross-encoder batches, and each group's generations
+        start as soon as it is scored, so local reranking overlaps generation
+        on the Ollama host. At most BATCH_GENERATION_CONCURRENCY generations run
+        at a time. Cached answers are yielded first.
+        """
+        try:
+            query_embeddings = await self.embedding_provider.get_query_embeddings_async(queries)
+        except BACKEND_ERRORS:
+            for i in range(len(queries)):
+                yield i, self._no_kb_response()
+            return
+
+        version = self.collection_versions.get(self.collection_name)
+        scopes = [self._answer_scope(query, filters, None, None, None, search_profile) for query in queries]
+        pending = []
+        for i, query_embedding in enumerate(query_embeddings):
+            cached = self.answer_cache.lookup(query_embedding, scopes[i], version)
+            if cached is not None:
+                yield i, cached
+            else:
+                pending.append(i)
+        if not pending:
+            return
+
+        try:
+            candidates, needs_rerank = await self._retrieve_batch(
+                [queries[i] for i in pending],
+                [query_embeddings[i] for i in pending],
+                filters,
+                search_profile,
             )
+        except BACKEND_ERRORS:
+            candidates, needs_rerank = [[] for _ in pending], [False] * len(pending)
+
+        finished: asyncio.Queue = asyncio.Queue()
+        semaphore = asyncio.Semaphore(BATCH_GENERATION_CONCURRENCY)
+
+        async def answer(i: int, chunks: list[dict[str, Any]]) -> None:
+            async with semaphore:
+                try:
+                    response = await self._answer(
+                        queries[i], query_embeddings[i], chunks, scopes[i], version, priority="batch"
+                    )
+                except BACKEND_ERRORS:
+                    response = self._no_kb_response()
+            finished.put_nowait((i, response))
+
+        async def rerank_and_dispatch() -> None:
+            generations = []
+            for start in range(0, len(pending), BATCH_RERANK_GROUP):
+                group = range(start, min(start + BATCH_RERANK_GROUP, len(pending)))
+                to_rerank = [j for j in group if needs_rerank[j] and len(candidates[j]) > TOP_N]
+                if to_rerank:
+                    try:
+                        reranked = await self.retrieval_service.rerank_batch_async(
+                            [queries[pending[j]] for j in to_rerank], [candidates[j] for j in to_rerank], TOP_N
+                        )
+                    except BACKEND_ERRORS:
+                        reranked = [[] for _ in to_rerank]
+                    for j, chunks in zip(to_rerank, reranked):
+                        candidates[j] = chunks
 
+                for j in group:
+                    chunks = candidates[j][:TOP_N]
+                    if chunks:
+                        generations.append(asyncio.create_task(answer(pending[j], chunks)))
+                    else:
+                        finished.put_nowait((pending[j], self._no_kb_response()))
+            await asyncio.gather(*generations)
+
+        def surface_failure(task: asyncio.Task) -> None:
+            if not task.cancelled() and task.exception() is not None:
+                finished.put_nowait((None, task.exception()))
+
+        # Cancelling the dispatcher (client gone) also cancels its generations.
+        dispatcher = asyncio.create_task(rerank_and_dispatch())
+        dispatcher.add_done_callback(surface_failure)
+        try:
+            for _ in range(len(pending)):
+                i, response = await finished.get()
+                if i is None:
+                    logger.error("Batch query pipeline failed", exc_info=response)
+                    raise response
+                yield i, response
+        finally:
+            dispatcher.cancel()
 
+    def stream_retry_after(
+        self,
+        query: str,
+        filters: Optional[dict] = None,
+        top_k: Optional[int] = None,
+        top_n: Optional[int] = None,
+        cutoff: Optional[float] = None,
+        search_profile: Optional[str] = None,
+    ) -> Optional[int]:
+        """Retry-After hint if ``stream_query`` would be shed right now, else None.
+
+        A stream that joins one already running needs no admission; otherwise
+        this checks whether the interactive lane could still queue it. Nothing
+        is reserved; the generation takes its slot as usual.
+        """
+        key = self._flight_key(query, filters, top_k, top_n, cutoff, search_profile)
+        if self.single_flight.streaming(key):
+            return None
+        return self.llm.admission.shed_retry_after("interactive")
+
+    def stream_query(
+        self,
+        query: str,
+        filters: Optional[dict] = None,
+        top_k: Optional[int] = None,
+        top_n: Optional[int] = None,
+        cutoff: Optional[float] = None,
+        search_profile: Optional[str] = None,
+    ) -> AsyncIterator[dict[str, Any]]:
+        """Yield a ``sources`` event after retrieval, then ``token`` events, then ``done``.
+
+        Identical concurrent queries subscribe to one stream; a late subscriber
+        first receives the events it missed. Closing the generator (e.g. on
+        client disconnect) closes the upstream Ollama stream, which aborts the
+        generation, once no other subscriber is left.
+        """
+        key = self._flight_key(query, filters, top_k, top_n, cutoff, search_profile)
+        return self.single_flight.stream(
+            key, lambda: self._stream_query(query, filters, top_k, top_n, cutoff, search_profile)
+        )
+
+    async def _stream_query(
+        self,
+        query: str,
+        filters: Optional[dict],
+        top_k: Optional[int],
+        top_n: Optional[int],
+        cutoff: Optional[float],
+        search_profile: Optional[str],
+    ) -> AsyncIterator[dict[str, Any]]:
+        try:
+            with stage("embed"):
+                query_embedding = await self.embedding_provider.get_embedding_async(query)
+            version = self.collection_versions.get(self.collection_name)
+            scope = self._answer_scope(query, filters, top_k, top_n, cutoff, search_profile)
+            cached = self.answer_cache.lookup(query_embedding, scope, version)
+            if cached is None:
+                chunks = await self._retrieve_chunks(
+                    query, query_embedding, filters, top_k, top_n, cutoff, search_profile
+                )
+        except BACKEND_ERRORS:
+            logger.warning("Answering %r without the knowledge base", query, exc_info=True)
+            cached, chunks = None, []
+        except Exception:
+            logger.exception("Query pipeline failed for %r", query)
+            raise
+
+        if cached is not None:
+            yield {
+                "type": "sources",
+                "sources": [source.model_dump(mode="json") for source in cached.sources],
+                "confidence": cached.confidence,
+                "query_embedding_similarity": cached.query_embedding_similarity,
+            }
+            yield {"type": "token", "text": cached.answer_text}
+            yield {"type": "done"}
+            return
+
+        if not chunks:
+            yield {"type": "sources", "sources": [], "confidence": "low", "query_embedding_similarity": []}
+            yield {"type": "token", "text": NO_KB_MSG}
+            yield {"type": "done"}
+            return
+
+        source_models, similarities, confidence = self._build_sources(chunks)
+        yield {
+            "type": "sources",
+            "sources": [source.model_dump(mode="json") for source in source_models],
+            "confidence": confidence,
+            "query_embedding_similarity": similarities,
+        }
+
+        with stage("prompt"):
+            prompt = self.llm.build_rag_prompt(chunks, query)
+        tokens = []
+        try:
+            with stage("generate"):
+                async for token in self.llm.generate_stream_async(prompt, temperature=0.0, max_tokens=200):
+                    tokens.append(token)
+                    yield {"type": "token", "text": token}
+        except OverloadedError as e:
+            yield {"type": "error", "detail": str(e), "retry_after": e.retry_after}
+            return
+        except Exception as e:
+            yield {"type": "error", "detail": str(e)}
+            return
+
+        self.answer_cache.store(
+            query_embedding,
+            scope,
+            ChatResponse(
+                answer_text="".join(tokens).strip(),
+                sources=source_models,
+                confidence=confidence,
+                query_embedding_similarity=similarities,
+            ),
+            version,
+        )
+        yield {"type": "done"}
 
+    async def warm_answer_cache(self, questions: list[str]) -> int:
+        warmed = 0
+        for question in questions:
+            response = await self.handle_query(question)
+            if response.answer_text != NO_KB_MSG:
+                warmed += 1
+        return warmed
@@ -0,0 +1,92 @@
+import logging
+from typing import Any, Optional
+
+from helpers.rag_helpers.filters import build_filter
+from helpers.rag_helpers.metrics import CANDIDATES, stage
+from models import ScoreBreakdown, SearchRequest, SearchResponse
+from services.rag_services.retrieval_service import SIMILARITY_CUTOFF, TOP_K
+from .shared import BACKEND_ERRORS, chunk_source
+
+COLLECTION_NAME = "irs_rag_v1"
+# Upper bound on candidates fetched for paging; offset + limit beyond this returns nothing more.
+SEARCH_MAX_CANDIDATES = 100
+
+logger = logging.getLogger(__name__)
+
+
+class SearchHandler:
+    """Retrieval without generation: embed, search and optionally rerank."""
+
+    def __init__(self, embedding_service, retrieval_service):
+        self.embedding_provider = embedding_service
+        self.retrieval_service = retrieval_service
+        self.collection_name = COLLECTION_NAME
+
+    def validate_filters(self, filters: Optional[dict]) -> None:
+        """Raise ``ValueError`` if ``filters`` is not valid filter language."""
+        build_filter(filters)
+
+    async def handle_search(self, request: SearchRequest) -> SearchResponse:
+        """Search ``request.query``; a backend outage answers with no sources, like /query."""
+        try:
+            return await self._handle_search(request)
+        except BACKEND_ERRORS:
+            logger.warning("Searching %r without the knowledge base", request.query, exc_info=True)
+            return SearchResponse(
+                query=request.query,
+                sources=[],
+                offset=request.offset,
+                limit=request.limit,
+                total_candidates=0,
+                reranked=False,
+                score_breakdown=[] if request.include_scores else None,
+            )
+        except Exception:
+            logger.exception("Search pipeline failed for %r", request.query)
+            raise
+
+    async def _handle_search(self, request: SearchRequest) -> SearchResponse:
+        window = min(request.offset + request.limit, SEARCH_MAX_CANDIDATES)
+        candidates = max(TOP_K, window)
+
+        with stage("embed"):
+            query_embedding = await self.embedding_provider.get_embedding_async(request.query)
+        with stage("retrieve"):
+            chunks = await self.retrieval_service.retrieve_async(
+                self.collection_name,
+                query_embedding,
+                candidates,
+                SIMILARITY_CUTOFF,
+                request.filters,
+                query=request.query,
+                profile=request.search_profile,
+                fused_top_k=candidates,
+            )
+        total = len(chunks)
+        CANDIDATES.labels("retrieved").observe(total)
+
+        reranked = request.rerank and total > 1
+        if reranked:
+            with stage("rerank"):
+                # Every page must come from the same exhaustive ranking, so no adaptive shortcuts here.
+                chunks = await self.retrieval_service.rerank_async(request.query, chunks, window, adaptive=False)
+        page = chunks[request.offset : window]
+
+        return SearchResponse(
+            query=request.query,
+            sources=[chunk_source(chunk) for chunk in page],
+            offset=request.offset,
+            limit=request.limit,
+            total_candidates=total,
+            reranked=reranked,
+            score_breakdown=[self._breakdown(chunk) for chunk in page] if request.include_scores else None,
+            query_vector=query_embedding.tolist() if request.include_vector else None,
+        )
+
+    def _breakdown(self, chunk: dict[str, Any]) -> ScoreBreakdown:
+        return ScoreBreakdown(
+            vector_score=chunk.get("vector_score"),
+            bm25_score=chunk.get("bm25_score"),
+            rrf_score=chunk.get("rrf_score"),
+            rerank_score=chunk.get("rerank_score"),
+        )
@@ -0,0 +1,23 @@
+from typing import Any
+
+import httpx
+from qdrant_client.http.exceptions import ResponseHandlingException, UnexpectedResponse
+
+from models import Source
+
+# Failures of Qdrant, Ollama or the inference sidecar (RuntimeError) get a degraded but
+# well-formed response; anything else is a bug and propagates.
+BACKEND_ERRORS = (httpx.HTTPError, UnexpectedResponse, ResponseHandlingException, OSError, RuntimeError)
+
+
+def chunk_source(chunk: dict[str, Any]) -> Source:
+    """The ``Source`` a retrieved chunk is shown as, with its score clamped to [0, 1]."""
+    return Source(
+        url=chunk.get("url", ""),
+        title=chunk.get("title", ""),
+        section=chunk.get("section_heading"),
+        snippet=chunk.get("text", "")[:300],
+        char_start=chunk.get("char_start", 0),
+        char_end=chunk.get("char_end", 0),
+        score=min(max(chunk.get("score", 0.0), 0.0), 1.0),
+    )
@@ -1,13 +1,14 @@
 from datetime import datetime
-from models import AdminStats
+from models import AdminStats, MigrationRequest
 
 COLLECTION_NAME = "irs_rag_v1"
 EMBEDDING_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
 
 
 class StatsHandler:
-    def __init__(self, qdrant_service):
+    def __init__(self, qdrant_service, llm_service=None):
         self.qdrant_service = qdrant_service
+        self.llm_service = llm_service
         self.collection_name = COLLECTION_NAME
 
     def handle_stats(self) -> AdminStats:
@@ -20,6 +21,17 @@ class StatsHandler:
             last_updated=datetime.utcnow(),
             embedding_model=embedding_model,
             vector_size=info.get("vector_size", 0),
+            quantization=info.get("quantization"),
+            llm_queue=self.llm_service.queue_stats() if self.llm_service else None,
         )
         return stats
 
+    def handle_migration(self, request: MigrationRequest) -> dict:
+        info = self.qdrant_service.migrate_quantization(self.collection_name, request.quantization)
+        return {
+            "collection_name": self.collection_name,
+            "quantization": info["quantization"],
+            "vectors_on_disk": info["vectors_on_disk"],
+            "status": str(info["status"]),
+        }
+
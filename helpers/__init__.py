@@ -1,3 +1,5 @@
+import importlib
+
 from .rag_helpers import (
     extract_title,
     extract_breadcrumbs,
@@ -7,12 +9,43 @@ from .rag_helpers import (
     extract_pdf_text,
     chunk_page,
     WebCrawler,
+    AsyncWebCrawler,
     SitemapFetcher,
     HtmlParser,
     PdfParser,
+    parse_page,
     StorageManager,
+    ChunkStore,
+    EmbeddingCache,
+    AnswerCache,
+    CollectionVersions,
+    MicroBatcher,
+    SingleFlight,
+    Stage,
+    StagedPipeline,
+    AdmissionQueue,
+    OverloadedError,
+    RerankEngine,
+    RerankCascade,
+    BM25Index,
+    FormIndex,
+    build_filter,
+    StatsCollector,
+    ServerTimingMiddleware,
+    SidecarClient,
+    InferenceServer,
 )
 
+# Resolved lazily by rag_helpers; see its _LAZY_EXPORTS.
+_LAZY_EXPORTS = {"load_embedding_model", "load_reranker"}
+
+
+def __getattr__(name: str):
+    if name in _LAZY_EXPORTS:
+        return getattr(importlib.import_module(".rag_helpers", __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
 __all__ = [
     "extract_title",
     "extract_breadcrumbs",
@@ -22,8 +55,31 @@ __all__ = [
     "extract_pdf_text",
     "chunk_page",
     "WebCrawler",
+    "AsyncWebCrawler",
     "SitemapFetcher",
     "HtmlParser",
     "PdfParser",
+    "parse_page",
     "StorageManager",
+    "ChunkStore",
+    "EmbeddingCache",
+    "AnswerCache",
+    "CollectionVersions",
+    "MicroBatcher",
+    "SingleFlight",
+    "Stage",
+    "StagedPipeline",
+    "AdmissionQueue",
+    "OverloadedError",
+    "RerankEngine",
+    "RerankCascade",
+    "load_embedding_model",
+    "load_reranker",
+    "BM25Index",
+    "FormIndex",
+    "build_filter",
+    "StatsCollector",
+    "ServerTimingMiddleware",
+    "SidecarClient",
+    "InferenceServer",
 ]
@@ -1,8 +1,33 @@
+import importlib
+
 from .extractors import extract_title, extract_breadcrumbs, extract_headings, extract_faq_pairs, extract_tables, extract_pdf_text
 from .chunkers import chunk_page
-from .crawlers import WebCrawler, SitemapFetcher
-from .parsers import HtmlParser, PdfParser
-from .storage import StorageManager
+from .crawlers import WebCrawler, AsyncWebCrawler, SitemapFetcher
+from .parsers import HtmlParser, PdfParser, parse_page
+from .storage import StorageManager, ChunkStore
+from .caches import EmbeddingCache, AnswerCache, CollectionVersions
+from .batching import MicroBatcher, SingleFlight
+from .pipeline import Stage, StagedPipeline
+from .admission import AdmissionQueue, OverloadedError
+from .rerankers import RerankEngine, RerankCascade
+from .lexical import BM25Index, FormIndex
+from .filters import build_filter
+from .metrics import StatsCollector, ServerTimingMiddleware
+from .sidecar import SidecarClient, InferenceServer
+
+# These pull in torch and transformers, so they are imported on first access; processes
+# that only crawl, ingest or talk to Qdrant never load the ML stack.
+_LAZY_EXPORTS = {
+    "load_embedding_model": ".inference",
+    "load_reranker": ".inference",
+}
+
+
+def __getattr__(name: str):
+    if name in _LAZY_EXPORTS:
+        return getattr(importlib.import_module(_LAZY_EXPORTS[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 __all__ = [
     "extract_title",
@@ -13,8 +38,31 @@ __all__ = [
     "extract_pdf_text",
     "chunk_page",
     "WebCrawler",
+    "AsyncWebCrawler",
     "SitemapFetcher",
     "HtmlParser",
     "PdfParser",
+    "parse_page",
     "StorageManager",
+    "ChunkStore",
+    "EmbeddingCache",
+    "AnswerCache",
+    "CollectionVersions",
+    "MicroBatcher",
+    "SingleFlight",
+    "Stage",
+    "StagedPipeline",
+    "AdmissionQueue",
+    "OverloadedError",
+    "RerankEngine",
+    "RerankCascade",
+    "load_embedding_model",
+    "load_reranker",
+    "BM25Index",
+    "FormIndex",
+    "build_filter",
+    "StatsCollector",
+    "ServerTimingMiddleware",
+    "SidecarClient",
+    "InferenceServer",
 ]
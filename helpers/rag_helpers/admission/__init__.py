@@ -0,0 +1,3 @@
+from .admission_queue import AdmissionQueue, Lane, OverloadedError
+
+__all__ = ["AdmissionQueue", "Lane", "OverloadedError"]
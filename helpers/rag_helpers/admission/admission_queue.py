@@ -0,0 +1,163 @@
+import asyncio
+import heapq
+import itertools
+import math
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import AsyncIterator, Optional
+
+DEFAULT_MAX_IN_FLIGHT = 4
+WAIT_SAMPLES = 1024
+SERVICE_TIME_ALPHA = 0.2
+INITIAL_SERVICE_TIME_S = 5.0
+
+
+@dataclass(frozen=True)
+class Lane:
+    """Admission lane; lower ``priority`` values are served first."""
+
+    priority: int
+    max_queued: int
+    max_wait_s: Optional[float]
+
+
+DEFAULT_LANES = {
+    "interactive": Lane(priority=0, max_queued=32, max_wait_s=20.0),
+    "batch": Lane(priority=1, max_queued=256, max_wait_s=None),
+}
+
+
+class OverloadedError(Exception):
+    """Raised when a request is rejected instead of queued; ``retry_after`` is in seconds."""
+
+    def __init__(self, message: str, retry_after: int):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class AdmissionQueue:
+    """Bounds concurrent work and queues the rest by priority lane.
+
+    ``slot(lane)`` admits immediately while fewer than ``max_in_flight``
+    holders are active and nobody is waiting; otherwise the caller waits in a
+    priority queue, so interactive requests overtake queued batch work. A lane
+    that already has ``max_queued`` waiters rejects with ``OverloadedError``
+    rather than letting requests pile up behind a slow backend, and so does a
+    wait longer than the lane's ``max_wait_s``. ``Retry-After`` hints come from
+    a moving average of how long a slot is held.
+    """
+
+    def __init__(self, max_in_flight: int = DEFAULT_MAX_IN_FLIGHT, lanes: Optional[dict[str, Lane]] = None):
+        self.max_in_flight = max_in_flight
+        self.lanes = lanes or DEFAULT_LANES
+        self._in_flight = 0
+        self._waiters: list[tuple[int, int, asyncio.Future]] = []
+        self._queued = {name: 0 for name in self.lanes}
+        self._seq = itertools.count()
+        self._service_time = INITIAL_SERVICE_TIME_S
+        self._waits = {name: deque(maxlen=WAIT_SAMPLES) for name in self.lanes}
+        self.admitted = {name: 0 for name in self.lanes}
+        self.rejected = {name: 0 for name in self.lanes}
+        self.timed_out = {name: 0 for name in self.lanes}
+
+    @asynccontextmanager
+    async def slot(self, lane: str = "interactive") -> AsyncIterator[None]:
+        await self._acquire(lane)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            held = time.perf_counter() - start
+            self._service_time += SERVICE_TIME_ALPHA * (held - self._service_time)
+            self._release()
+
+    def shed_retry_after(self, lane: str = "interactive") -> Optional[int]:
+        """Retry-After hint if ``slot(lane)`` would be rejected right now, else None.
+
+        Takes no slot, so callers can refuse early without holding capacity.
+        """
+        if self._in_flight < self.max_in_flight and not self._waiters:
+            return None
+        if self._queued[lane] < self.lanes[lane].max_queued:
+            return None
+        return self.retry_after()
+
+    def retry_after(self) -> int:
+        """Seconds until the current queue would drain at the observed service time."""
+        rounds = (len(self._waiters) + self._in_flight) / self.max_in_flight
+        return max(1, math.ceil(rounds * self._service_time))
+
+    async def _acquire(self, lane: str) -> None:
+        if lane not in self.lanes:
+            raise ValueError(f"Unknown admission lane: {lane}")
+        config = self.lanes[lane]
+
+        if self._in_flight < self.max_in_flight and not self._waiters:
+            self._in_flight += 1
+            self._admit(lane, 0.0)
+            return
+        if self._queued[lane] >= config.max_queued:
+            self.rejected[lane] += 1
+            raise OverloadedError(f"{lane} queue is full", self.retry_after())
+
+        future = asyncio.get_running_loop().create_future()
+        entry = (config.priority, next(self._seq), future)
+        heapq.heappush(self._waiters, entry)
+        self._queued[lane] += 1
+        start = time.perf_counter()
+        try:
+            await asyncio.wait_for(asyncio.shield(future), config.max_wait_s)
+        except asyncio.TimeoutError:
+            self._abandon(entry, lane)
+            self.timed_out[lane] += 1
+            raise OverloadedError(f"Timed out waiting in the {lane} queue", self.retry_after())
+        except asyncio.CancelledError:
+            self._abandon(entry, lane)
+            raise
+        self._queued[lane] -= 1
+        self._admit(lane, time.perf_counter() - start)
+
+    def _admit(self, lane: str, waited: float) -> None:
+        self._waits[lane].append(waited)
+        self.admitted[lane] += 1
+
+    def _abandon(self, entry: tuple[int, int, asyncio.Future], lane: str) -> None:
+        self._queued[lane] -= 1
+        future = entry[2]
+        if future.done() and not future.cancelled():
+            # The slot was handed over just as we gave up; pass it on.
+            self._release()
+            return
+        future.cancel()
+        self._waiters.remove(entry)
+        heapq.heapify(self._waiters)
+
+    def _release(self) -> None:
+        while self._waiters:
+            _, _, future = heapq.heappop(self._waiters)
+            if not future.done():
+                # The slot moves to the waiter, so in-flight stays the same.
+                future.set_result(None)
+                return
+        self._in_flight -= 1
+
+    def stats(self) -> dict:
+        waits = {}
+        for lane, samples in self._waits.items():
+            ordered = sorted(samples)
+            waits[lane] = {
+                "p50_ms": ordered[len(ordered) // 2] * 1000 if ordered else 0.0,
+                "p95_ms": ordered[int(len(ordered) * 0.95)] * 1000 if ordered else 0.0,
+            }
+        return {
+            "max_in_flight": self.max_in_flight,
+            "in_flight": self._in_flight,
+            "queued": dict(self._queued),
+            "admitted": dict(self.admitted),
+            "rejected": dict(self.rejected),
+            "timed_out": dict(self.timed_out),
+            "wait": waits,
+            "service_time_s": self._service_time,
+        }
@@ -0,0 +1,4 @@
+from .micro_batcher import MicroBatcher
+from .single_flight import SingleFlight
+
+__all__ = ["MicroBatcher", "SingleFlight"]
@@ -0,0 +1,109 @@
+import asyncio
+from typing import Any, AsyncIterator, Awaitable, Callable, Hashable, Optional
+
+
+class _Broadcast:
+    """Events of one producer stream, replayed to every subscriber."""
+
+    def __init__(self, source: AsyncIterator[Any]):
+        self.source = source
+        self.events: list[Any] = []
+        self.done = False
+        self.error: Optional[BaseException] = None
+        self.subscribers = 0
+        self.changed = asyncio.Condition()
+        self.task: Optional[asyncio.Task] = None
+
+    async def pump(self) -> None:
+        try:
+            async for event in self.source:
+                async with self.changed:
+                    self.events.append(event)
+                    self.changed.notify_all()
+        except Exception as e:
+            self.error = e
+        finally:
+            # Closes the producer on cancellation too, which aborts its upstream request.
+            await self.source.aclose()
+            self.done = True
+            async with self.changed:
+                self.changed.notify_all()
+
+
+class SingleFlight:
+    """Coalesces concurrent calls that share a key into one execution.
+
+    ``do`` runs ``fn`` once per key at a time; callers arriving while it runs
+    await the same result (or exception). ``stream`` does the same for async
+    generators: the first caller's stream is recorded and every subscriber
+    replays it from the start and then follows it live. A key is forgotten as
+    soon as its execution finishes, so this only merges overlapping requests
+    and never serves stale results. The shared work is shielded from any one
+    caller's cancellation; a stream is cancelled once all its subscribers
+    have gone.
+    """
+
+    def __init__(self):
+        self._calls: dict[Hashable, asyncio.Task] = {}
+        self._streams: dict[Hashable, _Broadcast] = {}
+        self.executions = 0
+        self.coalesced = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        task = self._calls.get(key)
+        if task is None:
+            task = asyncio.get_running_loop().create_task(fn())
+            self._calls[key] = task
+            task.add_done_callback(lambda _: self._forget(self._calls, key, task))
+            self.executions += 1
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(task)
+
+    async def stream(self, key: Hashable, fn: Callable[[], AsyncIterator[Any]]) -> AsyncIterator[Any]:
+        broadcast = self._streams.get(key)
+        if broadcast is None:
+            broadcast = _Broadcast(fn())
+            broadcast.task = asyncio.get_running_loop().create_task(broadcast.pump())
+            self._streams[key] = broadcast
+            broadcast.task.add_done_callback(lambda _: self._forget(self._streams, key, broadcast))
+            self.executions += 1
+        else:
+            self.coalesced += 1
+
+        broadcast.subscribers += 1
+        position = 0
+        try:
+            while True:
+                async with broadcast.changed:
+                    while position == len(broadcast.events) and not broadcast.done:
+                        await broadcast.changed.wait()
+                    pending = broadcast.events[position:]
+                    finished = broadcast.done
+                for event in pending:
+                    yield event
+                position += len(pending)
+                if finished and position == len(broadcast.events):
+                    break
+            if broadcast.error is not None:
+                raise broadcast.error
+        finally:
+            broadcast.subscribers -= 1
+            if broadcast.subscribers == 0 and not broadcast.done:
+                self._forget(self._streams, key, broadcast)
+                broadcast.task.cancel()
+
+    def streaming(self, key: Hashable) -> bool:
+        """Whether ``stream(key, ...)`` would join a stream that is already running."""
+        return key in self._streams
+
+    def _forget(self, flights: dict, key: Hashable, flight: Any) -> None:
+        if flights.get(key) is flight:
+            del flights[key]
+
+    def stats(self) -> dict:
+        return {
+            "in_flight": len(self._calls) + len(self._streams),
+            "executions": self.executions,
+            "coalesced": self.coalesced,
+        }
@@ -0,0 +1,5 @@
+from .embedding_cache import EmbeddingCache
+from .answer_cache import AnswerCache, answer_scope, filters_key
+from .collection_versions import CollectionVersions
+
+__all__ = ["EmbeddingCache", "AnswerCache", "CollectionVersions", "answer_scope", "filters_key"]
@@ -0,0 +1,136 @@
+import threading
+import time
+from typing import Any, Iterable, Optional
+
+import numpy as np
+import orjson
+
+DEFAULT_THRESHOLD = 0.95
+DEFAULT_MAX_SIZE = 2000
+DEFAULT_TTL_SECONDS = 24 * 3600
+
+
+def filters_key(filters: Optional[dict]) -> str:
+    if not filters:
+        return ""
+    return orjson.dumps(filters, option=orjson.OPT_SORT_KEYS).decode("utf-8")
+
+
+def answer_scope(filters: Optional[dict], forms: Iterable[str] = (), **params: Any) -> str:
+    """Exact-match part of an answer's key: filters, the form numbers asked about and
+    every request parameter that changes the answer (top_k, cutoff, search profile...)."""
+    scope = {"filters": filters or {}, "forms": sorted(set(forms)), "params": params}
+    return orjson.dumps(scope, option=orjson.OPT_SORT_KEYS).decode("utf-8")
+
+
+class AnswerCache:
+    """Semantic cache of generated answers keyed by query vector and scope.
+
+    A lookup hits when a cached query vector has cosine similarity of at least
+    ``threshold`` with the new one and its scope (see ``answer_scope``) is
+    identical, so near-identical questions about different forms or with
+    different retrieval parameters never share an answer. Vectors live
+    in a fixed-size matrix so a lookup is one matrix-vector product. The whole
+    cache is dropped when the collection version it was built against changes.
+    """
+
+    def __init__(
+        self,
+        threshold: float = DEFAULT_THRESHOLD,
+        max_size: int = DEFAULT_MAX_SIZE,
+        ttl_seconds: float = DEFAULT_TTL_SECONDS,
+    ):
+        self.threshold = threshold
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self._lock = threading.Lock()
+        self._version: Optional[int] = None
+        self._vectors: Optional[np.ndarray] = None
+        self._valid = np.zeros(max_size, dtype=bool)
+        self._created = np.zeros(max_size, dtype=np.float64)
+        self._last_used = np.zeros(max_size, dtype=np.float64)
+        self._scopes: list[str] = [""] * max_size
+        self._values: list[Any] = [None] * max_size
+
+    def _normalize(self, vector: np.ndarray) -> np.ndarray:
+        vector = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _check_version(self, version: int) -> None:
+        if self._version != version:
+            if self._version is not None and self._valid.any():
+                self.invalidations += 1
+            self._valid[:] = False
+            self._values = [None] * self.max_size
+            self._version = version
+
+    def lookup(self, vector: np.ndarray, scope: str, version: int) -> Optional[Any]:
+        query = self._normalize(vector)
+        now = time.time()
+
+        with self._lock:
+            self._check_version(version)
+            if self._vectors is None or not self._valid.any():
+                self.misses += 1
+                return None
+
+            expired = self._valid & (now - self._created > self.ttl_seconds)
+            self._valid[expired] = False
+
+            candidates = np.flatnonzero(self._valid)
+            candidates = [i for i in candidates if self._scopes[i] == scope]
+            if not candidates:
+                self.misses += 1
+                return None
+
+            sims = self._vectors[candidates] @ query
+            best = int(np.argmax(sims))
+            if sims[best] < self.threshold:
+                self.misses += 1
+                return None
+
+            slot = candidates[best]
+            self._last_used[slot] = now
+            self.hits += 1
+            return self._values[slot]
+
+    def store(self, vector: np.ndarray, scope: str, value: Any, version: int) -> None:
+        query = self._normalize(vector)
+        now = time.time()
+
+        with self._lock:
+            self._check_version(version)
+            if self._vectors is None:
+                self._vectors = np.zeros((self.max_size, query.shape[0]), dtype=np.float32)
+
+            free = np.flatnonzero(~self._valid)
+            if len(free):
+                slot = int(free[0])
+            else:
+                slot = int(np.argmin(self._last_used))
+
+            self._vectors[slot] = query
+            self._valid[slot] = True
+            self._created[slot] = now
+            self._last_used[slot] = now
+            self._scopes[slot] = scope
+            self._values[slot] = value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._valid[:] = False
+            self._values = [None] * self.max_size
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "invalidations": self.invalidations,
+            "size": int(self._valid.sum()),
+        }
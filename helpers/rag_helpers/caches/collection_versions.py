@@ -0,0 +1,34 @@
+import os
+import time
+from pathlib import Path
+
+DEFAULT_VERSIONS_DIR = "data/cache/versions"
+
+
+class CollectionVersions:
+    """File-backed write counters for Qdrant collections.
+
+    Ingestion bumps a collection's version after every write; readers compare
+    versions to invalidate derived caches. The version is the marker file's
+    mtime, so checking it costs one ``stat`` and works across processes.
+    """
+
+    def __init__(self, base_dir: str = DEFAULT_VERSIONS_DIR):
+        self.base_dir = Path(base_dir)
+        self.base_dir.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, collection: str) -> Path:
+        return self.base_dir / f"{collection}.version"
+
+    def bump(self, collection: str) -> int:
+        path = self._path(collection)
+        now_ns = time.time_ns()
+        path.write_text(str(now_ns))
+        os.utime(path, ns=(now_ns, now_ns))
+        return now_ns
+
+    def get(self, collection: str) -> int:
+        try:
+            return os.stat(self._path(collection)).st_mtime_ns
+        except FileNotFoundError:
+            return 0
@@ -0,0 +1,142 @@
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+from utils import compute_content_hash, normalize_text
+
+DEFAULT_MAX_SIZE = 10000
+DEFAULT_TTL_SECONDS = 7 * 24 * 3600
+PURGE_EVERY_WRITES = 1000
+
+
+def normalize_query(text: str) -> str:
+    return normalize_text(text).lower()
+
+
+class EmbeddingCache:
+    """Query-embedding cache: in-process LRU backed by an optional sqlite file.
+
+    Keys combine ``model_name`` with the normalized query text, so switching
+    models never serves stale vectors. The sqlite file runs in WAL mode so all
+    uvicorn workers on a host can share it, and it survives restarts.
+    """
+
+    def __init__(
+        self,
+        model_name: str,
+        max_size: int = DEFAULT_MAX_SIZE,
+        ttl_seconds: float = DEFAULT_TTL_SECONDS,
+        db_path: Optional[str] = None,
+    ):
+        self.model_name = model_name
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.db_path = db_path
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[str, tuple[float, np.ndarray]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._writes = 0
+        self._db = self._open_db(db_path) if db_path else None
+
+    def _open_db(self, db_path: str) -> sqlite3.Connection:
+        Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        db = sqlite3.connect(db_path, timeout=5.0, check_same_thread=False, isolation_level=None)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("PRAGMA synchronous=NORMAL")
+        db.execute(
+            "CREATE TABLE IF NOT EXISTS query_embeddings ("
+            "key TEXT PRIMARY KEY, model_name TEXT NOT NULL, vector BLOB NOT NULL, created_at REAL NOT NULL)"
+        )
+        return db
+
+    def _key(self, text: str) -> str:
+        return compute_content_hash(f"{self.model_name}\n{normalize_query(text)}")
+
+    def get(self, text: str, include_disk: bool = True) -> Optional[np.ndarray]:
+        key = self._key(text)
+        now = time.time()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                created_at, vector = entry
+                if now - created_at <= self.ttl_seconds:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return vector
+                del self._entries[key]
+
+            if not include_disk or self._db is None:
+                if include_disk:
+                    self.misses += 1
+                return None
+
+            try:
+                row = self._db.execute(
+                    "SELECT vector, created_at FROM query_embeddings WHERE key = ? AND model_name = ?",
+                    (key, self.model_name),
+                ).fetchone()
+            except sqlite3.Error:
+                row = None
+
+            if row is None or now - row[1] > self.ttl_seconds:
+                self.misses += 1
+                return None
+
+            vector = np.frombuffer(row[0], dtype=np.float32)
+            self._remember(key, row[1], vector)
+            self.hits += 1
+            self.disk_hits += 1
+            return vector
+
+    def put(self, text: str, vector: np.ndarray) -> None:
+        key = self._key(text)
+        now = time.time()
+        vector = np.array(vector, dtype=np.float32, copy=True)
+
+        with self._lock:
+            self._remember(key, now, vector)
+            if self._db is None:
+                return
+
+            try:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO query_embeddings (key, model_name, vector, created_at) VALUES (?, ?, ?, ?)",
+                    (key, self.model_name, vector.tobytes(), now),
+                )
+                self._writes += 1
+                if self._writes % PURGE_EVERY_WRITES == 0:
+                    self._db.execute(
+                        "DELETE FROM query_embeddings WHERE created_at < ?", (now - self.ttl_seconds,)
+                    )
+            except sqlite3.Error:
+                pass
+
+    def _remember(self, key: str, created_at: float, vector: np.ndarray) -> None:
+        vector.setflags(write=False)
+        self._entries[key] = (created_at, vector)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "size": len(self._entries),
+        }
+
+    def close(self) -> None:
+        if self._db is not None:
+            self._db.close()
+            self._db = None
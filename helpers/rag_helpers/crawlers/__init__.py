@@ -1,4 +1,5 @@
 from .web_crawler import WebCrawler
+from .async_web_crawler import AsyncWebCrawler
 from .sitemap_fetcher import SitemapFetcher
 
-__all__ = ["WebCrawler", "SitemapFetcher"]
+__all__ = ["WebCrawler", "AsyncWebCrawler", "SitemapFetcher"]
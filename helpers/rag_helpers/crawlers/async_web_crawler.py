@@ -0,0 +1,139 @@
+from typing import Callable, Optional
+
+import httpx
+from tenacity import retry, retry_if_exception, stop_after_attempt, wait_exponential
+
+from .crawler_helpers import (
+    AsyncRateLimiter,
+    DisallowedRedirect,
+    build_crawled_page,
+    can_fetch_url,
+    parse_robots_response,
+)
+from models import CrawledPage
+from utils import is_irs_domain, normalize_url
+
+# Connections kept to the site; with HTTP/2 one of them multiplexes every in-flight request.
+MAX_CONNECTIONS = 4
+KEEPALIVE_EXPIRY_S = 30.0
+REQUEST_TIMEOUT_S = 30.0
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+
+def _is_retryable(error: BaseException) -> bool:
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code in RETRYABLE_STATUS
+    return isinstance(error, httpx.TransportError)
+
+
+class AsyncWebCrawler:
+    """Asyncio counterpart of WebCrawler sharing one pooled ``httpx.AsyncClient``.
+
+    Requests go over HTTP/2 where the server negotiates it and over
+    keep-alive HTTP/1.1 otherwise. The rate limiter spaces request starts
+    regardless of how many fetches are awaited at once, so callers can run
+    parsing and embedding at whatever concurrency they like without
+    changing the politeness rate. ``allowed_domain`` defaults to
+    ``is_irs_domain``. Redirects are followed only to URLs that pass the same
+    domain and robots.txt checks as the URL that was asked for.
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        rate_limit_rps: float = 0.5,
+        user_agent: str = "IRS-RAG-Bot/1.0",
+        max_connections: int = MAX_CONNECTIONS,
+        http2: bool = True,
+        allowed_domain: Callable[[str], bool] = is_irs_domain,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        self.base_url = base_url
+        self.rate_limit_rps = rate_limit_rps
+        self.user_agent = user_agent
+        self.allowed_domain = allowed_domain
+        self.rate_limiter = AsyncRateLimiter(rate_limit_rps)
+        self.robots_parser = None
+        self.seen_urls = set()
+        self.requests = 0
+        self.failures = 0
+        self.blocked_redirects = 0
+        self.client = httpx.AsyncClient(
+            timeout=REQUEST_TIMEOUT_S,
+            follow_redirects=True,
+            http2=http2,
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections,
+                keepalive_expiry=KEEPALIVE_EXPIRY_S,
+            ),
+            headers={"User-Agent": user_agent},
+            event_hooks={"request": [self._check_request]},
+            transport=transport,
+        )
+
+    async def _check_request(self, request: httpx.Request) -> None:
+        # Runs for every hop of a redirect chain, so an off-limits target is never requested.
+        url = str(request.url)
+        if not self.allowed_domain(url) or not can_fetch_url(self.robots_parser, self.user_agent, url):
+            self.blocked_redirects += 1
+            raise DisallowedRedirect(url)
+
+    async def load_robots_txt(self) -> None:
+        robots_url = f"{self.base_url.rstrip('/')}/robots.txt"
+        try:
+            response = await self._get(robots_url)
+        except httpx.HTTPStatusError as e:
+            # Still 429/5xx after the retries; parse_robots_response decides what that allows.
+            response = e.response
+        except Exception:
+            self.robots_parser = None
+            return
+        self.robots_parser = parse_robots_response(robots_url, response.status_code, response.text)
+
+    @retry(
+        stop=stop_after_attempt(3),
+        wait=wait_exponential(multiplier=1, min=2, max=10),
+        retry=retry_if_exception(_is_retryable),
+        reraise=True,
+    )
+    async def _get(self, url: str) -> httpx.Response:
+        await self.rate_limiter.wait()
+        self.requests += 1
+        response = await self.client.get(url)
+        if response.status_code in RETRYABLE_STATUS:
+            response.raise_for_status()
+        return response
+
+    async def fetch(self, url: str) -> Optional[CrawledPage]:
+        url = normalize_url(url, self.base_url)
+
+        if url in self.seen_urls:
+            return None
+
+        if not can_fetch_url(self.robots_parser, self.user_agent, url):
+            return None
+
+        if not self.allowed_domain(url):
+            return None
+
+        # Claimed before the request so concurrent fetches of one URL go out once.
+        self.seen_urls.add(url)
+        try:
+            response = await self._get(url)
+            response.raise_for_status()
+            return build_crawled_page(url, response)
+        except Exception:
+            self.failures += 1
+            return None
+
+    def stats(self) -> dict:
+        return {
+            "requests": self.requests,
+            "failures": self.failures,
+            "blocked_redirects": self.blocked_redirects,
+            "seen_urls": len(self.seen_urls),
+        }
+
+    async def aclose(self) -> None:
+        await self.client.aclose()
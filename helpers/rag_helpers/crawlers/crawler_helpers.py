@@ -1,7 +1,17 @@
+import asyncio
 import time
+from datetime import datetime
 from typing import Optional
 from urllib.robotparser import RobotFileParser
 
+import httpx
+
+from models import ContentType, CrawledPage
+
+
+class DisallowedRedirect(Exception):
+    """A redirect pointed outside the allowed domain or at a path robots.txt disallows."""
+
 
 def check_robots_txt(base_url: str) -> Optional[RobotFileParser]:
     try:
@@ -14,6 +24,24 @@ def check_robots_txt(base_url: str) -> Optional[RobotFileParser]:
         return None
 
 
+def parse_robots_response(robots_url: str, status_code: int, text: str) -> RobotFileParser:
+    """RobotFileParser for an already fetched robots.txt, with RobotFileParser.read's status rules.
+
+    401 and 403 disallow everything and other 4xx allow everything. ``read``
+    leaves a parser it got a 5xx for unchecked, and ``can_fetch`` refuses
+    everything on such a parser, so 5xx disallows everything too.
+    """
+    parser = RobotFileParser()
+    parser.set_url(robots_url)
+    if status_code in (401, 403) or status_code >= 500:
+        parser.disallow_all = True
+    elif status_code >= 400:
+        parser.allow_all = True
+    else:
+        parser.parse(text.splitlines())
+    return parser
+
+
 def can_fetch_url(robots_parser: Optional[RobotFileParser], user_agent: str, url: str) -> bool:
     if robots_parser is None:
         return True
@@ -29,3 +57,49 @@ def apply_rate_limit(last_request_time: float, rate_limit_rps: float) -> float:
     if elapsed < min_interval:
         time.sleep(min_interval - elapsed)
     return time.time()
+
+
+class AsyncRateLimiter:
+    """Starts requests at least ``1 / rate_limit_rps`` apart however many coroutines wait.
+
+    Each caller reserves the next free slot and sleeps until it, so the
+    politeness rate holds independently of how many fetches run at once.
+    """
+
+    def __init__(self, rate_limit_rps: float):
+        self.interval = 1.0 / rate_limit_rps
+        self._next_slot = 0.0
+
+    async def wait(self) -> None:
+        now = asyncio.get_running_loop().time()
+        slot = max(now, self._next_slot)
+        self._next_slot = slot + self.interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+
+def build_crawled_page(url: str, response: httpx.Response) -> CrawledPage:
+    content_type = ContentType.HTML
+    content_type_header = response.headers.get("content-type", "").lower()
+    if "application/pdf" in content_type_header or url.lower().endswith(".pdf"):
+        content_type = ContentType.PDF
+
+    last_modified = None
+    if "last-modified" in response.headers:
+        try:
+            last_modified = datetime.strptime(response.headers["last-modified"], "%a, %d %b %Y %H:%M:%S %Z")
+        except Exception:
+            pass
+
+    return CrawledPage(
+        url=url,
+        title=url.split("/")[-1] or "Untitled",
+        crawl_timestamp=datetime.utcnow(),
+        last_modified=last_modified,
+        content_type=content_type,
+        raw_content=response.content,
+        cleaned_text="",
+        content_hash="",
+        etag=response.headers.get("etag"),
+        status_code=response.status_code,
+    )
@@ -1,11 +1,10 @@
-from datetime import datetime
 from typing import Optional
 
 import httpx
 from tenacity import retry, stop_after_attempt, wait_exponential
 
-from .crawler_helpers import check_robots_txt, can_fetch_url, apply_rate_limit
-from models import ContentType, CrawledPage
+from .crawler_helpers import DisallowedRedirect, check_robots_txt, can_fetch_url, apply_rate_limit, build_crawled_page
+from models import CrawledPage
 from utils import is_irs_domain, normalize_url
 
 
@@ -26,8 +25,15 @@ class WebCrawler:
             timeout=30.0,
             follow_redirects=True,
             headers={"User-Agent": user_agent},
+            event_hooks={"request": [self._check_request]},
         )
 
+    def _check_request(self, request: httpx.Request) -> None:
+        # Runs for every hop of a redirect chain, so an off-limits target is never requested.
+        url = str(request.url)
+        if not is_irs_domain(url) or not can_fetch_url(self.robots_parser, self.user_agent, url):
+            raise DisallowedRedirect(url)
+
     def _check_robots_txt(self) -> None:
         self.robots_parser = check_robots_txt(self.base_url)
 
@@ -50,37 +56,9 @@ class WebCrawler:
             response = self.client.get(url)
             response.raise_for_status()
 
-            content_type = ContentType.HTML
-            content_type_header = response.headers.get("content-type", "").lower()
-            if "application/pdf" in content_type_header or url.lower().endswith(".pdf"):
-                content_type = ContentType.PDF
-
-            last_modified = None
-            if "last-modified" in response.headers:
-                try:
-                    last_modified = datetime.strptime(
-                        response.headers["last-modified"], "%a, %d %b %Y %H:%M:%S %Z"
-                    )
-                except Exception:
-                    pass
-
-            etag = response.headers.get("etag")
-            title = url.split("/")[-1] or "Untitled"
-
+            page = build_crawled_page(url, response)
             self.seen_urls.add(url)
-
-            return CrawledPage(
-                url=url,
-                title=title,
-                crawl_timestamp=datetime.utcnow(),
-                last_modified=last_modified,
-                content_type=content_type,
-                raw_content=response.content,
-                cleaned_text="",
-                content_hash="",
-                etag=etag,
-                status_code=response.status_code,
-            )
+            return page
 
         except httpx.HTTPStatusError as e:
             return None
@@ -0,0 +1,3 @@
+from .filter_builder import build_filter, PAYLOAD_INDEXES
+
+__all__ = ["build_filter", "PAYLOAD_INDEXES"]
@@ -0,0 +1,140 @@
+from datetime import datetime
+from typing import Any, Optional
+
+from qdrant_client.models import (
+    DatetimeRange,
+    FieldCondition,
+    Filter,
+    MatchAny,
+    MatchValue,
+    PayloadSchemaType,
+    Range,
+)
+
+from utils import parse_iso8601
+
+# Payload fields written by IngestionService.upsert_chunks that can be filtered on.
+PAYLOAD_INDEXES = {
+    "url": PayloadSchemaType.KEYWORD,
+    "url_prefixes": PayloadSchemaType.KEYWORD,
+    "section_heading": PayloadSchemaType.KEYWORD,
+    "content_type": PayloadSchemaType.KEYWORD,
+    "language": PayloadSchemaType.KEYWORD,
+    "embedding_model": PayloadSchemaType.KEYWORD,
+    "hash": PayloadSchemaType.KEYWORD,
+    "form_numbers": PayloadSchemaType.KEYWORD,
+    "crawl_ts": PayloadSchemaType.DATETIME,
+    "char_start": PayloadSchemaType.INTEGER,
+    "char_end": PayloadSchemaType.INTEGER,
+    "tokens": PayloadSchemaType.INTEGER,
+}
+# Prefix matches are exact matches on a companion field holding every path prefix.
+PREFIX_FIELDS = {"url": "url_prefixes"}
+RANGE_OPERATORS = ("gt", "gte", "lt", "lte")
+FIELD_OPERATORS = {"match", "any", "prefix", "not", *RANGE_OPERATORS}
+NOT_KEY = "not"
+
+
+def build_filter(filters: Optional[dict[str, Any]]) -> Optional[Filter]:
+    """Translate the ``ChatRequest.filters`` language into a Qdrant ``Filter``.
+
+    Each key is a payload field (or ``"not"``) and each value is one of:
+
+    - a scalar: exact match, ``{"content_type": "pdf"}``
+    - a list: any-of, ``{"form_numbers": ["W4", "1040"]}``
+    - an operator object combining ``match``, ``any``, ``prefix``, ``gt``,
+      ``gte``, ``lt``, ``lte`` and ``not``, e.g.
+      ``{"crawl_ts": {"gte": "2025-01-01T00:00:00Z"}}`` or
+      ``{"url": {"prefix": "https://www.irs.gov/forms-pubs"}}``
+
+    A top-level ``"not"`` negates a nested filter as a whole. All conditions
+    are ANDed. Raises ``ValueError`` on unknown fields or operators.
+    """
+    if not filters:
+        return None
+    if not isinstance(filters, dict):
+        raise ValueError("filters must be an object")
+
+    must: list[Any] = []
+    must_not: list[Any] = []
+    for key, value in filters.items():
+        if key == NOT_KEY:
+            negated = build_filter(value)
+            if negated is not None:
+                must_not.append(negated)
+            continue
+        field_must, field_must_not = _field_conditions(key, value)
+        must.extend(field_must)
+        must_not.extend(field_must_not)
+
+    if not must and not must_not:
+        return None
+    return Filter(must=must or None, must_not=must_not or None)
+
+
+def _field_conditions(key: str, value: Any) -> tuple[list[Any], list[Any]]:
+    if key not in PAYLOAD_INDEXES or key in PREFIX_FIELDS.values():
+        raise ValueError(f"Unknown filter field: {key}")
+
+    if not isinstance(value, dict):
+        return [_match(key, value)], []
+
+    unknown = set(value) - FIELD_OPERATORS
+    if unknown:
+        raise ValueError(f"Unknown filter operator for {key}: {', '.join(sorted(unknown))}")
+
+    must: list[Any] = []
+    must_not: list[Any] = []
+    if "match" in value:
+        must.append(_match(key, value["match"]))
+    if "any" in value:
+        must.append(_match(key, list(value["any"])))
+    if "prefix" in value:
+        must.append(_prefix(key, value["prefix"]))
+    bounds = {op: value[op] for op in RANGE_OPERATORS if op in value}
+    if bounds:
+        must.append(_range(key, bounds))
+    if "not" in value:
+        negated_must, negated_must_not = _field_conditions(key, value["not"])
+        if len(negated_must) == 1 and not negated_must_not:
+            must_not.append(negated_must[0])
+        else:
+            must_not.append(Filter(must=negated_must or None, must_not=negated_must_not or None))
+    return must, must_not
+
+
+def _match(key: str, value: Any) -> FieldCondition:
+    if isinstance(value, (list, tuple)):
+        if not value or not all(isinstance(v, (str, int)) and not isinstance(v, bool) for v in value):
+            raise ValueError(f"Filter any-of for {key} must be a non-empty list of strings or integers")
+        return FieldCondition(key=key, match=MatchAny(any=list(value)))
+    if not isinstance(value, (str, int, bool)):
+        raise ValueError(f"Filter value for {key} must be a string, integer or boolean")
+    return FieldCondition(key=key, match=MatchValue(value=value))
+
+
+def _prefix(key: str, prefix: Any) -> FieldCondition:
+    if key not in PREFIX_FIELDS:
+        raise ValueError(f"Prefix filters are not supported on {key}")
+    if not isinstance(prefix, str) or not prefix:
+        raise ValueError(f"Prefix filter for {key} must be a non-empty string")
+    return FieldCondition(key=PREFIX_FIELDS[key], match=MatchValue(value=prefix.rstrip("/")))
+
+
+def _range(key: str, bounds: dict[str, Any]) -> FieldCondition:
+    schema = PAYLOAD_INDEXES[key]
+    if schema == PayloadSchemaType.DATETIME:
+        parsed = {}
+        for op, bound in bounds.items():
+            moment = bound if isinstance(bound, datetime) else parse_iso8601(str(bound))
+            if moment is None:
+                raise ValueError(f"Range bound {op} for {key} must be an ISO 8601 datetime")
+            parsed[op] = moment
+        return FieldCondition(key=key, range=DatetimeRange(**parsed))
+
+    if schema != PayloadSchemaType.INTEGER:
+        raise ValueError(f"Range filters are not supported on {key}")
+    for op, bound in bounds.items():
+        if not isinstance(bound, (int, float)) or isinstance(bound, bool):
+            raise ValueError(f"Range bound {op} for {key} must be a number")
+    return FieldCondition(key=key, range=Range(**bounds))
@@ -0,0 +1,3 @@
+from .backends import INFERENCE_BACKENDS, load_embedding_model, load_reranker
+
+__all__ = ["INFERENCE_BACKENDS", "load_embedding_model", "load_reranker"]
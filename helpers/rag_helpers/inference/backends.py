@@ -0,0 +1,174 @@
+import inspect
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, Optional
+
+import numpy as np
+import torch
+from sentence_transformers import SentenceTransformer
+from transformers import AutoModelForSequenceClassification, AutoTokenizer
+
+from utils import compute_content_hash
+
+BACKEND_TORCH = "torch"
+BACKEND_TORCH_INT8 = "torch-int8"
+BACKEND_ONNX = "onnx"
+INFERENCE_BACKENDS = (BACKEND_TORCH, BACKEND_TORCH_INT8, BACKEND_ONNX)
+ONNX_EXPORT_DIR = "data/models/onnx"
+ONNX_OPSET = 17
+
+
+def _check_backend(backend: str) -> None:
+    if backend not in INFERENCE_BACKENDS:
+        raise ValueError(f"Unknown inference backend {backend!r}; expected one of {INFERENCE_BACKENDS}")
+
+
+def _quantize_int8(model: torch.nn.Module) -> torch.nn.Module:
+    return torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+def _onnx_session(model_path: Path):
+    # onnxruntime is optional; only the onnx backend needs it.
+    import onnxruntime
+
+    options = onnxruntime.SessionOptions()
+    options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+    return onnxruntime.InferenceSession(
+        str(model_path), sess_options=options, providers=["CPUExecutionProvider"]
+    )
+
+
+def _export_onnx(hf_model: torch.nn.Module, tokenizer, model_name: str, kind: str) -> Path:
+    export_dir = Path(ONNX_EXPORT_DIR) / f"{kind}-{compute_content_hash(model_name)[:16]}"
+    model_path = export_dir / "model.onnx"
+    if model_path.exists():
+        return model_path
+
+    export_dir.mkdir(parents=True, exist_ok=True)
+    sample = tokenizer(["sample query"], ["sample passage"], return_tensors="pt")
+    # Graph inputs follow forward()'s signature order, not the tokenizer's.
+    signature = inspect.signature(hf_model.forward).parameters
+    input_names = [name for name in signature if name in sample]
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+    dynamic_axes["output"] = {0: "batch", 1: "sequence"} if kind == "embedding" else {0: "batch"}
+
+    hf_model.eval()
+    with torch.no_grad():
+        torch.onnx.export(
+            hf_model,
+            ({name: sample[name] for name in input_names},),
+            str(model_path),
+            input_names=input_names,
+            output_names=["output"],
+            dynamic_axes=dynamic_axes,
+            opset_version=ONNX_OPSET,
+        )
+    return model_path
+
+
+class OnnxSentenceEncoder:
+    """ONNX Runtime stand-in for SentenceTransformer.encode (mean pooling + normalize)."""
+
+    def __init__(self, model_name: str, device: str = "cpu"):
+        st_model = SentenceTransformer(model_name, device=device)
+        self.tokenizer = st_model.tokenizer
+        self.max_seq_length = st_model.max_seq_length
+        self.normalize = any(type(module).__name__ == "Normalize" for module in st_model)
+        self.dimension = st_model.get_sentence_embedding_dimension()
+        model_path = _export_onnx(st_model[0].auto_model, self.tokenizer, model_name, "embedding")
+        self.session = _onnx_session(model_path)
+        self.input_names = {i.name for i in self.session.get_inputs()}
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.dimension
+
+    def encode(self, texts: list[str], batch_size: int = 32, **kwargs: Any) -> np.ndarray:
+        outputs = []
+        for start in range(0, len(texts), batch_size):
+            encoded = self.tokenizer(
+                texts[start : start + batch_size],
+                padding=True,
+                truncation=True,
+                max_length=self.max_seq_length,
+                return_tensors="np",
+            )
+            feeds = {k: v.astype(np.int64) for k, v in encoded.items() if k in self.input_names}
+            token_embeddings = self.session.run(None, feeds)[0]
+            mask = encoded["attention_mask"][..., None].astype(np.float32)
+            pooled = (token_embeddings * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+            if self.normalize:
+                pooled = pooled / np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+            outputs.append(pooled.astype(np.float32))
+        return np.concatenate(outputs) if outputs else np.zeros((0, self.dimension), dtype=np.float32)
+
+
+class OnnxSequenceClassifier:
+    """ONNX Runtime stand-in for a HF sequence classifier; returns ``.logits``."""
+
+    def __init__(self, model_name: str, tokenizer):
+        hf_model = AutoModelForSequenceClassification.from_pretrained(model_name)
+        model_path = _export_onnx(hf_model, tokenizer, model_name, "reranker")
+        self.session = _onnx_session(model_path)
+        self.input_names = {i.name for i in self.session.get_inputs()}
+
+    def __call__(self, **inputs: Any) -> SimpleNamespace:
+        feeds = {
+            name: tensor.cpu().numpy().astype(np.int64)
+            for name, tensor in inputs.items()
+            if name in self.input_names
+        }
+        logits = self.session.run(None, feeds)[0]
+        return SimpleNamespace(logits=torch.from_numpy(logits))
+
+    def eval(self) -> "OnnxSequenceClassifier":
+        return self
+
+    def to(self, device: str) -> "OnnxSequenceClassifier":
+        return self
+
+
+def resolve_model_path(model_name: str, model_dir: Optional[str] = None) -> str:
+    """Local copy of ``model_name`` under ``model_dir``, or the hub name if no directory is set.
+
+    ``model_dir`` may mirror the hub layout (``<dir>/<org>/<name>``) or hold
+    the model under its bare name. Raises ``FileNotFoundError`` rather than
+    falling back to the hub.
+    """
+    if model_dir is None:
+        return model_name
+    for candidate in (Path(model_dir) / model_name, Path(model_dir) / model_name.split("/")[-1]):
+        if candidate.is_dir():
+            return str(candidate)
+    raise FileNotFoundError(f"Model {model_name} not found in {model_dir}")
+
+
+def load_embedding_model(
+    model_name: str, backend: str = BACKEND_TORCH, device: str = "cpu", model_dir: Optional[str] = None
+):
+    _check_backend(backend)
+    model_name = resolve_model_path(model_name, model_dir)
+    if backend == BACKEND_ONNX:
+        return OnnxSentenceEncoder(model_name, device=device)
+
+    model = SentenceTransformer(model_name, device=device)
+    if backend == BACKEND_TORCH_INT8:
+        model = _quantize_int8(model)
+    return model
+
+
+def load_reranker(
+    model_name: str, backend: str = BACKEND_TORCH, device: str = "cpu", model_dir: Optional[str] = None
+):
+    _check_backend(backend)
+    model_name = resolve_model_path(model_name, model_dir)
+    local_files_only = model_dir is not None
+    tokenizer = AutoTokenizer.from_pretrained(model_name, local_files_only=local_files_only)
+    if backend == BACKEND_ONNX:
+        return tokenizer, OnnxSequenceClassifier(model_name, tokenizer)
+
+    model = AutoModelForSequenceClassification.from_pretrained(model_name, local_files_only=local_files_only)
+    model.to(device)
+    model.eval()
+    if backend == BACKEND_TORCH_INT8:
+        model = _quantize_int8(model)
+    return tokenizer, model
@@ -0,0 +1,4 @@
+from .bm25_index import BM25Index
+from .form_index import FormIndex, chunk_form_numbers, forms_from_url
+
+__all__ = ["BM25Index", "FormIndex", "chunk_form_numbers", "forms_from_url"]
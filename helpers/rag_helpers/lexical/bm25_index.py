@@ -0,0 +1,305 @@
+import math
+import os
+import re
+import shutil
+import threading
+import time
+import uuid
+from collections import Counter
+from pathlib import Path
+from typing import Iterable, Optional
+
+import numpy as np
+import orjson
+
+DEFAULT_INDEX_DIR = "data/lexical"
+BM25_K1 = 1.2
+BM25_B = 0.75
+FLUSH_EVERY_DOCS = 5000
+MAX_SEGMENTS = 8
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:-[a-z0-9]+)*")
+
+
+def tokenize(text: str) -> list[str]:
+    """Lowercase word tokens that keep IRS identifiers like ``w-4`` and ``1099-k`` whole.
+
+    Hyphenated tokens also emit their parts, so "1099-K" matches "1099 k".
+    """
+    tokens = []
+    for token in TOKEN_PATTERN.findall(text.lower()):
+        tokens.append(token)
+        if "-" in token:
+            tokens.extend(part for part in token.split("-") if part)
+    return tokens
+
+
+class _Segment:
+    def __init__(self, path: Path):
+        self.path = path
+        self.vocab: dict[str, list[int]] = orjson.loads((path / "vocab.json").read_bytes())
+        self.chunk_ids: list[str] = orjson.loads((path / "chunk_ids.json").read_bytes())
+        self.doc_ids = np.load(path / "doc_ids.npy", mmap_mode="r")
+        self.tfs = np.load(path / "tfs.npy", mmap_mode="r")
+        self.doc_lens = np.load(path / "doc_lens.npy", mmap_mode="r")
+        self.shadowed = np.zeros(len(self.chunk_ids), dtype=bool)
+
+    def live_postings(self) -> np.ndarray:
+        """Per posting, whether its document is the newest copy of its chunk_id."""
+        return ~self.shadowed[self.doc_ids]
+
+    def postings(self, term: str) -> Optional[tuple[np.ndarray, np.ndarray]]:
+        entry = self.vocab.get(term)
+        if entry is None:
+            return None
+        start, length = entry
+        return self.doc_ids[start : start + length], self.tfs[start : start + length]
+
+
+class BM25Index:
+    """Incremental, memory-mapped BM25 index over chunk texts.
+
+    Added chunks are buffered and written as immutable segments: a vocab of
+    ``term -> (offset, length)`` plus ``.npy`` postings arrays (uint32 doc
+    ids, uint16 term frequencies) that readers open with ``mmap_mode="r"``.
+    A segment directory is written under a temporary name and renamed, so
+    other processes only ever see complete segments. Readers pick up new
+    segments when the index directory changes. When a chunk_id appears in
+    several segments, only the newest copy is searchable.
+    """
+
+    def __init__(self, index_dir: str = DEFAULT_INDEX_DIR, flush_every: int = FLUSH_EVERY_DOCS):
+        self.index_dir = Path(index_dir)
+        self.index_dir.mkdir(parents=True, exist_ok=True)
+        self.flush_every = flush_every
+        self._pending: list[tuple[str, Counter]] = []
+        self._segments: list[_Segment] = []
+        self._dir_mtime: Optional[int] = None
+        self._lock = threading.Lock()
+        self._df: Counter = Counter()
+        self._doc_count = 0
+        self._avg_doc_len = 0.0
+
+    # Writing
+
+    def add(self, chunk_id: str, text: str) -> None:
+        with self._lock:
+            self._pending.append((chunk_id, Counter(tokenize(text))))
+            if len(self._pending) >= self.flush_every:
+                self._flush_locked()
+
+    def add_chunks(self, chunks: Iterable) -> None:
+        for chunk in chunks:
+            self.add(chunk.chunk_id, chunk.chunk_text)
+
+    def flush(self) -> None:
+        with self._lock:
+            self._flush_locked()
+            self._refresh_locked()
+            if len(self._segments) > MAX_SEGMENTS:
+                self._compact_locked()
+
+    def _flush_locked(self) -> None:
+        if not self._pending:
+            return
+        self._write_segment(self._pending)
+        self._pending = []
+
+    def _write_segment(self, documents: list[tuple[str, Counter]]) -> Path:
+        postings: dict[str, list[tuple[int, int]]] = {}
+        for doc_id, (_, counts) in enumerate(documents):
+            for term, tf in counts.items():
+                postings.setdefault(term, []).append((doc_id, min(tf, 65535)))
+
+        vocab = {}
+        doc_ids, tfs = [], []
+        for term in sorted(postings):
+            entries = postings[term]
+            vocab[term] = [len(doc_ids), len(entries)]
+            doc_ids.extend(doc_id for doc_id, _ in entries)
+            tfs.extend(tf for _, tf in entries)
+
+        tmp_path, final_path = self._segment_paths()
+        (tmp_path / "vocab.json").write_bytes(orjson.dumps(vocab))
+        (tmp_path / "chunk_ids.json").write_bytes(orjson.dumps([chunk_id for chunk_id, _ in documents]))
+        np.save(tmp_path / "doc_ids.npy", np.asarray(doc_ids, dtype=np.uint32))
+        np.save(tmp_path / "tfs.npy", np.asarray(tfs, dtype=np.uint16))
+        np.save(
+            tmp_path / "doc_lens.npy",
+            np.asarray([sum(counts.values()) for _, counts in documents], dtype=np.uint32),
+        )
+
+        os.rename(tmp_path, final_path)
+        return final_path
+
+    def _segment_paths(self) -> tuple[Path, Path]:
+        """A fresh temporary directory to write a segment into, and the name it is published under."""
+        name = f"seg-{time.time_ns():020d}-{uuid.uuid4().hex[:8]}"
+        tmp_path = self.index_dir / f".tmp-{name}"
+        tmp_path.mkdir()
+        return tmp_path, self.index_dir / name
+
+    def _compact_locked(self) -> None:
+        """Merge all segments into one, dropping shadowed copies.
+
+        Postings are copied term by term from the memory-mapped segments into
+        memory-mapped output arrays, so compaction never holds the corpus in memory.
+        """
+        segments = self._segments
+        live_docs = [~segment.shadowed for segment in segments]
+        live_postings = [segment.live_postings() for segment in segments]
+        remaps = []
+        offset = 0
+        for live in live_docs:
+            remap = np.zeros(len(live), dtype=np.uint32)
+            remap[live] = np.arange(offset, offset + int(live.sum()), dtype=np.uint32)
+            offset += int(live.sum())
+            remaps.append(remap)
+
+        tmp_path, final_path = self._segment_paths()
+        total = sum(int(live.sum()) for live in live_postings)
+        doc_ids = np.lib.format.open_memmap(tmp_path / "doc_ids.npy", mode="w+", dtype=np.uint32, shape=(total,))
+        tfs = np.lib.format.open_memmap(tmp_path / "tfs.npy", mode="w+", dtype=np.uint16, shape=(total,))
+        vocab = {}
+        position = 0
+        for term in sorted(set().union(*(segment.vocab for segment in segments))):
+            term_start = position
+            for segment, remap, live in zip(segments, remaps, live_postings):
+                entry = segment.vocab.get(term)
+                if entry is None:
+                    continue
+                start, length = entry
+                keep = live[start : start + length]
+                count = int(keep.sum())
+                doc_ids[position : position + count] = remap[segment.doc_ids[start : start + length][keep]]
+                tfs[position : position + count] = segment.tfs[start : start + length][keep]
+                position += count
+            if position > term_start:
+                vocab[term] = [term_start, position - term_start]
+        doc_ids.flush()
+        tfs.flush()
+        del doc_ids, tfs
+
+        (tmp_path / "vocab.json").write_bytes(orjson.dumps(vocab))
+        (tmp_path / "chunk_ids.json").write_bytes(
+            orjson.dumps(
+                [
+                    chunk_id
+                    for segment, live in zip(segments, live_docs)
+                    for chunk_id, keep in zip(segment.chunk_ids, live)
+                    if keep
+                ]
+            )
+        )
+        np.save(
+            tmp_path / "doc_lens.npy",
+            np.concatenate([segment.doc_lens[live] for segment, live in zip(segments, live_docs)]).astype(np.uint32),
+        )
+        os.rename(tmp_path, final_path)
+
+        old_paths = [segment.path for segment in segments]
+        self._segments = []
+        for path in old_paths:
+            shutil.rmtree(path, ignore_errors=True)
+        self._dir_mtime = None
+        self._refresh_locked()
+
+    def index_chunk_files(self, chunks_dir: str) -> int:
+        """Index every chunk in StorageManager's ``*_chunks.jsonl`` files."""
+        count = 0
+        for path in sorted(Path(chunks_dir).glob("*_chunks.jsonl")):
+            with open(path, "rb") as f:
+                for line in f:
+                    if line.strip():
+                        chunk = orjson.loads(line)
+                        self.add(chunk["chunk_id"], chunk["chunk_text"])
+                        count += 1
+        self.flush()
+        return count
+
+    # Reading
+
+    def _refresh_locked(self) -> None:
+        mtime = os.stat(self.index_dir).st_mtime_ns
+        if mtime == self._dir_mtime:
+            return
+
+        names = sorted(p.name for p in self.index_dir.iterdir() if p.name.startswith("seg-"))
+        loaded = {segment.path.name: segment for segment in self._segments}
+        segments = []
+        for name in names:
+            try:
+                segments.append(loaded.get(name) or _Segment(self.index_dir / name))
+            except FileNotFoundError:
+                continue
+        self._segments = segments
+        self._dir_mtime = mtime
+
+        seen: set[str] = set()
+        for segment in reversed(self._segments):
+            segment.shadowed = np.fromiter(
+                (chunk_id in seen for chunk_id in segment.chunk_ids), dtype=bool, count=len(segment.chunk_ids)
+            )
+            seen.update(segment.chunk_ids)
+
+        # Statistics count only the searchable copy of each chunk, so re-ingesting does not inflate them.
+        self._df = Counter()
+        total_len = 0
+        self._doc_count = 0
+        for segment in self._segments:
+            live = ~segment.shadowed
+            if live.all():
+                for term, (_, length) in segment.vocab.items():
+                    self._df[term] += length
+            else:
+                counts = np.concatenate([[0], np.cumsum(segment.live_postings(), dtype=np.int64)])
+                for term, (start, length) in segment.vocab.items():
+                    live_count = int(counts[start + length] - counts[start])
+                    if live_count:
+                        self._df[term] += live_count
+            self._doc_count += int(live.sum())
+            total_len += int(segment.doc_lens[live].sum())
+        self._avg_doc_len = total_len / self._doc_count if self._doc_count else 0.0
+
+    def search(self, query: str, limit: int) -> list[tuple[str, float]]:
+        terms = list(dict.fromkeys(tokenize(query)))
+        with self._lock:
+            self._refresh_locked()
+            segments = list(self._segments)
+            df, doc_count, avg_len = self._df, self._doc_count, self._avg_doc_len
+
+        if not terms or not doc_count:
+            return []
+
+        best: dict[str, float] = {}
+        for segment in segments:
+            scores = np.zeros(len(segment.chunk_ids), dtype=np.float32)
+            norm = BM25_K1 * (1 - BM25_B + BM25_B * segment.doc_lens / avg_len)
+            for term in terms:
+                postings = segment.postings(term)
+                if postings is None:
+                    continue
+                doc_ids, tfs = postings
+                idf = math.log(1 + (doc_count - df[term] + 0.5) / (df[term] + 0.5))
+                tf = tfs.astype(np.float32)
+                np.add.at(scores, doc_ids, idf * tf * (BM25_K1 + 1) / (tf + norm[doc_ids]))
+
+            scores[segment.shadowed] = 0.0
+            matched = np.flatnonzero(scores)
+            if not len(matched):
+                continue
+            top = matched[np.argsort(-scores[matched])[:limit]]
+            for doc_id in top:
+                best[segment.chunk_ids[int(doc_id)]] = float(scores[doc_id])
+
+        return sorted(best.items(), key=lambda x: x[1], reverse=True)[:limit]
+
+    def stats(self) -> dict:
+        with self._lock:
+            self._refresh_locked()
+            return {
+                "segments": len(self._segments),
+                "documents": self._doc_count,
+                "terms": len(self._df),
+                "pending": len(self._pending),
+            }
@@ -0,0 +1,106 @@
+import re
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Iterable, Optional
+
+from utils import extract_irs_form_numbers, normalize_form_number
+
+DEFAULT_DB_PATH = "data/forms/form_index.sqlite"
+
+ABOUT_FORM_URL = re.compile(r"/about-form-([a-z0-9-]+?)/?$")
+FORM_PDF_URL = re.compile(r"/irs-pdf/f([a-z0-9-]+)\.pdf$")
+
+
+def forms_from_url(url: str) -> list[str]:
+    """Form numbers whose canonical irs.gov page or PDF this URL is."""
+    url = url.lower().split("?")[0]
+    forms = []
+    for pattern in (ABOUT_FORM_URL, FORM_PDF_URL):
+        match = pattern.search(url)
+        if match:
+            forms.append(normalize_form_number(match.group(1)))
+    return forms
+
+
+def chunk_form_numbers(text: str) -> list[str]:
+    return sorted({normalize_form_number(form) for form in extract_irs_form_numbers(text)})
+
+
+class FormIndex:
+    """Local form number -> chunk_id map built at ingestion time.
+
+    Chunks from a form's own page ("about-form-w-4", "fw4.pdf") are marked
+    canonical for that form even when their text never names it, so form
+    lookups can go straight to them. A chunk that is added again replaces
+    its rows, and rows left by an earlier crawl of the same page are dropped,
+    so chunks that changed or disappeared stop matching. Backed by sqlite so
+    every worker sees what ingestion wrote.
+    """
+
+    def __init__(self, db_path: str = DEFAULT_DB_PATH):
+        Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(db_path, timeout=5.0, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS form_chunks ("
+            "form TEXT NOT NULL, chunk_id TEXT NOT NULL, canonical INTEGER NOT NULL, "
+            "PRIMARY KEY (form, chunk_id))"
+        )
+        columns = {row[1] for row in self._db.execute("PRAGMA table_info(form_chunks)")}
+        # Indexes written before rows were tied to their page; those rows are replaced on re-ingest.
+        for column in ("page_url", "crawl_ts"):
+            if column not in columns:
+                self._db.execute(f"ALTER TABLE form_chunks ADD COLUMN {column} TEXT NOT NULL DEFAULT ''")
+        self._db.execute("CREATE INDEX IF NOT EXISTS form_chunks_chunk ON form_chunks (chunk_id)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS form_chunks_page ON form_chunks (page_url, crawl_ts)")
+        self._lock = threading.Lock()
+
+    def add_chunks(self, chunks: Iterable) -> None:
+        rows = []
+        chunk_ids = []
+        crawls: dict[str, str] = {}
+        for chunk in chunks:
+            page_url = str(chunk.page_url)
+            crawl_ts = chunk.crawl_timestamp.isoformat()
+            chunk_ids.append((chunk.chunk_id,))
+            crawls[page_url] = max(crawls.get(page_url, ""), crawl_ts)
+            canonical = set(forms_from_url(page_url))
+            for form in canonical | set(chunk_form_numbers(chunk.chunk_text)):
+                rows.append((form, chunk.chunk_id, int(form in canonical), page_url, crawl_ts))
+
+        if not chunk_ids:
+            return
+        with self._lock:
+            self._db.execute("BEGIN")
+            try:
+                self._db.executemany("DELETE FROM form_chunks WHERE chunk_id = ?", chunk_ids)
+                self._db.executemany(
+                    "DELETE FROM form_chunks WHERE page_url = ? AND crawl_ts < ?", crawls.items()
+                )
+                self._db.executemany(
+                    "INSERT INTO form_chunks (form, chunk_id, canonical, page_url, crawl_ts) "
+                    "VALUES (?, ?, ?, ?, ?) "
+                    "ON CONFLICT (form, chunk_id) DO UPDATE SET canonical = MAX(canonical, excluded.canonical)",
+                    rows,
+                )
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+            self._db.execute("COMMIT")
+
+    def chunk_ids(self, forms: list[str], canonical_only: bool = False, limit: Optional[int] = None) -> list[str]:
+        keys = [normalize_form_number(form) for form in forms]
+        if not keys:
+            return []
+        placeholders = ",".join("?" * len(keys))
+        sql = f"SELECT DISTINCT chunk_id FROM form_chunks WHERE form IN ({placeholders})"
+        if canonical_only:
+            sql += " AND canonical = 1"
+        if limit:
+            sql += f" LIMIT {int(limit)}"
+        with self._lock:
+            return [row[0] for row in self._db.execute(sql, keys).fetchall()]
+
+    def close(self) -> None:
+        self._db.close()
@@ -0,0 +1,4 @@
+from .stage_metrics import CANDIDATES, LLM_TOKENS, StatsCollector, observe_stage, stage
+from .server_timing import ServerTimingMiddleware
+
+__all__ = ["CANDIDATES", "LLM_TOKENS", "StatsCollector", "observe_stage", "stage", "ServerTimingMiddleware"]
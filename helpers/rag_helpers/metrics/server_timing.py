@@ -0,0 +1,35 @@
+import time
+
+from helpers.rag_helpers.metrics.stage_metrics import start_timings
+
+
+class ServerTimingMiddleware:
+    """Adds a ``Server-Timing`` header with the stages recorded while handling the request.
+
+    Plain ASGI rather than ``BaseHTTPMiddleware`` so the endpoint runs in the
+    same context and no extra task is spawned per request. Streaming responses
+    send headers before generation starts, so they carry only the stages that
+    finished by then.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timings = start_timings()
+        start = time.perf_counter()
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                entries = [f"{name};dur={seconds * 1000:.1f}" for name, seconds in timings]
+                entries.append(f"total;dur={(time.perf_counter() - start) * 1000:.1f}")
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", ", ".join(entries).encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        await self.app(scope, receive, send_with_timing)
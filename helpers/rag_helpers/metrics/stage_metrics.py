@@ -0,0 +1,84 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Iterator, Optional
+
+from prometheus_client import Counter, Histogram
+from prometheus_client.core import GaugeMetricFamily
+from prometheus_client.registry import Collector
+
+STAGE_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 12, 20, 32, 50, 100)
+TOKEN_BUCKETS = (16, 32, 64, 128, 256, 512, 1024, 2048, 4096)
+
+STAGE_SECONDS = Histogram(
+    "rag_stage_seconds", "Time spent per pipeline stage", ["stage"], buckets=STAGE_BUCKETS
+)
+STAGE_ERRORS = Counter("rag_stage_errors_total", "Exceptions raised per pipeline stage", ["stage", "error"])
+CANDIDATES = Histogram(
+    "rag_candidates", "Chunks per query after each retrieval step", ["step"], buckets=COUNT_BUCKETS
+)
+LLM_TOKENS = Histogram("rag_llm_tokens", "Ollama prompt and completion tokens", ["kind"], buckets=TOKEN_BUCKETS)
+
+# Stage durations of the current request, read by ServerTimingMiddleware.
+_timings: ContextVar[Optional[list[tuple[str, float]]]] = ContextVar("rag_stage_timings", default=None)
+
+
+def start_timings() -> list[tuple[str, float]]:
+    timings: list[tuple[str, float]] = []
+    _timings.set(timings)
+    return timings
+
+
+def observe_stage(name: str, seconds: float) -> None:
+    STAGE_SECONDS.labels(name).observe(seconds)
+    timings = _timings.get()
+    if timings is not None:
+        timings.append((name, seconds))
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """Time a pipeline stage into ``rag_stage_seconds`` and the request's Server-Timing."""
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception as e:
+        STAGE_ERRORS.labels(name, type(e).__name__).inc()
+        raise
+    finally:
+        observe_stage(name, time.perf_counter() - start)
+
+
+class StatsCollector(Collector):
+    """Exports numeric fields of components' ``stats()`` dicts as gauges.
+
+    Each source becomes ``rag_<source>_<field>``; nested dicts (e.g. per-lane
+    queue depths) become a ``key`` label. Stats are read at scrape time, so
+    the components keep their plain counters and pay nothing per request.
+    """
+
+    def __init__(self, sources: dict[str, Callable[[], dict]]):
+        self.sources = sources
+
+    def collect(self):
+        for source, read_stats in self.sources.items():
+            for field, value in read_stats().items():
+                name = f"rag_{source}_{field}"
+                if isinstance(value, dict):
+                    yield from self._nested(name, value)
+                elif isinstance(value, (int, float)) and not isinstance(value, bool):
+                    yield GaugeMetricFamily(name, f"{source} {field}", value=value)
+
+    def _nested(self, name: str, values: dict):
+        gauge = GaugeMetricFamily(name, name, labels=["key"])
+        for key, value in self._flatten(values):
+            gauge.add_metric([key], value)
+        yield gauge
+
+    def _flatten(self, values: dict, prefix: str = ""):
+        for key, value in values.items():
+            if isinstance(value, dict):
+                yield from self._flatten(value, f"{prefix}{key}_")
+            elif isinstance(value, (int, float)) and not isinstance(value, bool):
+                yield f"{prefix}{key}", value
@@ -1,4 +1,5 @@
 from .html_parser import HtmlParser
 from .pdf_parser import PdfParser
+from .page_parser import parse_page
 
-__all__ = ["HtmlParser", "PdfParser"]
+__all__ = ["HtmlParser", "PdfParser", "parse_page"]
@@ -0,0 +1,18 @@
+from models import ContentType, CrawledPage
+from .html_parser import HtmlParser
+from .pdf_parser import PdfParser
+
+_HTML_PARSER = HtmlParser()
+_PDF_PARSER = PdfParser()
+
+
+def parse_page(page: CrawledPage) -> CrawledPage:
+    """Parse a fetched page and drop its raw bytes.
+
+    Module-level so process pools can run it; with the raw bytes gone only
+    the cleaned text is sent back to the parent.
+    """
+    parser = _PDF_PARSER if page.content_type == ContentType.PDF else _HTML_PARSER
+    page = parser.parse(page)
+    page.raw_content = b""
+    return page
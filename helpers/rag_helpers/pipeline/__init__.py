@@ -0,0 +1,3 @@
+from .staged_pipeline import Stage, StagedPipeline
+
+__all__ = ["Stage", "StagedPipeline"]
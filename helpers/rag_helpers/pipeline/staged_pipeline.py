@@ -0,0 +1,138 @@
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Iterable, Optional
+
+DEFAULT_MAX_WAIT_MS = 50.0
+# Items a stage's input queue holds per worker (times batch_size for batched stages).
+QUEUE_DEPTH_PER_WORKER = 2
+
+_DONE = object()
+
+
+@dataclass
+class Stage:
+    """One step of a StagedPipeline.
+
+    ``fn`` gets one item, or a list of up to ``batch_size`` items when
+    ``batch_size`` is set, and returns the items to pass downstream (an
+    iterable, or None for none). ``workers`` calls run at once. A batch is
+    handed over when it is full or ``max_wait_ms`` after its first item.
+    """
+
+    name: str
+    fn: Callable[[Any], Awaitable[Optional[Iterable[Any]]]]
+    workers: int = 1
+    batch_size: Optional[int] = None
+    max_wait_ms: float = DEFAULT_MAX_WAIT_MS
+    queue_size: Optional[int] = None
+
+    def capacity(self) -> int:
+        if self.queue_size is not None:
+            return self.queue_size
+        return self.workers * (self.batch_size or 1) * QUEUE_DEPTH_PER_WORKER
+
+
+class StagedPipeline:
+    """Runs items through stages connected by bounded asyncio queues.
+
+    A stage whose input queue is full blocks the stage before it, back to the
+    source, so the number of items alive at once is bounded by the queue
+    sizes and worker counts however long the source is. A call that raises
+    drops its items and is counted in the stage's ``errors``; the rest of the
+    run goes on.
+    """
+
+    def __init__(self, stages: list[Stage]):
+        self.stages = stages
+        self._stats = {
+            stage.name: {"items": 0, "outputs": 0, "calls": 0, "errors": 0, "busy_s": 0.0, "max_queued": 0}
+            for stage in stages
+        }
+
+    async def _put(self, index: int, queue: asyncio.Queue, item: Any) -> None:
+        await queue.put(item)
+        stats = self._stats[self.stages[index].name]
+        stats["max_queued"] = max(stats["max_queued"], queue.qsize())
+
+    async def _take(self, stage: Stage, queue: asyncio.Queue) -> tuple[list[Any], bool]:
+        item = await queue.get()
+        if item is _DONE:
+            return [], True
+        items = [item]
+        if stage.batch_size is None:
+            return items, False
+
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + stage.max_wait_ms / 1000.0
+        while len(items) < stage.batch_size:
+            try:
+                item = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+            if item is _DONE:
+                return items, True
+            items.append(item)
+        return items, False
+
+    async def _work(self, index: int, queues: list[asyncio.Queue], remaining: list[int]) -> None:
+        stage = self.stages[index]
+        stats = self._stats[stage.name]
+        downstream = queues[index + 1] if index + 1 < len(queues) else None
+        done = False
+        while not done:
+            items, done = await self._take(stage, queues[index])
+            if not items:
+                continue
+            stats["items"] += len(items)
+            stats["calls"] += 1
+            start = time.perf_counter()
+            try:
+                outputs = await stage.fn(items if stage.batch_size is not None else items[0])
+            except Exception:
+                stats["errors"] += 1
+                outputs = None
+            finally:
+                stats["busy_s"] += time.perf_counter() - start
+            for output in outputs or ():
+                stats["outputs"] += 1
+                if downstream is not None:
+                    await self._put(index + 1, downstream, output)
+
+        # Every item of this stage is downstream now; the last worker out tells the next stage.
+        remaining[index] -= 1
+        if remaining[index] == 0 and downstream is not None:
+            for _ in range(self.stages[index + 1].workers):
+                await downstream.put(_DONE)
+
+    async def run(self, source: Iterable[Any]) -> dict:
+        queues = [asyncio.Queue(maxsize=stage.capacity()) for stage in self.stages]
+        remaining = [stage.workers for stage in self.stages]
+
+        async def feed() -> None:
+            for item in source:
+                await self._put(0, queues[0], item)
+            for _ in range(self.stages[0].workers):
+                await queues[0].put(_DONE)
+
+        tasks = [asyncio.create_task(feed())]
+        for index, stage in enumerate(self.stages):
+            tasks += [asyncio.create_task(self._work(index, queues, remaining)) for _ in range(stage.workers)]
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+        return self.stats()
+
+    def stats(self) -> dict:
+        return {
+            name: {**stats, "busy_s": round(stats["busy_s"], 3)}
+            for name, stats in self._stats.items()
+        }
@@ -0,0 +1,4 @@
+from .rerank_engine import RerankEngine
+from .cascade import RerankCascade
+
+__all__ = ["RerankEngine", "RerankCascade"]
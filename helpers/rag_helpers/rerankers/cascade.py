@@ -0,0 +1,136 @@
+from dataclasses import dataclass
+from typing import Any, Optional
+
+# Dense (cosine) similarity the head of the list must lead the rest by to skip the cross-encoder.
+SKIP_MARGIN = 0.1
+# A dense similarity drop this large, relative to the list's dense spread, ends the rerank set.
+MIN_GAP_FRACTION = 0.25
+# Never cut the rerank set below top_n * this, so the cross-encoder can still reorder.
+MIN_CANDIDATES_FACTOR = 2
+# Truncated first pass: words of each chunk it sees and top_n * factor survivors it keeps.
+PREFILTER_WORDS = 64
+PREFILTER_KEEP_FACTOR = 2
+
+PATH_SKIPPED = "skipped"
+PATH_PRUNED = "pruned"
+PATH_FULL = "full"
+
+
+@dataclass
+class CascadePlan:
+    path: str
+    candidates: list[dict[str, Any]]
+
+
+class RerankCascade:
+    """Decides how much cross-encoder work each query's candidate list gets.
+
+    Candidates arrive in first-stage order (RRF when hybrid retrieval is on,
+    dense otherwise). If the first ``top_n`` lead every other candidate's
+    dense score by ``skip_margin``, and no candidate is a lexical-only hit
+    without one, the cross-encoder is skipped and they are returned as they
+    are. Otherwise the dense scores are cut at their largest gap below the
+    ``top_n * min_candidates_factor`` best, when that gap is at least
+    ``min_gap_fraction`` of their spread, and only candidates above it, plus
+    every lexical-only hit, are reranked. Pruning reads dense scores rather
+    than RRF ones because RRF scores depend only on ranks: 1/(k + rank) with
+    k = 60 falls almost evenly down the list and has no gaps to cut at. With
+    ``prefilter`` on, a pass over the first ``prefilter_words`` words of each
+    candidate picks the survivors for the full-length pass. Skipped and pruned
+    candidates keep their first-stage scores and get no ``rerank_score``.
+    """
+
+    def __init__(
+        self,
+        skip_margin: float = SKIP_MARGIN,
+        min_gap_fraction: float = MIN_GAP_FRACTION,
+        min_candidates_factor: int = MIN_CANDIDATES_FACTOR,
+        prefilter: bool = False,
+        prefilter_words: int = PREFILTER_WORDS,
+        prefilter_keep_factor: int = PREFILTER_KEEP_FACTOR,
+    ):
+        self.skip_margin = skip_margin
+        self.min_gap_fraction = min_gap_fraction
+        self.min_candidates_factor = min_candidates_factor
+        self.prefilter = prefilter
+        self.prefilter_words = prefilter_words
+        self.prefilter_keep_factor = prefilter_keep_factor
+        self.paths = {PATH_SKIPPED: 0, PATH_PRUNED: 0, PATH_FULL: 0}
+        self.prefiltered = 0
+        self.candidates = 0
+        self.full_pairs = 0
+        self.prefilter_pairs = 0
+
+    def _dense(self, chunk: dict[str, Any]) -> Optional[float]:
+        if "vector_score" in chunk:
+            return chunk["vector_score"]
+        return chunk.get("score")
+
+    def _decisive(self, chunks: list[dict[str, Any]], top_n: int) -> bool:
+        head, rest = chunks[:top_n], chunks[top_n:]
+        if not rest:
+            return False
+        # Lexical-only hits carry no dense score, so a dense lead says nothing about them:
+        # a strong exact-token (e.g. form number) match in the tail must still be reranked.
+        dense = [self._dense(chunk) for chunk in chunks]
+        if any(score is None for score in dense):
+            return False
+        lead = min(dense[:top_n]) - max(dense[top_n:])
+        return lead >= self.skip_margin
+
+    def _prune(self, chunks: list[dict[str, Any]], top_n: int) -> list[dict[str, Any]]:
+        floor = top_n * self.min_candidates_factor
+        dense = sorted((score for score in map(self._dense, chunks) if score is not None), reverse=True)
+        if len(dense) <= floor:
+            return chunks
+        spread = dense[0] - dense[-1]
+        if spread <= 0:
+            return chunks
+        # Keep dense[:cut] where the drop just before position cut is the largest.
+        cut = max(range(floor, len(dense)), key=lambda i: dense[i - 1] - dense[i])
+        if dense[cut - 1] - dense[cut] < self.min_gap_fraction * spread:
+            return chunks
+        # Lexical-only hits have nothing to compare against the gap, so they are always kept.
+        threshold = dense[cut - 1]
+        return [chunk for chunk in chunks if self._dense(chunk) is None or self._dense(chunk) >= threshold]
+
+    def plan(self, chunks: list[dict[str, Any]], top_n: int) -> CascadePlan:
+        self.candidates += len(chunks)
+        if self._decisive(chunks, top_n):
+            self.paths[PATH_SKIPPED] += 1
+            return CascadePlan(PATH_SKIPPED, [])
+        candidates = self._prune(chunks, top_n)
+        path = PATH_PRUNED if len(candidates) < len(chunks) else PATH_FULL
+        self.paths[path] += 1
+        return CascadePlan(path, candidates)
+
+    def wants_prefilter(self, candidates: list[dict[str, Any]], top_n: int) -> bool:
+        return self.prefilter and len(candidates) > top_n * self.prefilter_keep_factor
+
+    def heads(self, candidates: list[dict[str, Any]]) -> list[dict[str, Any]]:
+        """Truncated stand-ins for the first pass; the score cache keys them by their shorter text."""
+        self.prefiltered += 1
+        self.prefilter_pairs += len(candidates)
+        return [{"text": " ".join(chunk.get("text", "").split()[: self.prefilter_words])} for chunk in candidates]
+
+    def survivors(
+        self, candidates: list[dict[str, Any]], head_scores: list[float], top_n: int
+    ) -> list[dict[str, Any]]:
+        keep = top_n * self.prefilter_keep_factor
+        order = sorted(range(len(candidates)), key=lambda i: head_scores[i], reverse=True)[:keep]
+        return [candidates[i] for i in sorted(order)]
+
+    def record_full_pass(self, pairs: int) -> None:
+        self.full_pairs += pairs
+
+    def stats(self) -> dict:
+        saved = self.candidates - self.full_pairs
+        return {
+            **self.paths,
+            "prefiltered": self.prefiltered,
+            "candidates": self.candidates,
+            "full_pairs": self.full_pairs,
+            "prefilter_pairs": self.prefilter_pairs,
+            "full_pairs_saved": saved,
+            "full_pairs_saved_fraction": saved / self.candidates if self.candidates else 0.0,
+        }
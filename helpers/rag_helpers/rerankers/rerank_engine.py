@@ -0,0 +1,192 @@
+import asyncio
+import threading
+from collections import OrderedDict
+from concurrent.futures import Executor
+from typing import Any, Optional
+
+from helpers.rag_helpers.batching import MicroBatcher
+from helpers.rag_helpers.caches.embedding_cache import normalize_query
+from helpers.rag_helpers.sidecar import SidecarClient
+from utils import compute_content_hash
+
+DEFAULT_BATCH_SIZE = 16
+DEFAULT_MAX_LENGTH = 512
+DEFAULT_CACHE_SIZE = 50000
+DEFAULT_MAX_BATCH_PAIRS = 64
+DEFAULT_MAX_WAIT_MS = 2.0
+
+
+class RerankEngine:
+    """Long-lived cross-encoder scorer shared by all requests.
+
+    Pairs are tokenized once without padding, sorted by token length and cut
+    into batches, so each batch pads only to its own longest pair. Async
+    callers go through a MicroBatcher, so pairs from concurrent requests share
+    forward passes. Scores are cached per ``(query_hash, text_hash)``, so a
+    repeated query skips the cross-encoder. With ``remote`` set, uncached
+    pairs are scored by the inference sidecar instead of a local model.
+    """
+
+    def __init__(
+        self,
+        tokenizer,
+        model,
+        executor: Executor,
+        device: str = "cpu",
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        max_length: int = DEFAULT_MAX_LENGTH,
+        cache_size: int = DEFAULT_CACHE_SIZE,
+        max_batch_pairs: int = DEFAULT_MAX_BATCH_PAIRS,
+        max_wait_ms: float = DEFAULT_MAX_WAIT_MS,
+        remote: Optional[SidecarClient] = None,
+    ):
+        self.tokenizer = tokenizer
+        self.model = model
+        self.remote = remote
+        self.device = device
+        self.batch_size = batch_size
+        self.max_length = max_length
+        self.cache_size = cache_size
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.forward_passes = 0
+        self._cache: OrderedDict[tuple[str, str], float] = OrderedDict()
+        self._lock = threading.Lock()
+        self.batcher = MicroBatcher(
+            self._score_pairs,
+            executor,
+            max_batch_size=max_batch_pairs,
+            max_wait_ms=max_wait_ms,
+        )
+
+    def _keys(self, query: str, chunks: list[dict[str, Any]]) -> list[tuple[str, str]]:
+        query_hash = compute_content_hash(normalize_query(query))[:16]
+        # A score depends only on the query and the text, so keying on the text's hash stays
+        # right when a chunk is re-ingested under the same id with new content.
+        return [(query_hash, compute_content_hash(chunk.get("text", ""))[:16]) for chunk in chunks]
+
+    def _cached_scores(self, keys: list[tuple[str, str]]) -> list:
+        with self._lock:
+            scores = []
+            for key in keys:
+                score = self._cache.get(key)
+                if score is not None:
+                    self._cache.move_to_end(key)
+                    self.cache_hits += 1
+                else:
+                    self.cache_misses += 1
+                scores.append(score)
+            return scores
+
+    def _remember(self, keys: list[tuple[str, str]], scores: list[float]) -> None:
+        with self._lock:
+            for key, score in zip(keys, scores):
+                self._cache[key] = score
+                self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def _score_pairs(self, pairs: list[tuple[str, str]]) -> list[float]:
+        if self.remote is not None:
+            self.forward_passes += 1
+            return self.remote.rerank(pairs)
+
+        # Local import: sidecar clients construct this engine without torch installed or loaded.
+        import torch
+
+        encoded = self.tokenizer(
+            [query for query, _ in pairs],
+            [text for _, text in pairs],
+            truncation=True,
+            max_length=self.max_length,
+        )
+        features = [
+            {name: encoded[name][i] for name in encoded.keys()} for i in range(len(pairs))
+        ]
+        order = sorted(range(len(pairs)), key=lambda i: len(features[i]["input_ids"]))
+
+        scores = [0.0] * len(pairs)
+        with torch.no_grad():
+            for start in range(0, len(order), self.batch_size):
+                bucket = order[start : start + self.batch_size]
+                inputs = self.tokenizer.pad(
+                    [features[i] for i in bucket], padding=True, return_tensors="pt"
+                ).to(self.device)
+                logits = self.model(**inputs).logits.view(-1).cpu().tolist()
+                self.forward_passes += 1
+                for i, score in zip(bucket, logits):
+                    scores[i] = float(score)
+
+        return scores
+
+    def warmup(self, pair_counts: tuple[int, ...], text: str) -> None:
+        """Run uncached forward passes so the first real request pays no first-call overhead."""
+        for count in pair_counts:
+            self._score_pairs([("warmup query", text)] * count)
+
+    def score(self, query: str, chunks: list[dict[str, Any]]) -> list[float]:
+        keys = self._keys(query, chunks)
+        scores = self._cached_scores(keys)
+        missing = [i for i, score in enumerate(scores) if score is None]
+        if missing:
+            fresh = self._score_pairs([(query, chunks[i].get("text", "")) for i in missing])
+            self._remember([keys[i] for i in missing], fresh)
+            for i, score in zip(missing, fresh):
+                scores[i] = score
+        return scores
+
+    async def score_async(self, query: str, chunks: list[dict[str, Any]]) -> list[float]:
+        keys = self._keys(query, chunks)
+        scores = self._cached_scores(keys)
+        missing = [i for i, score in enumerate(scores) if score is None]
+        if missing:
+            fresh = await asyncio.gather(
+                *(self.batcher.submit((query, chunks[i].get("text", ""))) for i in missing)
+            )
+            self._remember([keys[i] for i in missing], fresh)
+            for i, score in zip(missing, fresh):
+                scores[i] = score
+        return scores
+
+    async def score_many_async(
+        self, requests: list[tuple[str, list[dict[str, Any]]]]
+    ) -> list[list[float]]:
+        """Score several ``(query, chunks)`` requests through shared batches.
+
+        Uncached pairs from all requests are submitted together, shortest text
+        first, so neighbouring pairs in a batch have similar lengths regardless
+        of which query they belong to.
+        """
+        all_keys = [self._keys(query, chunks) for query, chunks in requests]
+        all_scores = [self._cached_scores(keys) for keys in all_keys]
+        missing = [
+            (r, i)
+            for r, scores in enumerate(all_scores)
+            for i, score in enumerate(scores)
+            if score is None
+        ]
+        if not missing:
+            return all_scores
+
+        missing.sort(key=lambda ri: len(requests[ri[0]][1][ri[1]].get("text", "")))
+        fresh = await asyncio.gather(
+            *(
+                self.batcher.submit((requests[r][0], requests[r][1][i].get("text", "")))
+                for r, i in missing
+            )
+        )
+        self._remember([all_keys[r][i] for r, i in missing], fresh)
+        for (r, i), score in zip(missing, fresh):
+            all_scores[r][i] = score
+        return all_scores
+
+    def stats(self) -> dict:
+        lookups = self.cache_hits + self.cache_misses
+        return {
+            "cache_hits": self.cache_hits,
+            "cache_misses": self.cache_misses,
+            "cache_hit_rate": self.cache_hits / lookups if lookups else 0.0,
+            "cache_size": len(self._cache),
+            "forward_passes": self.forward_passes,
+            **self.batcher.stats(),
+        }
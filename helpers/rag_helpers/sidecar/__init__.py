@@ -0,0 +1,4 @@
+from .client import SidecarClient, RemoteSentenceEncoder
+from .server import InferenceServer
+
+__all__ = ["SidecarClient", "RemoteSentenceEncoder", "InferenceServer"]
@@ -0,0 +1,84 @@
+import socket
+import threading
+from typing import Any, Optional
+
+import numpy as np
+
+from helpers.rag_helpers.sidecar.protocol import recv_frame, send_frame
+
+DEFAULT_TIMEOUT_S = 60.0
+
+
+class SidecarClient:
+    """Blocking client for the inference sidecar, shared by all threads of a worker.
+
+    Each thread keeps its own connection to the Unix socket, so the inference
+    executor's threads have calls in flight at the same time and the sidecar
+    batches them with those of other workers. A call that hits a broken
+    connection reconnects and retries once; embed and rerank are idempotent.
+    """
+
+    def __init__(self, socket_path: str, timeout: float = DEFAULT_TIMEOUT_S):
+        self.socket_path = socket_path
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _connection(self) -> socket.socket:
+        sock = getattr(self._local, "sock", None)
+        if sock is None:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout)
+            sock.connect(self.socket_path)
+            self._local.sock = sock
+        return sock
+
+    def _reset(self) -> None:
+        sock = getattr(self._local, "sock", None)
+        self._local.sock = None
+        if sock is not None:
+            sock.close()
+
+    def _call(self, op: str, **params: Any) -> Any:
+        for attempt in range(2):
+            try:
+                sock = self._connection()
+                send_frame(sock, {"op": op, **params})
+                response = recv_frame(sock)
+                break
+            except OSError:
+                self._reset()
+                if attempt:
+                    raise
+        if "error" in response:
+            raise RuntimeError(f"Inference sidecar {op} failed: {response['error']}")
+        return response["result"]
+
+    def embed(self, texts: list[str]) -> np.ndarray:
+        return np.asarray(self._call("embed", texts=texts), dtype=np.float32).reshape(len(texts), -1)
+
+    def rerank(self, pairs: list[tuple[str, str]]) -> list[float]:
+        return self._call("rerank", pairs=pairs)
+
+    def info(self) -> dict:
+        return self._call("info")
+
+    def stats(self) -> dict:
+        return self._call("stats")
+
+
+class RemoteSentenceEncoder:
+    """Stand-in for SentenceTransformer.encode that embeds through the sidecar."""
+
+    def __init__(self, client: SidecarClient):
+        self.client = client
+        self._dimension: Optional[int] = None
+
+    def get_sentence_embedding_dimension(self) -> int:
+        if self._dimension is None:
+            self._dimension = self.client.info()["dimension"]
+        return self._dimension
+
+    def encode(self, texts: list[str], **kwargs: Any) -> np.ndarray:
+        if not texts:
+            return np.zeros((0, self.get_sentence_embedding_dimension()), dtype=np.float32)
+        return self.client.embed(list(texts))
@@ -0,0 +1,51 @@
+import asyncio
+import socket
+import struct
+from typing import Any, Optional
+
+import orjson
+
+# Every message is a 4-byte big-endian length followed by that many bytes of JSON.
+HEADER = struct.Struct("!I")
+MAX_FRAME_BYTES = 64 * 1024 * 1024
+
+
+def encode_frame(message: Any) -> bytes:
+    payload = orjson.dumps(message, option=orjson.OPT_SERIALIZE_NUMPY)
+    return HEADER.pack(len(payload)) + payload
+
+
+def _check_length(length: int) -> int:
+    if length > MAX_FRAME_BYTES:
+        raise ValueError(f"Frame of {length} bytes exceeds the {MAX_FRAME_BYTES} byte limit")
+    return length
+
+
+def _recv_exactly(sock: socket.socket, size: int) -> bytes:
+    view = memoryview(bytearray(size))
+    received = 0
+    while received < size:
+        count = sock.recv_into(view[received:])
+        if count == 0:
+            raise ConnectionError("Inference sidecar closed the connection")
+        received += count
+    return view.tobytes()
+
+
+def send_frame(sock: socket.socket, message: Any) -> None:
+    sock.sendall(encode_frame(message))
+
+
+def recv_frame(sock: socket.socket) -> Any:
+    (length,) = HEADER.unpack(_recv_exactly(sock, HEADER.size))
+    return orjson.loads(_recv_exactly(sock, _check_length(length)))
+
+
+async def read_frame_async(reader: asyncio.StreamReader) -> Optional[Any]:
+    """Next message, or None once the peer has closed the connection."""
+    try:
+        header = await reader.readexactly(HEADER.size)
+    except asyncio.IncompleteReadError:
+        return None
+    (length,) = HEADER.unpack(header)
+    return orjson.loads(await reader.readexactly(_check_length(length)))
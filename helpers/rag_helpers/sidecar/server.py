@@ -0,0 +1,125 @@
+import asyncio
+import os
+import resource
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Optional
+
+import numpy as np
+
+from helpers.rag_helpers.batching import MicroBatcher
+from helpers.rag_helpers.sidecar.protocol import encode_frame, read_frame_async
+
+DEFAULT_WORKERS = 1
+EMBED_MAX_BATCH_SIZE = 64
+RERANK_MAX_BATCH_PAIRS = 64
+MAX_WAIT_MS = 2.0
+
+
+class InferenceServer:
+    """Hosts the embedder and cross-encoder once for every API worker on the host.
+
+    Workers connect to a Unix socket (see ``SidecarClient``). Each text or
+    pair they send is submitted on its own to a MicroBatcher, so concurrent
+    calls from different workers share forward passes. Forward passes run on
+    ``workers`` threads (one by default) and torch is limited to
+    ``torch_threads`` intra-op threads, so one process owns the cores instead
+    of every worker running its own thread pool.
+    """
+
+    def __init__(
+        self,
+        socket_path: str,
+        embedding_model: str,
+        reranker_model: str,
+        backend: str = "torch",
+        model_dir: Optional[str] = None,
+        torch_threads: Optional[int] = None,
+        workers: int = DEFAULT_WORKERS,
+        max_wait_ms: float = MAX_WAIT_MS,
+    ):
+        import torch
+
+        from helpers.rag_helpers.inference import load_embedding_model, load_reranker
+        from helpers.rag_helpers.rerankers import RerankEngine
+
+        if torch_threads:
+            torch.set_num_threads(torch_threads)
+        self.torch_threads = torch.get_num_threads()
+        self.socket_path = socket_path
+        self.embedding_model = embedding_model
+        self.reranker_model = reranker_model
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="sidecar")
+        self.embedder = load_embedding_model(embedding_model, backend=backend, model_dir=model_dir)
+        self.dimension = self.embedder.get_sentence_embedding_dimension()
+        self.embed_batcher = MicroBatcher(
+            self._encode,
+            self.executor,
+            max_batch_size=EMBED_MAX_BATCH_SIZE,
+            max_wait_ms=max_wait_ms,
+            max_in_flight=workers,
+        )
+        tokenizer, model = load_reranker(reranker_model, backend=backend, model_dir=model_dir)
+        self.rerank_engine = RerankEngine(
+            tokenizer,
+            model,
+            self.executor,
+            max_batch_pairs=RERANK_MAX_BATCH_PAIRS,
+            max_wait_ms=max_wait_ms,
+        )
+        self.connections = 0
+
+    def _encode(self, texts: list[str]) -> np.ndarray:
+        embeddings = self.embedder.encode(texts, show_progress_bar=False, convert_to_numpy=True)
+        return embeddings.astype(np.float32)
+
+    async def _dispatch(self, request: dict[str, Any]) -> Any:
+        op = request.get("op")
+        if op == "embed":
+            vectors = await asyncio.gather(*(self.embed_batcher.submit(text) for text in request["texts"]))
+            return np.stack(vectors) if vectors else []
+        if op == "rerank":
+            return await asyncio.gather(
+                *(self.rerank_engine.batcher.submit((query, text)) for query, text in request["pairs"])
+            )
+        if op == "info":
+            return {
+                "embedding_model": self.embedding_model,
+                "reranker_model": self.reranker_model,
+                "dimension": self.dimension,
+                "torch_threads": self.torch_threads,
+            }
+        if op == "stats":
+            return self.stats()
+        raise ValueError(f"Unknown op: {op}")
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.connections += 1
+        try:
+            while (request := await read_frame_async(reader)) is not None:
+                try:
+                    response = {"result": await self._dispatch(request)}
+                except Exception as e:
+                    response = {"error": f"{type(e).__name__}: {e}"}
+                writer.write(encode_frame(response))
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            self.connections -= 1
+            writer.close()
+
+    async def serve_forever(self) -> None:
+        # A socket left behind by a previous run would make bind fail.
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+        server = await asyncio.start_unix_server(self._handle, path=self.socket_path)
+        async with server:
+            await server.serve_forever()
+
+    def stats(self) -> dict:
+        return {
+            "connections": self.connections,
+            "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+            "embed": self.embed_batcher.stats(),
+            "rerank": self.rerank_engine.stats(),
+        }
@@ -1,3 +1,4 @@
 from .storage_manager import StorageManager
+from .chunk_store import ChunkStore
 
-__all__ = ["StorageManager"]
+__all__ = ["StorageManager", "ChunkStore"]
@@ -0,0 +1,194 @@
+import mmap
+import os
+import shutil
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Iterable, Optional
+
+import numpy as np
+import orjson
+
+DEFAULT_STORE_DIR = "data/chunk_store"
+FLUSH_EVERY_RECORDS = 5000
+MAX_SEGMENTS = 8
+
+INDEX_DTYPE = np.dtype([("key", "S16"), ("offset", "<u8"), ("length", "<u4")])
+
+
+def _key(chunk_id: str) -> bytes:
+    return uuid.UUID(str(chunk_id)).bytes
+
+
+class _Segment:
+    def __init__(self, path: Path):
+        self.path = path
+        self.index = np.load(path / "index.npy", mmap_mode="r")
+        with open(path / "records.bin", "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.records = memoryview(self._mmap)
+
+    def find(self, keys: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        positions = np.searchsorted(self.index["key"], keys)
+        positions = np.minimum(positions, len(self.index) - 1)
+        found = self.index["key"][positions] == keys
+        return found, positions
+
+    def record(self, position: int) -> memoryview:
+        entry = self.index[position]
+        offset = int(entry["offset"])
+        return self.records[offset : offset + int(entry["length"])]
+
+    def entries(self) -> Iterable[tuple[bytes, memoryview]]:
+        for position in range(len(self.index)):
+            yield bytes(self.index["key"][position]), self.record(position)
+
+    def close(self) -> None:
+        try:
+            self.records.release()
+            self._mmap.close()
+        except BufferError:
+            # A reader still holds a record view; the map closes when it is collected.
+            pass
+
+
+class ChunkStore:
+    """Local, memory-mapped store of chunk payloads keyed by chunk_id.
+
+    Lets Qdrant hold only vectors and filterable fields. Records are orjson
+    payloads concatenated into ``records.bin``, with a sorted ``index.npy`` of
+    ``(uuid bytes, offset, length)``. Both files are opened read-only with mmap,
+    so a lookup is a binary search plus a memoryview slice of the page cache;
+    ``get_raw`` hands that slice out without copying. Segments are published by
+    renaming a finished temporary directory, and newer segments shadow older
+    copies of the same chunk, as in BM25Index.
+    """
+
+    def __init__(self, store_dir: str = DEFAULT_STORE_DIR, flush_every: int = FLUSH_EVERY_RECORDS):
+        self.store_dir = Path(store_dir)
+        self.store_dir.mkdir(parents=True, exist_ok=True)
+        self.flush_every = flush_every
+        self._pending: dict[bytes, bytes] = {}
+        self._segments: list[_Segment] = []
+        self._dir_mtime: Optional[int] = None
+        self._lock = threading.Lock()
+
+    # Writing
+
+    def put(self, chunk_id: str, payload: dict[str, Any]) -> None:
+        with self._lock:
+            self._pending[_key(chunk_id)] = orjson.dumps(payload)
+            if len(self._pending) >= self.flush_every:
+                self._flush_locked()
+
+    def flush(self) -> None:
+        with self._lock:
+            self._flush_locked()
+            self._refresh_locked()
+            if len(self._segments) > MAX_SEGMENTS:
+                self._compact_locked()
+
+    def _flush_locked(self) -> None:
+        if not self._pending:
+            return
+        self._write_segment(self._pending.items())
+        self._pending = {}
+
+    def _write_segment(self, records: Iterable[tuple[bytes, Any]]) -> Path:
+        records = sorted(records, key=lambda record: record[0])
+        index = np.empty(len(records), dtype=INDEX_DTYPE)
+
+        name = f"seg-{time.time_ns():020d}-{uuid.uuid4().hex[:8]}"
+        tmp_path = self.store_dir / f".tmp-{name}"
+        tmp_path.mkdir()
+        offset = 0
+        with open(tmp_path / "records.bin", "wb") as f:
+            for i, (key, record) in enumerate(records):
+                f.write(record)
+                index[i] = (key, offset, len(record))
+                offset += len(record)
+        np.save(tmp_path / "index.npy", index)
+
+        final_path = self.store_dir / name
+        os.rename(tmp_path, final_path)
+        return final_path
+
+    def _compact_locked(self) -> None:
+        merged: dict[bytes, memoryview] = {}
+        for segment in self._segments:
+            for key, record in segment.entries():
+                merged[key] = record
+        self._write_segment(merged.items())
+        del merged
+
+        old_segments = self._segments
+        self._segments = []
+        for segment in old_segments:
+            segment.close()
+            shutil.rmtree(segment.path, ignore_errors=True)
+        self._dir_mtime = None
+        self._refresh_locked()
+
+    # Reading
+
+    def _refresh_locked(self) -> None:
+        mtime = os.stat(self.store_dir).st_mtime_ns
+        if mtime == self._dir_mtime:
+            return
+
+        names = sorted(p.name for p in self.store_dir.iterdir() if p.name.startswith("seg-"))
+        loaded = {segment.path.name: segment for segment in self._segments}
+        segments = []
+        for name in names:
+            try:
+                segments.append(loaded.pop(name, None) or _Segment(self.store_dir / name))
+            except FileNotFoundError:
+                continue
+        # Segments removed by another process's compaction.
+        for segment in loaded.values():
+            segment.close()
+        self._segments = segments
+        self._dir_mtime = mtime
+
+    def get_raw_many(self, chunk_ids: list[str]) -> list[Optional[memoryview]]:
+        """Serialized payloads as zero-copy views into the mapped segments."""
+        keys = [_key(chunk_id) for chunk_id in chunk_ids]
+        results: list[Optional[memoryview]] = [None] * len(keys)
+        # Held while slicing so compaction cannot close a segment mid-lookup; views
+        # handed out keep their map open afterwards.
+        with self._lock:
+            self._refresh_locked()
+            for i, key in enumerate(keys):
+                pending = self._pending.get(key)
+                if pending is not None:
+                    results[i] = memoryview(pending)
+
+            missing = np.array([i for i, result in enumerate(results) if result is None], dtype=np.int64)
+            for segment in reversed(self._segments):
+                if not len(missing):
+                    break
+                found, positions = segment.find(np.array([keys[i] for i in missing], dtype="S16"))
+                for i, position in zip(missing[found], positions[found]):
+                    results[i] = segment.record(int(position))
+                missing = missing[~found]
+        return results
+
+    def get_raw(self, chunk_id: str) -> Optional[memoryview]:
+        return self.get_raw_many([chunk_id])[0]
+
+    def get_many(self, chunk_ids: list[str]) -> list[Optional[dict[str, Any]]]:
+        return [orjson.loads(raw) if raw is not None else None for raw in self.get_raw_many(chunk_ids)]
+
+    def get(self, chunk_id: str) -> Optional[dict[str, Any]]:
+        return self.get_many([chunk_id])[0]
+
+    def stats(self) -> dict:
+        with self._lock:
+            self._refresh_locked()
+            return {
+                "segments": len(self._segments),
+                "records": sum(len(segment.index) for segment in self._segments),
+                "bytes": sum(len(segment.records) for segment in self._segments),
+                "pending": len(self._pending),
+            }
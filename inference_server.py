@@ -0,0 +1,48 @@
+"""Inference sidecar: hosts the embedder and reranker for all API workers on a host.
+
+    INFERENCE_SIDECAR=/tmp/rag-inference.sock python inference_server.py --torch-threads 8
+    INFERENCE_SIDECAR=/tmp/rag-inference.sock uvicorn app:app --workers 4
+
+Reads MODEL_DIR and INFERENCE_BACKEND like the API does.
+"""
+
+import warnings
+warnings.filterwarnings("ignore", category=FutureWarning)
+warnings.filterwarnings("ignore", category=UserWarning)
+
+from dotenv import load_dotenv
+load_dotenv()
+
+import argparse
+import asyncio
+import os
+
+from helpers.rag_helpers.sidecar import InferenceServer
+from services.rag_services.embedding_service import EMBEDDING_MODEL
+from services.rag_services.retrieval_service import RERANKER_MODEL
+
+DEFAULT_SOCKET = "/tmp/rag-inference.sock"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--socket", default=os.getenv("INFERENCE_SIDECAR", DEFAULT_SOCKET))
+    parser.add_argument("--torch-threads", type=int, default=None, help="Defaults to torch's own choice")
+    parser.add_argument("--workers", type=int, default=1, help="Forward passes run at once")
+    args = parser.parse_args()
+
+    server = InferenceServer(
+        args.socket,
+        embedding_model=EMBEDDING_MODEL,
+        reranker_model=RERANKER_MODEL,
+        backend=os.getenv("INFERENCE_BACKEND", "torch"),
+        model_dir=os.getenv("MODEL_DIR"),
+        torch_threads=args.torch_threads,
+        workers=args.workers,
+    )
+    print(f"inference sidecar listening on {args.socket} ({server.torch_threads} torch threads)")
+    asyncio.run(server.serve_forever())
+
+
+if __name__ == "__main__":
+    main()
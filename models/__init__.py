@@ -7,11 +7,16 @@ from .rag_models import (
     CrawledPage,
     VectorChunk,
     ChatRequest,
+    BatchQueryRequest,
+    SearchRequest,
     IngestionRequest,
     ReindexRequest,
+    MigrationRequest,
     ChatResponse,
     AdminStats,
     Source,
+    SearchResponse,
+    ScoreBreakdown,
 )
 
 __all__ = [
@@ -21,10 +26,15 @@ __all__ = [
     "CrawledPage",
     "VectorChunk",
     "ChatRequest",
+    "BatchQueryRequest",
+    "SearchRequest",
     "IngestionRequest",
     "ReindexRequest",
+    "MigrationRequest",
     "ChatResponse",
     "AdminStats",
     "Source",
+    "SearchResponse",
+    "ScoreBreakdown",
 ]
 
@@ -4,8 +4,8 @@ from .content_type import ContentType
 from .crawled_page import CrawledPage
 from .vector_chunk import VectorChunk
 
-from .requests import ChatRequest, IngestionRequest, ReindexRequest
-from .responses import ChatResponse, AdminStats, Source
+from .requests import ChatRequest, BatchQueryRequest, SearchRequest, IngestionRequest, ReindexRequest, MigrationRequest
+from .responses import ChatResponse, AdminStats, Source, SearchResponse, ScoreBreakdown
 
 __all__ = [
     "Chunk",
@@ -14,9 +14,14 @@ __all__ = [
     "CrawledPage",
     "VectorChunk",
     "ChatRequest",
+    "BatchQueryRequest",
+    "SearchRequest",
     "IngestionRequest",
     "ReindexRequest",
+    "MigrationRequest",
     "ChatResponse",
     "AdminStats",
     "Source",
+    "SearchResponse",
+    "ScoreBreakdown",
 ]
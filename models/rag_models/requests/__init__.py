@@ -1,9 +1,15 @@
 from .chat_request import ChatRequest
+from .batch_query_request import BatchQueryRequest
+from .search_request import SearchRequest
 from .ingestion_request import IngestionRequest
 from .reindex_request import ReindexRequest
+from .migration_request import MigrationRequest
 
 __all__ = [
     "ChatRequest",
+    "BatchQueryRequest",
+    "SearchRequest",
     "IngestionRequest",
     "ReindexRequest",
+    "MigrationRequest",
 ]
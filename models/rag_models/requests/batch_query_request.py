@@ -0,0 +1,17 @@
+from typing import Annotated, Any, Literal, Optional
+
+from pydantic import BaseModel, Field
+
+
+class BatchQueryRequest(BaseModel):
+
+    queries: list[Annotated[str, Field(min_length=1, max_length=2000)]] = Field(
+        ..., description="User queries, answered independently", min_length=1, max_length=500
+    )
+    filters: Optional[dict[str, Any]] = Field(
+        None, description="Retrieval filters applied to every query (same language as ChatRequest.filters)"
+    )
+    search_profile: Optional[Literal["fast", "balanced", "exact"]] = Field(
+        None,
+        description="Vector search precision; defaults to the deployment profile",
+    )
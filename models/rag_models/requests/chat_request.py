@@ -1,4 +1,4 @@
-from typing import Any, Optional
+from typing import Any, Literal, Optional
 
 from pydantic import BaseModel, Field
 
@@ -7,6 +7,22 @@ class ChatRequest(BaseModel):
 
     query: str = Field(..., description="User query", min_length=1, max_length=2000)
     filters: Optional[dict[str, Any]] = Field(
-        None, description="Optional filters for retrieval"
+        None,
+        description=(
+            "Optional retrieval filters keyed by payload field: a value for exact match, "
+            "a list for any-of, or an object with match/any/prefix/gt/gte/lt/lte/not. "
+            'A top-level "not" negates a nested filter.'
+        ),
+        examples=[
+            {
+                "url": {"prefix": "https://www.irs.gov/forms-pubs"},
+                "crawl_ts": {"gte": "2025-01-01T00:00:00Z"},
+                "not": {"content_type": "pdf"},
+            }
+        ],
+    )
+    search_profile: Optional[Literal["fast", "balanced", "exact"]] = Field(
+        None,
+        description="Vector search precision; defaults to the deployment profile",
     )
     json: bool = Field(False, description="Return JSON response format")
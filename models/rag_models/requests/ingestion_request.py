@@ -7,6 +7,9 @@ class IngestionRequest(BaseModel):
     seed_url: str = Field(default="https://www.irs.gov")
     max_pages: int = Field(default=100, ge=1, le=10000)
     concurrency: int = Field(default=2, ge=1, le=10)
+    fetch_concurrency: int = Field(default=4, ge=1, le=16)
+    embed_batch_size: int = Field(default=64, ge=1, le=512)
+    upsert_batch_size: int = Field(default=256, ge=1, le=2048)
     allow_prefix: Optional[list[str]] = Field(default=None)
     only_html: bool = Field(default=False)
     only_pdf: bool = Field(default=False)
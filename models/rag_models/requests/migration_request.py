@@ -0,0 +1,10 @@
+from typing import Literal
+
+from pydantic import BaseModel, Field
+
+
+class MigrationRequest(BaseModel):
+
+    quantization: Literal["none", "int8", "binary"] = Field(
+        "int8", description="Target vector quantization for the collection"
+    )
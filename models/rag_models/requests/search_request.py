@@ -0,0 +1,20 @@
+from typing import Any, Literal, Optional
+
+from pydantic import BaseModel, Field
+
+
+class SearchRequest(BaseModel):
+
+    query: str = Field(..., description="User query", min_length=1, max_length=2000)
+    filters: Optional[dict[str, Any]] = Field(
+        None, description="Retrieval filters (same language as ChatRequest.filters)"
+    )
+    search_profile: Optional[Literal["fast", "balanced", "exact"]] = Field(
+        None,
+        description="Vector search precision; defaults to the deployment profile",
+    )
+    offset: int = Field(0, ge=0, le=90, description="Number of ranked results to skip")
+    limit: int = Field(10, ge=1, le=50, description="Number of results to return")
+    rerank: bool = Field(True, description="Rerank candidates with the cross-encoder")
+    include_scores: bool = Field(False, description="Include the per-result score breakdown")
+    include_vector: bool = Field(False, description="Include the query embedding")
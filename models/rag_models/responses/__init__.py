@@ -1,9 +1,12 @@
 from .chat_response import ChatResponse
 from .admin_stats import AdminStats
 from .source import Source
+from .search_response import SearchResponse, ScoreBreakdown
 
 __all__ = [
     "ChatResponse",
     "AdminStats",
     "Source",
+    "SearchResponse",
+    "ScoreBreakdown",
 ]
@@ -1,5 +1,5 @@
 from datetime import datetime
-from typing import Optional
+from typing import Any, Optional
 from pydantic import BaseModel
 
 
@@ -10,3 +10,5 @@ class AdminStats(BaseModel):
     last_updated: Optional[datetime] = None
     embedding_model: str
     vector_size: int
+    quantization: Optional[str] = None
+    llm_queue: Optional[dict[str, Any]] = None
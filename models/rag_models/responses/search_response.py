@@ -0,0 +1,27 @@
+from typing import Optional
+
+from pydantic import BaseModel, Field
+
+from models.rag_models.responses.source import Source
+
+
+class ScoreBreakdown(BaseModel):
+
+    vector_score: Optional[float] = Field(
+        None, description="Cosine similarity from the dense search; None for hits found only by BM25"
+    )
+    bm25_score: Optional[float] = Field(None, description="BM25 score when lexical retrieval is enabled")
+    rrf_score: Optional[float] = Field(None, description="Reciprocal-rank fusion score of dense and BM25 ranks")
+    rerank_score: Optional[float] = Field(None, description="Raw cross-encoder score when reranked")
+
+
+class SearchResponse(BaseModel):
+
+    query: str
+    sources: list[Source]
+    offset: int
+    limit: int
+    total_candidates: int = Field(..., description="Ranked candidates available for paging")
+    reranked: bool
+    score_breakdown: Optional[list[ScoreBreakdown]] = None
+    query_vector: Optional[list[float]] = None
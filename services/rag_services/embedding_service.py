@@ -1,16 +1,66 @@
-from typing import Union, overload
+import asyncio
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import Optional, Union, overload
 import numpy as np
-import torch
-from sentence_transformers import SentenceTransformer
+
+from helpers.rag_helpers.batching import MicroBatcher
+from helpers.rag_helpers.caches import EmbeddingCache
+from helpers.rag_helpers.sidecar import RemoteSentenceEncoder, SidecarClient
 
 EMBEDDING_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+EMBEDDING_BACKEND = "torch"
+INFERENCE_WORKERS = 2
+QUERY_CACHE_SIZE = 10000
+QUERY_CACHE_TTL_SECONDS = 7 * 24 * 3600
+QUERY_CACHE_DB_PATH = "data/cache/query_embeddings.sqlite"
+BATCH_MAX_SIZE = 32
+BATCH_MAX_WAIT_MS = 2.0
+BATCH_MAX_IN_FLIGHT = 2
+# A single query and a full micro-batch of queries.
+WARMUP_BATCH_SIZES = (1, BATCH_MAX_SIZE)
+WARMUP_TEXT = "How do I check the status of my federal tax refund after filing Form 1040?"
 
 
 class EmbeddingService:
-    def __init__(self, model_name: str = EMBEDDING_MODEL):
+    def __init__(
+        self,
+        model_name: str = EMBEDDING_MODEL,
+        backend: str = EMBEDDING_BACKEND,
+        executor: Optional[Executor] = None,
+        cache: Optional[EmbeddingCache] = None,
+        batch_max_size: int = BATCH_MAX_SIZE,
+        batch_max_wait_ms: float = BATCH_MAX_WAIT_MS,
+        model_dir: Optional[str] = None,
+        sidecar: Optional[SidecarClient] = None,
+    ):
         self.model_name = model_name
+        self.backend = backend
+        self.executor = executor or ThreadPoolExecutor(max_workers=INFERENCE_WORKERS)
+        # Quantized backends produce slightly different vectors, so they get their own keys.
+        self.cache = cache or EmbeddingCache(
+            f"{model_name}@{backend}",
+            max_size=QUERY_CACHE_SIZE,
+            ttl_seconds=QUERY_CACHE_TTL_SECONDS,
+            db_path=QUERY_CACHE_DB_PATH,
+        )
+        self.batcher = MicroBatcher(
+            self._embed_queries,
+            self.executor,
+            max_batch_size=batch_max_size,
+            max_wait_ms=batch_max_wait_ms,
+            max_in_flight=BATCH_MAX_IN_FLIGHT,
+        )
         self.device = "cpu"
-        self.model = SentenceTransformer(model_name, device=self.device)
+        if sidecar is not None:
+            # The sidecar hosts the model; this worker loads nothing.
+            self.model = RemoteSentenceEncoder(sidecar)
+        else:
+            # Imported here so importing the services package does not load torch.
+            from helpers.rag_helpers.inference import load_embedding_model
+
+            self.model = load_embedding_model(
+                model_name, backend=backend, device=self.device, model_dir=model_dir
+            )
         self.vector_size = self.model.get_sentence_embedding_dimension()
 
     @overload
@@ -20,11 +70,49 @@ class EmbeddingService:
     def get_embedding(self, text: list[str]) -> np.ndarray: ...
 
     def get_embedding(self, text: Union[str, list[str]]) -> np.ndarray:
+        # Only single query strings are cached; batches come from ingestion.
         if isinstance(text, str):
-            text = [text]
-        
-        embeddings = self.model.encode(text, show_progress_bar=False, convert_to_numpy=True)
-        embeddings = embeddings.astype(np.float32)
-        
+            return self._embed_queries([text])[0]
+
+        embeddings = self._encode(text)
         return embeddings[0] if len(text) == 1 else embeddings
 
+    def _encode(self, texts: list[str]) -> np.ndarray:
+        embeddings = self.model.encode(texts, show_progress_bar=False, convert_to_numpy=True)
+        return embeddings.astype(np.float32)
+
+    def _embed_queries(self, texts: list[str]) -> list[np.ndarray]:
+        results = [self.cache.get(text) for text in texts]
+        missing = [i for i, result in enumerate(results) if result is None]
+        if missing:
+            encoded = self._encode([texts[i] for i in missing])
+            for i, embedding in zip(missing, encoded):
+                self.cache.put(texts[i], embedding)
+                results[i] = embedding
+        return results
+
+    async def get_embedding_async(self, text: Union[str, list[str]]) -> np.ndarray:
+        if isinstance(text, str):
+            cached = self.cache.get(text, include_disk=False)
+            if cached is not None:
+                return cached
+            return await self.batcher.submit(text)
+
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, self.get_embedding, text)
+
+    async def get_query_embeddings_async(self, texts: list[str]) -> list[np.ndarray]:
+        """Embed many queries with one ``encode`` call for the cache misses."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, self._embed_queries, texts)
+
+    def warmup(self, batch_sizes: tuple[int, ...] = WARMUP_BATCH_SIZES) -> None:
+        # Straight to the model: warmup texts must not land in the query cache.
+        for size in batch_sizes:
+            self._encode([WARMUP_TEXT] * size)
+
+    def cache_stats(self) -> dict:
+        return self.cache.stats()
+
+    def batch_stats(self) -> dict:
+        return self.batcher.stats()
@@ -1,37 +1,61 @@
+from typing import Optional
+
 from qdrant_client.models import PointStruct
 
-from utils import compute_content_hash
+from helpers.rag_helpers.caches import CollectionVersions
+from helpers.rag_helpers.filters import PAYLOAD_INDEXES
+from helpers.rag_helpers.lexical import chunk_form_numbers, forms_from_url
+from helpers.rag_helpers.storage import ChunkStore
+from utils import compute_content_hash, url_path_prefixes
 
 EMBEDDING_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
 
 
 class IngestionService:
-    def __init__(self, vector_db_service, embedding_model: str = EMBEDDING_MODEL):
+    def __init__(
+        self,
+        vector_db_service,
+        embedding_model: str = EMBEDDING_MODEL,
+        collection_versions: Optional[CollectionVersions] = None,
+        chunk_store: Optional[ChunkStore] = None,
+    ):
         self.vector_db_service = vector_db_service
         self.embedding_model = embedding_model
+        self.collection_versions = collection_versions or CollectionVersions()
+        # With a chunk store, Qdrant only keeps the payload fields filters need.
+        self.chunk_store = chunk_store
 
     def upsert_chunks(self, chunks: list, embeddings: list, collection_name: str):
 
         points = []
         for chunk, embedding in zip(chunks, embeddings):
-            point = PointStruct(
-                id=chunk.chunk_id,
-                vector=embedding.tolist(),
-                payload={
-                    "url": str(chunk.page_url),
-                    "title": chunk.chunk_text[:100] if chunk.chunk_text else "",
-                    "section_heading": chunk.section_heading,
-                    "text": chunk.chunk_text,
-                    "char_start": chunk.char_offset_start,
-                    "char_end": chunk.char_offset_end,
-                    "content_type": chunk.content_type.value,
-                    "crawl_ts": chunk.crawl_timestamp.isoformat(),
-                    "language": "en",
-                    "embedding_model": self.embedding_model,
-                    "tokens": len(chunk.chunk_text) // 4,
-                    "hash": compute_content_hash(chunk.chunk_text),
-                },
-            )
-            points.append(point)
+            payload = {
+                "url": str(chunk.page_url),
+                "url_prefixes": url_path_prefixes(str(chunk.page_url)),
+                "title": chunk.chunk_text[:100] if chunk.chunk_text else "",
+                "section_heading": chunk.section_heading,
+                "text": chunk.chunk_text,
+                "char_start": chunk.char_offset_start,
+                "char_end": chunk.char_offset_end,
+                "content_type": chunk.content_type.value,
+                "crawl_ts": chunk.crawl_timestamp.isoformat(),
+                "language": "en",
+                "embedding_model": self.embedding_model,
+                "tokens": len(chunk.chunk_text) // 4,
+                "hash": compute_content_hash(chunk.chunk_text),
+                "form_numbers": sorted(
+                    set(chunk_form_numbers(chunk.chunk_text)) | set(forms_from_url(str(chunk.page_url)))
+                ),
+            }
+            if self.chunk_store is not None:
+                self.chunk_store.put(chunk.chunk_id, payload)
+                payload = {key: value for key, value in payload.items() if key in PAYLOAD_INDEXES}
+
+            points.append(PointStruct(id=chunk.chunk_id, vector=embedding.tolist(), payload=payload))
 
         self.vector_db_service.client.upsert(collection_name=collection_name, points=points)
+        self.collection_versions.bump(collection_name)
+
+    def flush(self) -> None:
+        if self.chunk_store is not None:
+            self.chunk_store.flush()
@@ -1,24 +1,28 @@
 import httpx
 import orjson
-from typing import Any, Optional
+from typing import Any, AsyncIterator, Optional
 
-OLLAMA_MODEL = "llama3.1:8b"
+from helpers.rag_helpers.admission import AdmissionQueue
+from helpers.rag_helpers.metrics import LLM_TOKENS
 
-RAG_SYSTEM_PROMPT = """SYSTEM:
-You are a factual assistant that answers only from the provided IRS.gov knowledge snippets. You must cite sources and never invent facts.
+OLLAMA_MODEL = "llama3.1:8b"
 
-CONTEXT:
-{context}
+# How long Ollama keeps the model (and its KV cache) loaded after the last request.
+# A negative duration pins it; "0" unloads immediately.
+OLLAMA_KEEP_ALIVE = "30m"
+# Fixed per request: changing num_ctx between requests makes Ollama reload the model.
+OLLAMA_NUM_CTX = 4096
 
-USER:
-{query}
+# Sent as the ``system`` field and identical for every request, so Ollama can reuse
+# the KV cache for this prefix and only prefill the context and question.
+RAG_SYSTEM_PROMPT = """You are a factual assistant that answers only from the provided IRS.gov knowledge snippets. You must cite sources and never invent facts.
 
-ASSISTANT INSTRUCTIONS:
+INSTRUCTIONS:
 - Use only the provided context. If it does not support an answer, say: "I don't have verifiable information in the knowledge base for that query." Offer top similar sources with excerpts.
 
 - Respond in GitHub-Flavored Markdown (GFM).
-- Begin your answer with a level-3 heading containing the user question exactly:
-  "### {query}"
+- Begin your answer with a level-3 heading containing the user question exactly as asked, e.g.:
+  "### <question>"
 - Use concise paragraphs and bullet lists for steps and key points.
 - Bold key labels or terms (e.g., **Eligibility**, **Amount**, **Deadline**).
 
@@ -33,12 +37,29 @@ ASSISTANT INSTRUCTIONS:
   "I am not a lawyer; for legal or tax-filing advice consult a qualified tax professional or the IRS."
 """
 
+RAG_USER_PROMPT = """CONTEXT:
+{context}
+
+QUESTION:
+{query}
+"""
+
 class LLMService:
-    def __init__(self, ollama_host: str):
+    def __init__(
+        self,
+        ollama_host: str,
+        keep_alive: str = OLLAMA_KEEP_ALIVE,
+        admission: Optional[AdmissionQueue] = None,
+    ):
         self.client = httpx.Client(base_url=ollama_host, timeout=120.0)
+        self.async_client = httpx.AsyncClient(base_url=ollama_host, timeout=120.0)
         self.model_name = OLLAMA_MODEL
+        self.system_prompt = RAG_SYSTEM_PROMPT
+        self.keep_alive = keep_alive
+        # Shared by every async generation so the Ollama host sees bounded concurrency.
+        self.admission = admission or AdmissionQueue()
 
-    def build_rag_prompt(self, chunks: list[dict[str, Any]], user_query: str) -> str:
+    def build_context(self, chunks: list[dict[str, Any]]) -> str:
         ctx_lines = []
         for chunk in chunks:
             ctx_obj = {
@@ -51,23 +72,82 @@ class LLMService:
             }
             ctx_lines.append(orjson.dumps(ctx_obj).decode("utf-8"))
 
-        ctx_block = "\n".join(ctx_lines)
-        return RAG_SYSTEM_PROMPT.format(context=ctx_block, query=user_query)
+        return "\n".join(ctx_lines)
 
-    def generate(self, prompt: str, **kwargs: Any) -> str:
-        response = self.client.post(
-            "/api/generate",
-            json={
-                "model": self.model_name,
-                "prompt": prompt,
-                "stream": False,
-                "options": {
-                    "temperature": kwargs.get("temperature", 0.0),
-                    "num_predict": kwargs.get("max_tokens", 500),
-                },
+    def build_rag_prompt(self, chunks: list[dict[str, Any]], user_query: str) -> str:
+        """Per-request part of the prompt; the fixed instructions go in ``system``."""
+        return RAG_USER_PROMPT.format(context=self.build_context(chunks), query=user_query)
+
+    def _generate_payload(self, prompt: str, stream: bool = False, **kwargs: Any) -> dict[str, Any]:
+        return {
+            "model": self.model_name,
+            "system": kwargs.get("system", self.system_prompt),
+            "prompt": prompt,
+            "stream": stream,
+            "keep_alive": self.keep_alive,
+            "options": {
+                "temperature": kwargs.get("temperature", 0.0),
+                "num_predict": kwargs.get("max_tokens", 500),
+                "num_ctx": OLLAMA_NUM_CTX,
             },
+        }
+
+    def generate(self, prompt: str, **kwargs: Any) -> str:
+        response = self.client.post("/api/generate", json=self._generate_payload(prompt, **kwargs))
+        response.raise_for_status()
+        result = response.json()
+        return result.get("response", "").strip()
+
+    async def check_async(self) -> str:
+        """Raise if Ollama is unreachable or does not have the model pulled."""
+        response = await self.async_client.get("/api/tags")
+        response.raise_for_status()
+        names = {model.get("name") for model in response.json().get("models", [])}
+        if self.model_name not in names:
+            raise RuntimeError(f"Ollama does not have {self.model_name} pulled")
+        return f"connected; {self.model_name} available"
+
+    async def preload_async(self) -> None:
+        # A generate request without a prompt loads the model and applies keep_alive.
+        response = await self.async_client.post(
+            "/api/generate", json={"model": self.model_name, "keep_alive": self.keep_alive}
         )
         response.raise_for_status()
+
+    def _observe_tokens(self, result: dict[str, Any]) -> None:
+        if "prompt_eval_count" in result:
+            LLM_TOKENS.labels("prompt").observe(result["prompt_eval_count"])
+        if "eval_count" in result:
+            LLM_TOKENS.labels("completion").observe(result["eval_count"])
+
+    async def generate_async(self, prompt: str, priority: str = "interactive", **kwargs: Any) -> str:
+        """Raises ``OverloadedError`` if the ``priority`` lane is full or its wait expires."""
+        async with self.admission.slot(priority):
+            response = await self.async_client.post(
+                "/api/generate", json=self._generate_payload(prompt, **kwargs)
+            )
+        response.raise_for_status()
         result = response.json()
+        self._observe_tokens(result)
         return result.get("response", "").strip()
 
+    async def generate_stream_async(
+        self, prompt: str, priority: str = "interactive", **kwargs: Any
+    ) -> AsyncIterator[str]:
+        payload = self._generate_payload(prompt, stream=True, **kwargs)
+        # The slot is held until the stream finishes or the consumer closes it.
+        async with self.admission.slot(priority):
+            async with self.async_client.stream("POST", "/api/generate", json=payload) as response:
+                response.raise_for_status()
+                async for line in response.aiter_lines():
+                    if not line:
+                        continue
+                    chunk = orjson.loads(line)
+                    if chunk.get("response"):
+                        yield chunk["response"]
+                    if chunk.get("done"):
+                        self._observe_tokens(chunk)
+                        break
+
+    def queue_stats(self) -> dict:
+        return self.admission.stats()
@@ -1,35 +1,137 @@
+import time
 from typing import Optional, Any
 
-from qdrant_client import QdrantClient
+from qdrant_client import AsyncQdrantClient, QdrantClient
 from qdrant_client.models import (
+    BinaryQuantization,
+    BinaryQuantizationConfig,
+    Disabled,
     Distance,
     HnswConfigDiff,
     OptimizersConfigDiff,
+    QuantizationSearchParams,
+    ScalarQuantization,
+    ScalarQuantizationConfig,
+    ScalarType,
+    SearchParams,
+    SearchRequest,
     VectorParams,
+    VectorParamsDiff,
     Filter,
+    HasIdCondition,
 )
 
+from helpers.rag_helpers.filters import PAYLOAD_INDEXES
+
 HNSW_M = 64
 HNSW_EF_CONSTRUCTION = 128
+# "none", "int8" or "binary" for new collections. Quantized vectors stay in RAM and the fp32
+# originals go on disk, so quantizing is opt-in (QDRANT_QUANTIZATION in dependencies.py).
+QUANTIZATION = "none"
+QUANTIZATIONS = ("none", "int8", "binary")
+# How long a worker trusts the quantization it last read from a collection, so a
+# migration made through another worker changes its search params within this window.
+QUANTIZATION_REFRESH_S = 60.0
+QUANTIZATION_QUANTILE = 0.99
+# Binary codes lose far more than int8, so rescoring pulls a wider candidate set.
+BINARY_OVERSAMPLING_FACTOR = 2.0
+SEARCH_PROFILE = "balanced"
+SEARCH_PROFILES = {
+    "fast": {"hnsw_ef": 64, "rescore": False, "oversampling": 1.0},
+    "balanced": {"hnsw_ef": 128, "rescore": True, "oversampling": 2.0},
+    "exact": {"exact": True},
+}
+
 
 class QdrantService:
-    def __init__(self, url: str, api_key: Optional[str] = None):
+    def __init__(
+        self,
+        url: str,
+        api_key: Optional[str] = None,
+        quantization: str = QUANTIZATION,
+        search_profile: str = SEARCH_PROFILE,
+    ):
         self.url = url
         self.api_key = api_key
+        self.quantization = quantization
+        self.search_profile = search_profile
         self.client = QdrantClient(url=self.url, api_key=self.api_key)
+        self.async_client = AsyncQdrantClient(url=self.url, api_key=self.api_key)
+        self._search_params = self._all_search_params()
+        self._collection_quantization: dict[str, tuple[str, float]] = {}
+
+    def _all_search_params(self) -> dict[tuple[str, str], SearchParams]:
+        return {
+            (quantization, profile): self._build_search_params(profile, quantization)
+            for quantization in QUANTIZATIONS
+            for profile in SEARCH_PROFILES
+        }
+
+    def _build_search_params(self, profile: str, quantization: str) -> SearchParams:
+        settings = SEARCH_PROFILES[profile]
+        if settings.get("exact"):
+            return SearchParams(exact=True, quantization=QuantizationSearchParams(ignore=True))
+
+        oversampling = settings["oversampling"]
+        if quantization == "binary":
+            oversampling *= BINARY_OVERSAMPLING_FACTOR
+        return SearchParams(
+            hnsw_ef=settings["hnsw_ef"],
+            quantization=QuantizationSearchParams(
+                ignore=False,
+                rescore=settings["rescore"],
+                oversampling=oversampling,
+            ),
+        )
+
+    def search_params(self, profile: Optional[str] = None, quantization: Optional[str] = None) -> SearchParams:
+        """Params for ``profile`` on a collection quantized as ``quantization`` (default: new collections')."""
+        profile = profile or self.search_profile
+        if profile not in SEARCH_PROFILES:
+            raise ValueError(f"Unknown search profile: {profile}")
+        return self._search_params[(quantization or self.quantization, profile)]
+
+    def _remember_quantization(self, collection: str, config: Any) -> str:
+        quantization = self._quantization_name(config)
+        self._collection_quantization[collection] = (quantization, time.monotonic())
+        return quantization
+
+    def _known_quantization(self, collection: str) -> Optional[str]:
+        known = self._collection_quantization.get(collection)
+        if known is None or time.monotonic() - known[1] > QUANTIZATION_REFRESH_S:
+            return None
+        return known[0]
+
+    def collection_quantization(self, collection: str) -> str:
+        """The quantization ``collection`` actually has, re-read every QUANTIZATION_REFRESH_S."""
+        quantization = self._known_quantization(collection)
+        if quantization is None:
+            info = self.client.get_collection(collection)
+            quantization = self._remember_quantization(collection, info.config.quantization_config)
+        return quantization
+
+    async def collection_quantization_async(self, collection: str) -> str:
+        quantization = self._known_quantization(collection)
+        if quantization is None:
+            info = await self.async_client.get_collection(collection)
+            quantization = self._remember_quantization(collection, info.config.quantization_config)
+        return quantization
 
     def ensure_collection(self, collection: str, vector_size: int) -> None:
         collections = self.client.get_collections().collections
         collection_names = [c.name for c in collections]
 
         if collection not in collection_names:
+            quantized = self.quantization != "none"
             self.client.create_collection(
                 collection_name=collection,
                 vectors_config=VectorParams(
                     size=vector_size,
                     distance=Distance.COSINE,
+                    on_disk=quantized,
                 ),
                 optimizers_config=OptimizersConfigDiff(memmap_threshold=20000),
+                quantization_config=self._quantization_config(self.quantization),
             )
 
         try:
@@ -47,6 +149,63 @@ class QdrantService:
         except Exception as e:
             pass
 
+        self.ensure_payload_indexes(collection)
+
+    def ensure_payload_indexes(self, collection: str) -> None:
+        existing = self.client.get_collection(collection).payload_schema or {}
+        for field_name, field_schema in PAYLOAD_INDEXES.items():
+            if field_name in existing:
+                continue
+            try:
+                self.client.create_payload_index(
+                    collection_name=collection,
+                    field_name=field_name,
+                    field_schema=field_schema,
+                )
+            except Exception as e:
+                pass
+
+    def _quantization_config(self, quantization: str) -> Any:
+        if quantization == "int8":
+            return ScalarQuantization(
+                scalar=ScalarQuantizationConfig(
+                    type=ScalarType.INT8,
+                    quantile=QUANTIZATION_QUANTILE,
+                    always_ram=True,
+                )
+            )
+        if quantization == "binary":
+            return BinaryQuantization(binary=BinaryQuantizationConfig(always_ram=True))
+        if quantization == "none":
+            return None
+        raise ValueError(f"Unknown quantization: {quantization}")
+
+    def migrate_quantization(self, collection: str, quantization: str) -> dict:
+        """Switch an existing collection to ``quantization`` in place.
+
+        Qdrant rebuilds the quantized vectors segment by segment in the
+        background and keeps serving searches from the originals meanwhile,
+        so the collection stays online. Poll ``get_collection_info`` until the
+        status is green again. Moving originals to disk follows the same rule
+        as ``ensure_collection``: on disk whenever the collection is quantized.
+        This worker searches with the new params at once; other workers pick
+        them up within QUANTIZATION_REFRESH_S.
+        """
+        config = self._quantization_config(quantization)
+        self.client.update_collection(
+            collection_name=collection,
+            vectors_config={"": VectorParamsDiff(on_disk=config is not None)},
+            quantization_config=config if config is not None else Disabled.DISABLED,
+        )
+        return self.get_collection_info(collection)
+
+    async def check_async(self, collection: str) -> str:
+        """Raise if Qdrant is unreachable; describe the collection's state otherwise."""
+        if not await self.async_client.collection_exists(collection):
+            return f"connected; collection {collection} does not exist yet"
+        info = await self.async_client.get_collection(collection)
+        return f"connected; {info.points_count} points, status {info.status}"
+
     def get_collection_info(self, collection: str) -> dict:
         info = self.client.get_collection(collection)
         return {
@@ -54,8 +213,17 @@ class QdrantService:
             "vector_size": info.config.params.vectors.size,
             "points_count": info.points_count,
             "status": info.status,
+            "quantization": self._remember_quantization(collection, info.config.quantization_config),
+            "vectors_on_disk": bool(info.config.params.vectors.on_disk),
         }
 
+    def _quantization_name(self, config: Any) -> str:
+        if isinstance(config, ScalarQuantization):
+            return "int8"
+        if isinstance(config, BinaryQuantization):
+            return "binary"
+        return "none"
+
     def search(
         self,
         collection_name: str,
@@ -63,6 +231,8 @@ class QdrantService:
         limit: int,
         score_threshold: float,
         query_filter: Optional[Filter] = None,
+        profile: Optional[str] = None,
+        with_payload: bool = True,
     ) -> list[Any]:
         return self.client.search(
             collection_name=collection_name,
@@ -70,5 +240,127 @@ class QdrantService:
             limit=limit,
             score_threshold=score_threshold,
             query_filter=query_filter,
+            search_params=self.search_params(profile, self.collection_quantization(collection_name)),
+            with_payload=with_payload,
+        )
+
+    async def search_async(
+        self,
+        collection_name: str,
+        query_vector: list[float],
+        limit: int,
+        score_threshold: float,
+        query_filter: Optional[Filter] = None,
+        profile: Optional[str] = None,
+        with_payload: bool = True,
+    ) -> list[Any]:
+        return await self.async_client.search(
+            collection_name=collection_name,
+            query_vector=query_vector,
+            limit=limit,
+            score_threshold=score_threshold,
+            query_filter=query_filter,
+            search_params=self.search_params(
+                profile, await self.collection_quantization_async(collection_name)
+            ),
+            with_payload=with_payload,
         )
 
+    def _search_requests(
+        self,
+        query_vectors: list[list[float]],
+        limit: int,
+        score_threshold: float,
+        query_filter: Optional[Filter],
+        params: SearchParams,
+        with_payload: bool,
+    ) -> list[SearchRequest]:
+        return [
+            SearchRequest(
+                vector=vector,
+                limit=limit,
+                score_threshold=score_threshold,
+                filter=query_filter,
+                params=params,
+                with_payload=with_payload,
+            )
+            for vector in query_vectors
+        ]
+
+    def search_batch(
+        self,
+        collection_name: str,
+        query_vectors: list[list[float]],
+        limit: int,
+        score_threshold: float,
+        query_filter: Optional[Filter] = None,
+        profile: Optional[str] = None,
+        with_payload: bool = True,
+    ) -> list[list[Any]]:
+        params = self.search_params(profile, self.collection_quantization(collection_name))
+        return self.client.search_batch(
+            collection_name=collection_name,
+            requests=self._search_requests(
+                query_vectors, limit, score_threshold, query_filter, params, with_payload
+            ),
+        )
+
+    async def search_batch_async(
+        self,
+        collection_name: str,
+        query_vectors: list[list[float]],
+        limit: int,
+        score_threshold: float,
+        query_filter: Optional[Filter] = None,
+        profile: Optional[str] = None,
+        with_payload: bool = True,
+    ) -> list[list[Any]]:
+        params = self.search_params(profile, await self.collection_quantization_async(collection_name))
+        return await self.async_client.search_batch(
+            collection_name=collection_name,
+            requests=self._search_requests(
+                query_vectors, limit, score_threshold, query_filter, params, with_payload
+            ),
+        )
+
+    def _ids_filter(self, ids: list[Any], query_filter: Optional[Filter]) -> Filter:
+        id_condition = HasIdCondition(has_id=ids)
+        if query_filter is None:
+            return Filter(must=[id_condition])
+        return Filter(
+            must=[id_condition, *(query_filter.must or [])],
+            should=query_filter.should,
+            must_not=query_filter.must_not,
+        )
+
+    def get_points(
+        self,
+        collection_name: str,
+        ids: list[Any],
+        query_filter: Optional[Filter] = None,
+        with_payload: bool = True,
+    ) -> list[Any]:
+        points, _ = self.client.scroll(
+            collection_name=collection_name,
+            scroll_filter=self._ids_filter(ids, query_filter),
+            limit=len(ids),
+            with_payload=with_payload,
+            with_vectors=False,
+        )
+        return points
+
+    async def get_points_async(
+        self,
+        collection_name: str,
+        ids: list[Any],
+        query_filter: Optional[Filter] = None,
+        with_payload: bool = True,
+    ) -> list[Any]:
+        points, _ = await self.async_client.scroll(
+            collection_name=collection_name,
+            scroll_filter=self._ids_filter(ids, query_filter),
+            limit=len(ids),
+            with_payload=with_payload,
+            with_vectors=False,
+        )
+        return points
@@ -1,16 +1,37 @@
+import asyncio
 from typing import Any, Optional
-from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import Executor, ThreadPoolExecutor
 
 import numpy as np
-import torch
-from qdrant_client import QdrantClient
-from qdrant_client.models import Filter, FieldCondition, MatchValue
-from transformers import AutoModelForSequenceClassification, AutoTokenizer
+from qdrant_client.models import Filter, FieldCondition, HasIdCondition, MatchAny
+
+from helpers.rag_helpers.filters import build_filter
+from helpers.rag_helpers.lexical import BM25Index, FormIndex
+from helpers.rag_helpers.metrics import CANDIDATES
+from helpers.rag_helpers.rerankers import RerankCascade, RerankEngine
+from helpers.rag_helpers.rerankers.cascade import PATH_SKIPPED
+from helpers.rag_helpers.sidecar import SidecarClient
+from helpers.rag_helpers.storage import ChunkStore
 
 SIMILARITY_CUTOFF = 0.22
 TOP_K = 20
 TOP_N = 3
 RERANKER_MODEL = "cross-encoder/ms-marco-MiniLM-L-6-v2"
+RERANKER_BACKEND = "torch"
+INFERENCE_WORKERS = 2
+# One query's worth of candidates: a full batch plus a partial one.
+WARMUP_PAIR_COUNTS = (1, TOP_K)
+WARMUP_PASSAGE = (
+    "You can check your refund status 24 hours after e-filing a current year return. "
+    "Have your Social Security number, filing status and exact refund amount ready."
+)
+LEXICAL_TOP_K = 20
+# With lexical recall in the first stage fewer fused candidates need reranking.
+FUSED_TOP_K = 12
+RRF_K = 60
+FORM_TOP_K = 8
+FORM_CANONICAL_LIMIT = 256
+SEARCH_BATCH_SIZE = 64
 
 
 class RetrievalService:
@@ -18,53 +39,180 @@ class RetrievalService:
         self,
         qdrant_service,
         reranker_model: str = RERANKER_MODEL,
-        batch_size: int = 8,
-        max_workers: int = 3,
+        backend: str = RERANKER_BACKEND,
+        batch_size: int = 16,
+        executor: Optional[Executor] = None,
+        lexical_index: Optional[BM25Index] = None,
+        form_index: Optional[FormIndex] = None,
+        chunk_store: Optional[ChunkStore] = None,
+        model_dir: Optional[str] = None,
+        sidecar: Optional[SidecarClient] = None,
+        cascade: Optional[RerankCascade] = None,
     ):
         self.qdrant_service = qdrant_service
+        # Without a cascade every candidate list is reranked in full.
+        self.cascade = cascade
+        self.lexical_index = lexical_index
+        self.form_index = form_index
+        # With a chunk store, searches return ids and scores only and payloads come from the store.
+        self.chunk_store = chunk_store
+        self.with_payload = chunk_store is None
         self.batch_size = batch_size
-        self.max_workers = max_workers
+        self.executor = executor or ThreadPoolExecutor(max_workers=INFERENCE_WORKERS)
+        self.backend = backend
         self.device = "cpu"
-        
-        self.tokenizer = AutoTokenizer.from_pretrained(reranker_model)
-        self.model = AutoModelForSequenceClassification.from_pretrained(reranker_model)
-        self.model.to(self.device)
-        self.model.eval()
 
-    def retrieve(
+        if sidecar is not None:
+            # The sidecar hosts the cross-encoder; this worker loads nothing.
+            self.tokenizer, self.model = None, None
+        else:
+            # Imported here so importing the services package does not load torch.
+            from helpers.rag_helpers.inference import load_reranker
+
+            self.tokenizer, self.model = load_reranker(
+                reranker_model, backend=backend, device=self.device, model_dir=model_dir
+            )
+
+        self.rerank_engine = RerankEngine(
+            self.tokenizer,
+            self.model,
+            self.executor,
+            device=self.device,
+            batch_size=batch_size,
+            remote=sidecar,
+        )
+
+    def _build_filter(self, filters: Optional[dict[str, Any]]) -> Optional[Filter]:
+        return build_filter(filters)
+
+    def _merge_filter(self, query_filter: Optional[Filter], condition: Any) -> Filter:
+        if query_filter is None:
+            return Filter(must=[condition])
+        return Filter(
+            must=[condition, *(query_filter.must or [])],
+            should=query_filter.should,
+            must_not=query_filter.must_not,
+        )
+
+    def _form_filters(
+        self, forms: list[str], query_filter: Optional[Filter], canonical_ids: list[str]
+    ) -> tuple[Optional[Filter], Filter]:
+        canonical_filter = None
+        if canonical_ids:
+            canonical_filter = self._merge_filter(query_filter, HasIdCondition(has_id=canonical_ids))
+
+        form_condition = FieldCondition(key="form_numbers", match=MatchAny(any=forms))
+        return canonical_filter, self._merge_filter(query_filter, form_condition)
+
+    def _canonical_ids(self, forms: list[str]) -> list[str]:
+        if self.form_index is None:
+            return []
+        return self.form_index.chunk_ids(forms, canonical_only=True, limit=FORM_CANONICAL_LIMIT)
+
+    def _canonical_limit(self, forms: list[str], top_n: int) -> int:
+        # With several forms their pages compete, so fetch enough for the reranker to choose.
+        return top_n if len(forms) == 1 else FORM_TOP_K
+
+    def retrieve_forms(
         self,
         collection: str,
         query_vec: np.ndarray,
-        top_k: int,
+        forms: list[str],
+        top_n: int,
         cutoff: float,
         filters: Optional[dict[str, Any]] = None,
-    ) -> list[dict[str, Any]]:
-        query_filter = None
-        if filters:
-            conditions = []
-            for key, value in filters.items():
-                if key == "content_type":
-                    conditions.append(
-                        FieldCondition(key="content_type", match=MatchValue(value=value))
-                    )
-            if conditions:
-                query_filter = Filter(must=conditions)
+        profile: Optional[str] = None,
+    ) -> tuple[list[dict[str, Any]], bool]:
+        """Form-number fast path. Returns ``(chunks, needs_rerank)``.
+
+        Canonical chunks of the form's own page that pass the similarity
+        cutoff come first; for a single form they are ranked by the dense
+        score alone and returned without reranking, for several forms they
+        still need it. Otherwise the search is narrowed to chunks whose
+        ``form_numbers`` payload matches, which leaves at most FORM_TOP_K
+        candidates for the cross-encoder.
+        """
+        canonical_filter, form_filter = self._form_filters(
+            forms, self._build_filter(filters), self._canonical_ids(forms)
+        )
+        if canonical_filter is not None:
+            hits = self.qdrant_service.search(
+                collection_name=collection,
+                query_vector=query_vec.tolist(),
+                limit=self._canonical_limit(forms, top_n),
+                score_threshold=cutoff,
+                query_filter=canonical_filter,
+                profile=profile,
+                with_payload=self.with_payload,
+            )
+            if hits:
+                return self._hits_to_chunks(hits), len(forms) > 1
 
         hits = self.qdrant_service.search(
             collection_name=collection,
             query_vector=query_vec.tolist(),
-            limit=top_k,
+            limit=FORM_TOP_K,
             score_threshold=cutoff,
-            query_filter=query_filter,
+            query_filter=form_filter,
+            profile=profile,
+            with_payload=self.with_payload,
+        )
+        return self._hits_to_chunks(hits), True
+
+    async def retrieve_forms_async(
+        self,
+        collection: str,
+        query_vec: np.ndarray,
+        forms: list[str],
+        top_n: int,
+        cutoff: float,
+        filters: Optional[dict[str, Any]] = None,
+        profile: Optional[str] = None,
+    ) -> tuple[list[dict[str, Any]], bool]:
+        # The form index is sqlite; keep its lookup off the event loop.
+        canonical_ids = await asyncio.get_running_loop().run_in_executor(None, self._canonical_ids, forms)
+        canonical_filter, form_filter = self._form_filters(forms, self._build_filter(filters), canonical_ids)
+        if canonical_filter is not None:
+            hits = await self.qdrant_service.search_async(
+                collection_name=collection,
+                query_vector=query_vec.tolist(),
+                limit=self._canonical_limit(forms, top_n),
+                score_threshold=cutoff,
+                query_filter=canonical_filter,
+                profile=profile,
+                with_payload=self.with_payload,
+            )
+            if hits:
+                return self._hits_to_chunks(hits), len(forms) > 1
+
+        hits = await self.qdrant_service.search_async(
+            collection_name=collection,
+            query_vector=query_vec.tolist(),
+            limit=FORM_TOP_K,
+            score_threshold=cutoff,
+            query_filter=form_filter,
+            profile=profile,
+            with_payload=self.with_payload,
         )
+        return self._hits_to_chunks(hits), True
 
+    def _payloads(self, hits: list[Any]) -> list[Optional[dict[str, Any]]]:
+        if self.chunk_store is None:
+            return [hit.payload or {} for hit in hits]
+        return self.chunk_store.get_many([str(hit.id) for hit in hits])
+
+    def _hits_to_chunks(self, hits: list[Any]) -> list[dict[str, Any]]:
         results = []
-        for hit in hits:
-            payload = hit.payload or {}
+        for hit, payload in zip(hits, self._payloads(hits)):
+            if payload is None:
+                # Not in the chunk store (yet); nothing to show for this hit.
+                continue
             results.append(
                 {
                     "id": hit.id,
-                    "score": hit.score,
+                    "score": getattr(hit, "score", 0.0),
+                    # Points fetched for lexical-only hits have no dense similarity.
+                    "vector_score": getattr(hit, "score", None),
                     "url": payload.get("url", ""),
                     "title": payload.get("title", ""),
                     "section_heading": payload.get("section_heading"),
@@ -80,49 +228,274 @@ class RetrievalService:
 
         return results
 
-    def rerank(self, query: str, chunks: list[dict[str, Any]], top_n: int) -> list[dict[str, Any]]:
-        batches = [
-            chunks[i : i + self.batch_size]
-            for i in range(0, len(chunks), self.batch_size)
+    def _fuse(
+        self,
+        dense_hits: list[Any],
+        lexical_hits: list[tuple[str, float]],
+        lexical_points: list[Any],
+        limit: int,
+    ) -> list[dict[str, Any]]:
+        points = {str(hit.id): hit for hit in dense_hits}
+        for point in lexical_points:
+            points.setdefault(str(point.id), point)
+
+        rrf: dict[str, float] = {}
+        for rank, hit in enumerate(dense_hits):
+            rrf[str(hit.id)] = 1.0 / (RRF_K + rank + 1)
+        bm25 = dict(lexical_hits)
+        for rank, (chunk_id, _) in enumerate(lexical_hits):
+            # Lexical hits missing from points were excluded by the filters.
+            if chunk_id in points:
+                rrf[chunk_id] = rrf.get(chunk_id, 0.0) + 1.0 / (RRF_K + rank + 1)
+
+        ordered = sorted(rrf, key=rrf.get, reverse=True)[:limit]
+        chunks = self._hits_to_chunks([points[chunk_id] for chunk_id in ordered])
+        for chunk in chunks:
+            chunk_id = str(chunk["id"])
+            chunk["rrf_score"] = rrf[chunk_id]
+            chunk["bm25_score"] = bm25.get(chunk_id, 0.0)
+        return chunks
+
+    def _observe_dense(self, hits: list[Any], top_k: int) -> None:
+        CANDIDATES.labels("dense").observe(len(hits))
+        # Slots the limit allowed but the similarity cutoff (or filters) left empty.
+        CANDIDATES.labels("cutoff_dropped").observe(max(top_k - len(hits), 0))
+
+    def _missing_ids(self, dense_hits: list[Any], lexical_hits: list[tuple[str, float]]) -> list[str]:
+        dense_ids = {str(hit.id) for hit in dense_hits}
+        return [chunk_id for chunk_id, _ in lexical_hits if chunk_id not in dense_ids]
+
+    def retrieve(
+        self,
+        collection: str,
+        query_vec: np.ndarray,
+        top_k: int,
+        cutoff: float,
+        filters: Optional[dict[str, Any]] = None,
+        query: Optional[str] = None,
+        profile: Optional[str] = None,
+    ) -> list[dict[str, Any]]:
+        query_filter = self._build_filter(filters)
+        hits = self.qdrant_service.search(
+            collection_name=collection,
+            query_vector=query_vec.tolist(),
+            limit=top_k,
+            score_threshold=cutoff,
+            query_filter=query_filter,
+            profile=profile,
+            with_payload=self.with_payload,
+        )
+        self._observe_dense(hits, top_k)
+        if self.lexical_index is None or not query:
+            return self._hits_to_chunks(hits)
+
+        lexical_hits = self.lexical_index.search(query, LEXICAL_TOP_K)
+        missing = self._missing_ids(hits, lexical_hits)
+        points = (
+            self.qdrant_service.get_points(collection, missing, query_filter, with_payload=self.with_payload)
+            if missing
+            else []
+        )
+        return self._fuse(hits, lexical_hits, points, min(top_k, FUSED_TOP_K))
+
+    async def retrieve_async(
+        self,
+        collection: str,
+        query_vec: np.ndarray,
+        top_k: int,
+        cutoff: float,
+        filters: Optional[dict[str, Any]] = None,
+        query: Optional[str] = None,
+        profile: Optional[str] = None,
+        fused_top_k: int = FUSED_TOP_K,
+    ) -> list[dict[str, Any]]:
+        query_filter = self._build_filter(filters)
+        dense = self.qdrant_service.search_async(
+            collection_name=collection,
+            query_vector=query_vec.tolist(),
+            limit=top_k,
+            score_threshold=cutoff,
+            query_filter=query_filter,
+            profile=profile,
+            with_payload=self.with_payload,
+        )
+        if self.lexical_index is None or not query:
+            hits = await dense
+            self._observe_dense(hits, top_k)
+            return self._hits_to_chunks(hits)
+
+        loop = asyncio.get_running_loop()
+        lexical = loop.run_in_executor(None, self.lexical_index.search, query, LEXICAL_TOP_K)
+        hits, lexical_hits = await asyncio.gather(dense, lexical)
+        self._observe_dense(hits, top_k)
+
+        missing = self._missing_ids(hits, lexical_hits)
+        points = (
+            await self.qdrant_service.get_points_async(
+                collection, missing, query_filter, with_payload=self.with_payload
+            )
+            if missing
+            else []
+        )
+        return self._fuse(hits, lexical_hits, points, min(top_k, fused_top_k))
+
+    async def retrieve_batch_async(
+        self,
+        collection: str,
+        query_vecs: list[np.ndarray],
+        top_k: int,
+        cutoff: float,
+        filters: Optional[dict[str, Any]] = None,
+        queries: Optional[list[str]] = None,
+        profile: Optional[str] = None,
+    ) -> list[list[dict[str, Any]]]:
+        """``retrieve_async`` for many queries sharing the same filters.
+
+        Dense search goes out as Qdrant ``search_batch`` calls of up to
+        SEARCH_BATCH_SIZE queries, and lexical-only hits for all queries are
+        fetched with a single ``get_points`` call.
+        """
+        query_filter = self._build_filter(filters)
+        vectors = [query_vec.tolist() for query_vec in query_vecs]
+        dense = asyncio.gather(
+            *(
+                self.qdrant_service.search_batch_async(
+                    collection_name=collection,
+                    query_vectors=vectors[start : start + SEARCH_BATCH_SIZE],
+                    limit=top_k,
+                    score_threshold=cutoff,
+                    query_filter=query_filter,
+                    profile=profile,
+                    with_payload=self.with_payload,
+                )
+                for start in range(0, len(vectors), SEARCH_BATCH_SIZE)
+            )
+        )
+        if self.lexical_index is None or not queries:
+            return [self._hits_to_chunks(hits) for batch in await dense for hits in batch]
+
+        loop = asyncio.get_running_loop()
+        lexical = asyncio.gather(
+            *(loop.run_in_executor(None, self.lexical_index.search, query, LEXICAL_TOP_K) for query in queries)
+        )
+        dense_batches, all_lexical_hits = await asyncio.gather(dense, lexical)
+        all_hits = [hits for batch in dense_batches for hits in batch]
+
+        missing = sorted(
+            {
+                chunk_id
+                for hits, lexical_hits in zip(all_hits, all_lexical_hits)
+                for chunk_id in self._missing_ids(hits, lexical_hits)
+            }
+        )
+        points = (
+            await self.qdrant_service.get_points_async(
+                collection, missing, query_filter, with_payload=self.with_payload
+            )
+            if missing
+            else []
+        )
+        return [
+            self._fuse(hits, lexical_hits, points, min(top_k, FUSED_TOP_K))
+            for hits, lexical_hits in zip(all_hits, all_lexical_hits)
         ]
 
-        all_scored = []
-        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
-            futures = []
-            for batch in batches:
-                pairs = [(query, chunk.get("text", "")) for chunk in batch]
-                
-                def score_batch(pairs_batch, batch_chunks):
-                    with torch.no_grad():
-                        inputs = self.tokenizer(
-                            pairs_batch,
-                            padding=True,
-                            truncation=True,
-                            max_length=512,
-                            return_tensors="pt",
-                        ).to(self.device)
-
-                        logits = self.model(**inputs).logits.squeeze().cpu()
-                        scores = logits.tolist() if len(batch_chunks) > 1 else [logits.item()]
-
-                    return list(zip(batch_chunks, scores))
-                
-                future = executor.submit(score_batch, pairs, batch)
-                futures.append(future)
-            
-            for future in futures:
-                batch_results = future.result()
-                all_scored.extend(batch_results)
-
-        all_scored.sort(key=lambda x: x[1], reverse=True)
+    def _top_n(
+        self, chunks: list[dict[str, Any]], scores: list[float], top_n: int
+    ) -> list[dict[str, Any]]:
+        scored = sorted(zip(chunks, scores), key=lambda x: x[1], reverse=True)
 
         reranked = []
-        for chunk, score in all_scored[:top_n]:
+        for chunk, score in scored[:top_n]:
             chunk["rerank_score"] = float(score)
             chunk["score"] = float(score)
             reranked.append(chunk)
 
         return reranked
 
+    def _plan(self, chunks: list[dict[str, Any]], top_n: int) -> Optional[list[dict[str, Any]]]:
+        """Candidates for the cascade's reranking, or None to keep the first-stage order."""
+        plan = self.cascade.plan(chunks, top_n)
+        if plan.path == PATH_SKIPPED:
+            return None
+        CANDIDATES.labels("reranked").observe(len(plan.candidates))
+        return plan.candidates
+
+    def rerank(
+        self, query: str, chunks: list[dict[str, Any]], top_n: int, adaptive: bool = True
+    ) -> list[dict[str, Any]]:
+        if self.cascade is None or not adaptive:
+            return self._top_n(chunks, self.rerank_engine.score(query, chunks), top_n)
+        candidates = self._plan(chunks, top_n)
+        if candidates is None:
+            return chunks[:top_n]
+        if self.cascade.wants_prefilter(candidates, top_n):
+            head_scores = self.rerank_engine.score(query, self.cascade.heads(candidates))
+            candidates = self.cascade.survivors(candidates, head_scores, top_n)
+        self.cascade.record_full_pass(len(candidates))
+        return self._top_n(candidates, self.rerank_engine.score(query, candidates), top_n)
+
+    async def rerank_async(
+        self, query: str, chunks: list[dict[str, Any]], top_n: int, adaptive: bool = True
+    ) -> list[dict[str, Any]]:
+        """Top ``top_n`` of ``chunks`` by cross-encoder score.
+
+        With a cascade and ``adaptive`` on, the cascade may skip the
+        cross-encoder or shrink the candidate list first; ``adaptive=False``
+        always scores every chunk (e.g. for paged search results).
+        """
+        if self.cascade is None or not adaptive:
+            scores = await self.rerank_engine.score_async(query, chunks)
+            return self._top_n(chunks, scores, top_n)
+        candidates = self._plan(chunks, top_n)
+        if candidates is None:
+            return chunks[:top_n]
+        if self.cascade.wants_prefilter(candidates, top_n):
+            head_scores = await self.rerank_engine.score_async(query, self.cascade.heads(candidates))
+            candidates = self.cascade.survivors(candidates, head_scores, top_n)
+        self.cascade.record_full_pass(len(candidates))
+        scores = await self.rerank_engine.score_async(query, candidates)
+        return self._top_n(candidates, scores, top_n)
+
+    async def rerank_batch_async(
+        self, queries: list[str], chunk_lists: list[list[dict[str, Any]]], top_n: int
+    ) -> list[list[dict[str, Any]]]:
+        if self.cascade is None:
+            all_scores = await self.rerank_engine.score_many_async(list(zip(queries, chunk_lists)))
+            return [self._top_n(chunks, scores, top_n) for chunks, scores in zip(chunk_lists, all_scores)]
+
+        results: list[Optional[list[dict[str, Any]]]] = [None] * len(queries)
+        scored = []
+        for i, chunks in enumerate(chunk_lists):
+            candidates = self._plan(chunks, top_n)
+            if candidates is None:
+                results[i] = chunks[:top_n]
+            else:
+                scored.append((i, candidates))
+
+        to_prefilter = [(i, c) for i, c in scored if self.cascade.wants_prefilter(c, top_n)]
+        if to_prefilter:
+            # One shared truncated pass for all queries, then one shared full-length pass.
+            head_scores = await self.rerank_engine.score_many_async(
+                [(queries[i], self.cascade.heads(c)) for i, c in to_prefilter]
+            )
+            survivors = {
+                i: self.cascade.survivors(c, scores, top_n) for (i, c), scores in zip(to_prefilter, head_scores)
+            }
+            scored = [(i, survivors.get(i, c)) for i, c in scored]
+
+        for _, candidates in scored:
+            self.cascade.record_full_pass(len(candidates))
+        all_scores = await self.rerank_engine.score_many_async([(queries[i], c) for i, c in scored])
+        for (i, candidates), scores in zip(scored, all_scores):
+            results[i] = self._top_n(candidates, scores, top_n)
+        return results
 
+    def warmup(self, pair_counts: tuple[int, ...] = WARMUP_PAIR_COUNTS) -> None:
+        self.rerank_engine.warmup(pair_counts, WARMUP_PASSAGE)
 
+    def rerank_stats(self) -> dict:
+        stats = self.rerank_engine.stats()
+        if self.cascade is not None:
+            stats["cascade"] = self.cascade.stats()
+        return stats
@@ -0,0 +1,166 @@
+import asyncio
+from types import SimpleNamespace
+
+import httpx
+import pytest
+from fastapi import FastAPI
+
+from controllers.rag_controller import router
+from dependencies import get_query_handler
+from handlers import QueryHandler
+from helpers.rag_helpers.admission import AdmissionQueue, Lane, OverloadedError
+from helpers.rag_helpers.batching import SingleFlight
+
+LANES = {
+    "interactive": Lane(priority=0, max_queued=2, max_wait_s=None),
+    "batch": Lane(priority=1, max_queued=1, max_wait_s=None),
+}
+
+
+async def wait_queued(queue: AdmissionQueue, lane: str, count: int) -> None:
+    while queue.stats()["queued"][lane] < count:
+        await asyncio.sleep(0)
+
+
+async def hold(queue: AdmissionQueue, lane: str, order: list, release: asyncio.Event) -> None:
+    async with queue.slot(lane):
+        order.append(lane)
+        await release.wait()
+
+
+async def test_admits_up_to_max_in_flight_without_queueing():
+    queue = AdmissionQueue(max_in_flight=2, lanes=LANES)
+    async with queue.slot():
+        async with queue.slot("batch"):
+            assert queue.stats()["in_flight"] == 2
+            assert queue.stats()["queued"] == {"interactive": 0, "batch": 0}
+    assert queue.stats()["in_flight"] == 0
+
+
+async def test_each_lane_sheds_past_its_own_queue_limit():
+    queue = AdmissionQueue(max_in_flight=1, lanes=LANES)
+    release = asyncio.Event()
+    order: list = []
+    async with queue.slot():
+        waiters = [asyncio.create_task(hold(queue, "interactive", order, release)) for _ in range(2)]
+        waiters.append(asyncio.create_task(hold(queue, "batch", order, release)))
+        await wait_queued(queue, "interactive", 2)
+        await wait_queued(queue, "batch", 1)
+
+        with pytest.raises(OverloadedError, match="interactive queue is full") as shed:
+            async with queue.slot("interactive"):
+                pass
+        assert shed.value.retry_after >= 1
+        with pytest.raises(OverloadedError, match="batch queue is full"):
+            async with queue.slot("batch"):
+                pass
+        assert queue.stats()["rejected"] == {"interactive": 1, "batch": 1}
+        release.set()
+    await asyncio.gather(*waiters)
+    assert queue.stats()["in_flight"] == 0
+
+
+async def test_interactive_waiters_overtake_queued_batch_work():
+    queue = AdmissionQueue(max_in_flight=1, lanes=LANES)
+    release = asyncio.Event()
+    release.set()
+    order: list = []
+    async with queue.slot():
+        batch = asyncio.create_task(hold(queue, "batch", order, release))
+        await wait_queued(queue, "batch", 1)
+        interactive = asyncio.create_task(hold(queue, "interactive", order, release))
+        await wait_queued(queue, "interactive", 1)
+    await asyncio.gather(batch, interactive)
+    assert order == ["interactive", "batch"]
+
+
+async def test_waiting_past_max_wait_sheds_and_frees_the_queue_position():
+    lanes = {"interactive": Lane(priority=0, max_queued=1, max_wait_s=0.05)}
+    queue = AdmissionQueue(max_in_flight=1, lanes=lanes)
+    async with queue.slot():
+        with pytest.raises(OverloadedError, match="Timed out waiting in the interactive queue"):
+            async with queue.slot():
+                pass
+        assert queue.stats()["timed_out"] == {"interactive": 1}
+        assert queue.stats()["queued"] == {"interactive": 0}
+    assert queue.stats()["in_flight"] == 0
+
+
+async def test_cancelled_waiter_leaves_the_queue():
+    queue = AdmissionQueue(max_in_flight=1, lanes=LANES)
+    async with queue.slot():
+        waiter = asyncio.create_task(hold(queue, "interactive", [], asyncio.Event()))
+        await wait_queued(queue, "interactive", 1)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        assert queue.stats()["queued"] == {"interactive": 0, "batch": 0}
+    assert queue.stats()["in_flight"] == 0
+
+
+async def test_shed_retry_after_reports_without_taking_a_slot():
+    queue = AdmissionQueue(max_in_flight=1, lanes={"interactive": Lane(priority=0, max_queued=1, max_wait_s=None)})
+    assert queue.shed_retry_after() is None
+    release = asyncio.Event()
+    async with queue.slot():
+        # In flight is full but the lane can still queue one.
+        assert queue.shed_retry_after() is None
+        waiter = asyncio.create_task(hold(queue, "interactive", [], release))
+        await wait_queued(queue, "interactive", 1)
+        assert queue.shed_retry_after() >= 1
+        assert queue.stats()["in_flight"] == 1
+        release.set()
+    await waiter
+
+
+class OverloadedHandler(QueryHandler):
+    """QueryHandler whose pipeline is only the admission queue."""
+
+    def __init__(self, admission: AdmissionQueue):
+        self.llm = SimpleNamespace(admission=admission)
+        self.single_flight = SingleFlight()
+
+    async def handle_query(self, query, **kwargs):
+        async with self.llm.admission.slot("interactive"):
+            raise AssertionError("the queue should have shed this request")
+
+
+@pytest.fixture
+async def saturated():
+    """A handler whose interactive lane has one slot and no queue, plus an app serving it."""
+    handler = OverloadedHandler(
+        AdmissionQueue(max_in_flight=1, lanes={"interactive": Lane(priority=0, max_queued=0, max_wait_s=None)})
+    )
+    app = FastAPI()
+    app.include_router(router)
+    app.dependency_overrides[get_query_handler] = lambda: handler
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        yield handler, client
+
+
+@pytest.mark.parametrize("path", ["/query", "/query/stream"])
+async def test_shed_requests_get_503_with_retry_after(saturated, path):
+    handler, client = saturated
+    async with handler.llm.admission.slot():
+        response = await client.post(path, json={"query": "refund status"})
+    assert response.status_code == 503
+    assert response.json() == {"detail": "interactive queue is full"}
+    assert int(response.headers["retry-after"]) >= 1
+
+
+async def test_stream_joining_a_running_generation_is_not_shed(saturated):
+    handler, _ = saturated
+    release = asyncio.Event()
+
+    async def generation():
+        yield {"type": "sources"}
+        await release.wait()
+
+    key = handler._flight_key("refund status", None, None, None, None, None)
+    running = handler.single_flight.stream(key, generation)
+    assert await running.__anext__() == {"type": "sources"}
+    async with handler.llm.admission.slot():
+        assert handler.stream_retry_after("refund status") is None
+        assert handler.stream_retry_after("other question") >= 1
+    release.set()
+    await running.aclose()
@@ -0,0 +1,87 @@
+from urllib.parse import urlparse
+
+import httpx
+import pytest
+from tenacity import wait_none
+
+from helpers.rag_helpers.crawlers import AsyncWebCrawler
+from helpers.rag_helpers.crawlers.crawler_helpers import parse_robots_response
+
+BASE_URL = "https://www.irs.gov"
+ROBOTS_TXT = "User-agent: *\nDisallow: /private/\n"
+PAGE = b"<html><head><title>Refunds</title></head><body><p>Where's my refund?</p></body></html>"
+
+
+@pytest.fixture(autouse=True)
+def no_retry_wait(monkeypatch):
+    monkeypatch.setattr(AsyncWebCrawler._get.retry, "wait", wait_none())
+
+
+def site(robots_status: int = 200, redirects: dict[str, str] = None):
+    """Mock irs.gov: robots.txt with ``robots_status``, ``redirects`` as path -> Location, pages elsewhere."""
+    requested = []
+
+    def handle(request: httpx.Request) -> httpx.Response:
+        requested.append(str(request.url))
+        path = request.url.path
+        if path == "/robots.txt":
+            return httpx.Response(robots_status, text=ROBOTS_TXT)
+        if path in (redirects or {}):
+            return httpx.Response(301, headers={"location": redirects[path]})
+        return httpx.Response(200, content=PAGE, headers={"content-type": "text/html"})
+
+    return httpx.MockTransport(handle), requested
+
+
+async def crawler_for(transport: httpx.MockTransport) -> AsyncWebCrawler:
+    crawler = AsyncWebCrawler(BASE_URL, rate_limit_rps=1000, http2=False, transport=transport)
+    await crawler.load_robots_txt()
+    return crawler
+
+
+@pytest.mark.parametrize(
+    "status, allowed",
+    [(200, True), (401, False), (403, False), (404, True), (429, True), (500, False), (503, False)],
+)
+def test_robots_status_rules(status, allowed):
+    parser = parse_robots_response(f"{BASE_URL}/robots.txt", status, ROBOTS_TXT)
+    assert parser.can_fetch("IRS-RAG-Bot/1.0", f"{BASE_URL}/refunds") is allowed
+
+
+async def test_robots_disallowed_paths_are_not_fetched():
+    transport, requested = site()
+    crawler = await crawler_for(transport)
+    assert await crawler.fetch(f"{BASE_URL}/private/page") is None
+    assert (await crawler.fetch(f"{BASE_URL}/refunds")).status_code == 200
+    assert requested == [f"{BASE_URL}/robots.txt", f"{BASE_URL}/refunds"]
+    await crawler.aclose()
+
+
+async def test_robots_server_error_disallows_everything():
+    transport, requested = site(robots_status=503)
+    crawler = await crawler_for(transport)
+    assert await crawler.fetch(f"{BASE_URL}/refunds") is None
+    # robots.txt was retried, and no page was requested.
+    assert all(urlparse(url).path == "/robots.txt" for url in requested)
+    await crawler.aclose()
+
+
+async def test_redirect_within_the_site_is_followed():
+    transport, requested = site(redirects={"/old": f"{BASE_URL}/refunds"})
+    crawler = await crawler_for(transport)
+    page = await crawler.fetch(f"{BASE_URL}/old")
+    assert page is not None and page.status_code == 200
+    assert requested[-1] == f"{BASE_URL}/refunds"
+    await crawler.aclose()
+
+
+@pytest.mark.parametrize(
+    "target", ["https://example.com/refunds", "https://www.irs.gov.example.com/refunds", f"{BASE_URL}/private/x"]
+)
+async def test_redirect_to_an_off_limits_url_is_not_followed(target):
+    transport, requested = site(redirects={"/old": target})
+    crawler = await crawler_for(transport)
+    assert await crawler.fetch(f"{BASE_URL}/old") is None
+    assert target not in requested
+    assert crawler.stats()["blocked_redirects"] == 1
+    await crawler.aclose()
@@ -0,0 +1,136 @@
+from datetime import datetime, timezone
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from qdrant_client.models import DatetimeRange, FieldCondition, Filter, MatchAny, MatchValue, Range
+
+from controllers.rag_controller import router
+from dependencies import get_query_handler
+from handlers import QueryHandler
+from helpers.rag_helpers.filters import build_filter
+from utils import url_path_prefixes
+
+
+def test_empty_filters_build_nothing():
+    assert build_filter(None) is None
+    assert build_filter({}) is None
+
+
+def test_scalar_is_exact_match():
+    assert build_filter({"content_type": "pdf"}) == Filter(
+        must=[FieldCondition(key="content_type", match=MatchValue(value="pdf"))]
+    )
+
+
+def test_list_is_any_of():
+    assert build_filter({"form_numbers": ["W4", "1040"]}) == Filter(
+        must=[FieldCondition(key="form_numbers", match=MatchAny(any=["W4", "1040"]))]
+    )
+
+
+def test_match_and_any_operators():
+    built = build_filter({"section_heading": {"match": "Refunds"}, "form_numbers": {"any": ["W9"]}})
+    assert built.must == [
+        FieldCondition(key="section_heading", match=MatchValue(value="Refunds")),
+        FieldCondition(key="form_numbers", match=MatchAny(any=["W9"])),
+    ]
+
+
+@pytest.mark.parametrize(
+    "prefix", ["https://www.irs.gov/forms-pubs", "https://www.irs.gov/forms-pubs/"]
+)
+def test_prefix_rewrites_to_url_prefixes(prefix):
+    condition = build_filter({"url": {"prefix": prefix}}).must[0]
+    assert condition == FieldCondition(
+        key="url_prefixes", match=MatchValue(value="https://www.irs.gov/forms-pubs")
+    )
+    # The rewritten value is one of the prefixes ingestion stores for pages under it.
+    assert condition.match.value in url_path_prefixes("https://www.irs.gov/forms-pubs/about-form-w-4")
+
+
+def test_datetime_range_parses_iso8601():
+    condition = build_filter(
+        {"crawl_ts": {"gte": "2025-01-01T00:00:00Z", "lt": datetime(2025, 6, 1, tzinfo=timezone.utc)}}
+    ).must[0]
+    assert condition.key == "crawl_ts"
+    assert isinstance(condition.range, DatetimeRange)
+    assert condition.range.gte == datetime(2025, 1, 1, tzinfo=timezone.utc)
+    assert condition.range.lt == datetime(2025, 6, 1, tzinfo=timezone.utc)
+
+
+def test_integer_range():
+    assert build_filter({"tokens": {"gt": 10, "lte": 400}}).must == [
+        FieldCondition(key="tokens", range=Range(gt=10, lte=400))
+    ]
+
+
+def test_field_not_with_one_condition_goes_to_must_not():
+    assert build_filter({"content_type": {"not": "pdf"}}) == Filter(
+        must_not=[FieldCondition(key="content_type", match=MatchValue(value="pdf"))]
+    )
+
+
+def test_field_not_with_several_conditions_negates_them_together():
+    built = build_filter({"char_start": {"not": {"gte": 0, "match": 5}}})
+    assert built.must is None
+    assert built.must_not == [
+        Filter(
+            must=[
+                FieldCondition(key="char_start", match=MatchValue(value=5)),
+                FieldCondition(key="char_start", range=Range(gte=0)),
+            ]
+        )
+    ]
+
+
+def test_top_level_not_negates_a_nested_filter():
+    built = build_filter({"content_type": "html", "not": {"url": {"prefix": "https://www.irs.gov/pub"}}})
+    assert built.must == [FieldCondition(key="content_type", match=MatchValue(value="html"))]
+    assert built.must_not == [
+        Filter(must=[FieldCondition(key="url_prefixes", match=MatchValue(value="https://www.irs.gov/pub"))])
+    ]
+
+
+def test_empty_top_level_not_is_dropped():
+    assert build_filter({"not": {}}) is None
+
+
+@pytest.mark.parametrize(
+    "filters, message",
+    [
+        (["content_type"], "filters must be an object"),
+        ({"nope": "x"}, "Unknown filter field: nope"),
+        ({"url_prefixes": "https://www.irs.gov"}, "Unknown filter field: url_prefixes"),
+        ({"content_type": {"like": "pdf"}}, "Unknown filter operator for content_type: like"),
+        ({"form_numbers": []}, "non-empty list"),
+        ({"form_numbers": ["W4", 1.5]}, "non-empty list"),
+        ({"form_numbers": [True]}, "non-empty list"),
+        ({"content_type": 1.5}, "must be a string, integer or boolean"),
+        ({"content_type": {"prefix": "p"}}, "Prefix filters are not supported on content_type"),
+        ({"url": {"prefix": ""}}, "Prefix filter for url must be a non-empty string"),
+        ({"url": {"prefix": 3}}, "Prefix filter for url must be a non-empty string"),
+        ({"crawl_ts": {"gte": "last tuesday"}}, "Range bound gte for crawl_ts must be an ISO 8601 datetime"),
+        ({"url": {"gt": 1}}, "Range filters are not supported on url"),
+        ({"tokens": {"lt": "100"}}, "Range bound lt for tokens must be a number"),
+        ({"tokens": {"lt": True}}, "Range bound lt for tokens must be a number"),
+        ({"not": {"nope": 1}}, "Unknown filter field: nope"),
+        ({"content_type": {"not": {"like": 1}}}, "Unknown filter operator for content_type: like"),
+    ],
+)
+def test_invalid_filters_raise_value_error(filters, message):
+    with pytest.raises(ValueError, match=message):
+        build_filter(filters)
+
+
+def test_query_answers_400_for_invalid_filters():
+    app = FastAPI()
+    app.include_router(router)
+    # validate_filters needs no services, so a bare handler is enough to reach the 400.
+    app.dependency_overrides[get_query_handler] = lambda: QueryHandler.__new__(QueryHandler)
+    client = TestClient(app)
+
+    for path in ("/query", "/query/stream"):
+        response = client.post(path, json={"query": "refund status", "filters": {"nope": "x"}})
+        assert response.status_code == 400
+        assert response.json() == {"detail": "Unknown filter field: nope"}
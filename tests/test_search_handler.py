@@ -0,0 +1,80 @@
+import httpx
+import numpy as np
+import pytest
+from fastapi import FastAPI
+
+from controllers.rag_controller import router
+from dependencies import get_search_handler
+from handlers import SearchHandler
+
+
+class StubEmbedding:
+    async def get_embedding_async(self, text):
+        return np.ones(4, dtype=np.float32)
+
+
+class StubRetrieval:
+    def __init__(self, error=None):
+        self.error = error
+
+    async def retrieve_async(self, *args, **kwargs):
+        if self.error is not None:
+            raise self.error
+        return [
+            {
+                "id": 1,
+                "url": "https://www.irs.gov/refunds",
+                "text": "Where's my refund",
+                "score": 1.7,
+                "vector_score": 0.9,
+                "rrf_score": 0.03,
+            },
+            # Found only by BM25, so it has no dense similarity.
+            {
+                "id": 2,
+                "url": "https://www.irs.gov/w4",
+                "text": "Form W-4",
+                "score": 0.01,
+                "vector_score": None,
+                "bm25_score": 7.5,
+                "rrf_score": 0.016,
+            },
+        ]
+
+    async def rerank_async(self, query, chunks, top_n, adaptive=True):
+        return chunks[:top_n]
+
+
+async def search(retrieval: StubRetrieval, **body) -> httpx.Response:
+    app = FastAPI()
+    app.include_router(router)
+    app.dependency_overrides[get_search_handler] = lambda: SearchHandler(StubEmbedding(), retrieval)
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        return await client.post("/search", json={"query": "refund status", **body})
+
+
+async def test_search_returns_sources_and_score_breakdown():
+    response = await search(StubRetrieval(), include_scores=True, rerank=False)
+    assert response.status_code == 200
+    body = response.json()
+    assert [source["url"] for source in body["sources"]] == ["https://www.irs.gov/refunds", "https://www.irs.gov/w4"]
+    # Scores are clamped for display; the breakdown keeps the raw values.
+    assert body["sources"][0]["score"] == 1.0
+    assert body["score_breakdown"][1]["vector_score"] is None
+    assert body["score_breakdown"][1]["bm25_score"] == 7.5
+
+
+@pytest.mark.parametrize(
+    "error", [httpx.ConnectError("qdrant unreachable"), RuntimeError("inference sidecar is down")]
+)
+async def test_backend_outage_answers_with_no_sources(error):
+    response = await search(StubRetrieval(error), include_scores=True)
+    assert response.status_code == 200
+    assert response.json()["sources"] == []
+    assert response.json()["total_candidates"] == 0
+    assert response.json()["score_breakdown"] == []
+
+
+async def test_other_failures_still_surface_as_500():
+    response = await search(StubRetrieval(KeyError("payload")))
+    assert response.status_code == 500
@@ -0,0 +1,179 @@
+import asyncio
+
+import pytest
+
+from helpers.rag_helpers.batching import SingleFlight
+
+
+async def test_do_coalesces_concurrent_calls():
+    flight = SingleFlight()
+    calls = 0
+    release = asyncio.Event()
+
+    async def work():
+        nonlocal calls
+        calls += 1
+        await release.wait()
+        return "answer"
+
+    waiters = [asyncio.create_task(flight.do("key", work)) for _ in range(5)]
+    await asyncio.sleep(0)
+    release.set()
+
+    assert await asyncio.gather(*waiters) == ["answer"] * 5
+    assert calls == 1
+    assert flight.stats() == {"in_flight": 0, "executions": 1, "coalesced": 4}
+
+
+async def test_do_runs_again_once_the_call_finished():
+    flight = SingleFlight()
+    calls = 0
+
+    async def work():
+        nonlocal calls
+        calls += 1
+        return calls
+
+    assert await flight.do("key", work) == 1
+    assert await flight.do("key", work) == 2
+
+
+async def test_do_fans_exceptions_out_to_every_waiter():
+    flight = SingleFlight()
+    release = asyncio.Event()
+
+    async def work():
+        await release.wait()
+        raise RuntimeError("backend down")
+
+    waiters = [asyncio.create_task(flight.do("key", work)) for _ in range(3)]
+    await asyncio.sleep(0)
+    release.set()
+
+    results = await asyncio.gather(*waiters, return_exceptions=True)
+    assert all(isinstance(result, RuntimeError) and str(result) == "backend down" for result in results)
+    assert flight.stats()["in_flight"] == 0
+
+
+async def test_do_survives_one_caller_being_cancelled():
+    flight = SingleFlight()
+    release = asyncio.Event()
+
+    async def work():
+        await release.wait()
+        return "answer"
+
+    first = asyncio.create_task(flight.do("key", work))
+    second = asyncio.create_task(flight.do("key", work))
+    await asyncio.sleep(0)
+    first.cancel()
+    release.set()
+
+    assert await second == "answer"
+    with pytest.raises(asyncio.CancelledError):
+        await first
+
+
+class Producer:
+    """Async generator whose events are released one at a time by the test."""
+
+    def __init__(self):
+        self.started = 0
+        self.closed = asyncio.Event()
+        self.steps: asyncio.Queue = asyncio.Queue()
+
+    async def events(self):
+        self.started += 1
+        try:
+            while True:
+                event = await self.steps.get()
+                if event is None:
+                    return
+                if isinstance(event, Exception):
+                    raise event
+                yield event
+        finally:
+            self.closed.set()
+
+
+async def collect(stream, into: list):
+    async for event in stream:
+        into.append(event)
+
+
+async def test_stream_shares_one_producer_and_replays_to_late_subscribers():
+    flight = SingleFlight()
+    producer = Producer()
+    early, late = [], []
+
+    first = asyncio.create_task(collect(flight.stream("key", producer.events), early))
+    await asyncio.sleep(0)
+    for event in ("sources", "token-1"):
+        producer.steps.put_nowait(event)
+    while len(early) < 2:
+        await asyncio.sleep(0)
+
+    second = asyncio.create_task(collect(flight.stream("key", producer.events), late))
+    producer.steps.put_nowait("token-2")
+    producer.steps.put_nowait(None)
+    await asyncio.gather(first, second)
+
+    assert early == late == ["sources", "token-1", "token-2"]
+    assert producer.started == 1
+    assert flight.stats() == {"in_flight": 0, "executions": 1, "coalesced": 1}
+
+
+async def test_stream_keeps_running_while_any_subscriber_remains():
+    flight = SingleFlight()
+    producer = Producer()
+    kept = []
+
+    leaving = flight.stream("key", producer.events)
+    staying = asyncio.create_task(collect(flight.stream("key", producer.events), kept))
+    producer.steps.put_nowait("sources")
+    assert await leaving.__anext__() == "sources"
+    await leaving.aclose()
+
+    producer.steps.put_nowait("token")
+    producer.steps.put_nowait(None)
+    await staying
+    assert kept == ["sources", "token"]
+
+
+async def test_stream_cancels_the_producer_when_the_last_subscriber_leaves():
+    flight = SingleFlight()
+    producer = Producer()
+
+    subscribers = [flight.stream("key", producer.events) for _ in range(2)]
+    producer.steps.put_nowait("sources")
+    for subscriber in subscribers:
+        assert await subscriber.__anext__() == "sources"
+
+    await subscribers[0].aclose()
+    assert not producer.closed.is_set()
+    await subscribers[1].aclose()
+
+    await asyncio.wait_for(producer.closed.wait(), 1)
+    assert not flight.streaming("key")
+    # A new subscriber starts a fresh producer rather than joining the cancelled one.
+    fresh = flight.stream("key", producer.events)
+    producer.steps.put_nowait("again")
+    assert await fresh.__anext__() == "again"
+    assert producer.started == 2
+    await fresh.aclose()
+
+
+async def test_stream_fans_errors_out_to_every_subscriber():
+    flight = SingleFlight()
+    producer = Producer()
+    received = [[], []]
+
+    tasks = [asyncio.create_task(collect(flight.stream("key", producer.events), into)) for into in received]
+    producer.steps.put_nowait("sources")
+    producer.steps.put_nowait(RuntimeError("ollama down"))
+
+    results = await asyncio.gather(*tasks, return_exceptions=True)
+    assert all(isinstance(result, RuntimeError) and str(result) == "ollama down" for result in results)
+    # Events before the failure still reach everyone.
+    assert received == [["sources"], ["sources"]]
+    assert not flight.streaming("key")
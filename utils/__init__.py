@@ -6,6 +6,8 @@ from .utils import (
     compute_content_hash,
     estimate_tokens,
     extract_irs_form_numbers,
+    normalize_form_number,
+    url_path_prefixes,
     format_iso8601,
     parse_iso8601,
     normalize_text,
@@ -18,6 +20,8 @@ __all__ = [
     "compute_content_hash",
     "estimate_tokens",
     "extract_irs_form_numbers",
+    "normalize_form_number",
+    "url_path_prefixes",
     "format_iso8601",
     "parse_iso8601",
     "normalize_text",
@@ -51,10 +51,27 @@ def estimate_tokens(text: str) -> int:
 
 def extract_irs_form_numbers(text: str) -> list[str]:
     """Extract IRS form numbers from text."""
-    # Pattern: Form 1040, Form W-9, etc.
-    pattern = r"Form\s+([A-Z0-9\-]+)"
+    # Pattern: Form 1040, Form W-9, Form 1099-K, etc. (must contain a digit)
+    pattern = r"\bForms?\s+([A-Z]{0,4}-?\d[A-Z0-9]*(?:-[A-Z0-9]+)*)"
     matches = re.findall(pattern, text, re.IGNORECASE)
-    return list(set(matches))
+    return sorted({match.upper() for match in matches})
+
+
+def normalize_form_number(form: str) -> str:
+    """Normalize form number for matching (W-4, w4 and W 4 all become W4)."""
+    return re.sub(r"[^A-Z0-9]", "", form.upper())
+
+
+def url_path_prefixes(url: str) -> list[str]:
+    """Every path-segment prefix of a URL, for prefix filtering on an exact-match index."""
+    parsed = urlparse(url)
+    base = f"{parsed.scheme}://{parsed.netloc}"
+    prefixes = [base]
+    for segment in parsed.path.strip("/").split("/"):
+        if segment:
+            base = f"{base}/{segment}"
+            prefixes.append(base)
+    return prefixes
 
 
 def format_iso8601(dt: Optional[datetime]) -> Optional[str]: